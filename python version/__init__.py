@@ -3,10 +3,20 @@
 __version__ = "0.1.0"
 __author__ = "SugarBuilder Contributors"
 
-from src.core import Config, Project, Compiler
-from src.commands import Command, ConfigureCommand, BuildCommand
-from src.toolchains import Toolchain
-from src.platforms import Platform
+from .lazy import lazy_module
+
+# Public names and the modules defining them, imported on first use (PEP 562)
+# so that `sugar --help` and light commands don't load the whole package
+_LAZY_IMPORTS = {
+    "Config": "src.core",
+    "Project": "src.core",
+    "Compiler": "src.core",
+    "Command": "src.commands",
+    "ConfigureCommand": "src.commands",
+    "BuildCommand": "src.commands",
+    "Toolchain": "src.toolchains",
+    "Platform": "src.platforms",
+}
 
 __all__ = [
     "Config",
@@ -18,3 +28,6 @@ __all__ = [
     "Toolchain",
     "Platform",
 ]
+
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
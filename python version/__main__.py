@@ -1,17 +1,27 @@
 """SugarBuilder - Manual C++ Build Tool."""
 
-from src.commands import ConfigureCommand, BuildCommand
-from typing import Optional
+from __future__ import annotations
+
 import sys
 
+# Importing typing would take longer than the rest of `sugar --help`, so
+# annotations stay unevaluated and only type checkers import it
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import List, Optional
+
 
-def main(argv: Optional[list[str]] = None) -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     """
     Main entry point for SugarBuilder CLI.
     
     Usage:
         sugar-builder configure [--config <path>]
-        sugar-builder build [--config <path>]
+        sugar-builder build [--config <path>] [-j <N>] [--watch] [--trace <file>] [--time-report]
+                            [--no-jobserver] [--memory-budget <size>]
+        sugar-builder worker [--listen <address>] [-j <N>]
+        sugar-builder stats [--config <path>] [--json] [--builds <N>] [--top <N>] [--threshold <percent>]
+        sugar-builder includes [--config <path>] [--json] [--top <N>]
         sugar-builder --help
     
     Args:
@@ -31,19 +41,71 @@ def main(argv: Optional[list[str]] = None) -> int:
     args = argv[1:]
     
     # Parse config path if provided
-    config_path = None
-    if "--config" in args:
-        config_idx = args.index("--config")
-        if config_idx + 1 < len(args):
-            config_path = args[config_idx + 1]
+    config_path = get_option(args, "--config")
     
     # Execute command
     try:
+        # Command modules are imported here so each run loads only its own
         if command_name == "configure":
+            from src.commands.configure import ConfigureCommand
             cmd = ConfigureCommand()
             return cmd.execute(config_path)
         elif command_name == "build":
-            cmd = BuildCommand()
+            jobs = get_option(args, "-j", "--jobs")
+            if jobs is not None and (not jobs.isdigit() or int(jobs) < 1):
+                print(f"Error: Invalid job count '{jobs}'")
+                return 1
+            from src.commands.build import BuildCommand
+            cmd = BuildCommand(
+                jobs=int(jobs) if jobs is not None else None,
+                watch="--watch" in args,
+                trace=get_option(args, "--trace"),
+                time_report="--time-report" in args,
+                jobserver="--no-jobserver" not in args,
+                memory_budget=get_option(args, "--memory-budget"),
+            )
+            return cmd.execute(config_path)
+        elif command_name == "worker":
+            jobs = get_option(args, "-j", "--jobs")
+            if jobs is not None and (not jobs.isdigit() or int(jobs) < 1):
+                print(f"Error: Invalid job count '{jobs}'")
+                return 1
+            from src.commands.worker import WorkerCommand
+            cmd = WorkerCommand(
+                listen=get_option(args, "--listen"),
+                jobs=int(jobs) if jobs is not None else None,
+            )
+            return cmd.execute()
+        elif command_name == "stats":
+            options = {}
+            for name in ("builds", "top"):
+                value = get_option(args, f"--{name}")
+                if value is not None:
+                    if not value.isdigit() or int(value) < 1:
+                        print(f"Error: Invalid --{name} count '{value}'")
+                        return 1
+                    options[name] = int(value)
+            threshold = get_option(args, "--threshold")
+            if threshold is not None:
+                try:
+                    options["threshold"] = float(threshold.rstrip("%")) / 100.0
+                except ValueError:
+                    options["threshold"] = -1.0
+                if options["threshold"] < 0:
+                    print(f"Error: Invalid threshold '{threshold}'")
+                    return 1
+            from src.commands.stats import StatsCommand
+            cmd = StatsCommand(json_output="--json" in args, **options)
+            return cmd.execute(config_path)
+        elif command_name == "includes":
+            top = get_option(args, "--top")
+            if top is not None and (not top.isdigit() or int(top) < 1):
+                print(f"Error: Invalid --top count '{top}'")
+                return 1
+            from src.commands.includes import IncludesCommand
+            cmd = IncludesCommand(json_output="--json" in args)
+            if top is not None:
+                cmd.top = int(top)
             return cmd.execute(config_path)
         else:
             print(f"Error: Unknown command '{command_name}'")
@@ -57,6 +119,31 @@ def main(argv: Optional[list[str]] = None) -> int:
         return 1
 
 
+def get_option(args: List[str], *names: str) -> Optional[str]:
+    """
+    Get the value of a command-line option.
+    
+    Accepts both "--name value" and "--name=value" forms; short options
+    also accept an attached value ("-j8").
+    
+    Args:
+        args: Command-line arguments.
+        names: Option spellings to look for (e.g. "-j", "--jobs").
+        
+    Returns:
+        Option value, or None if the option is not present.
+    """
+    for i, arg in enumerate(args):
+        for name in names:
+            if arg == name:
+                return args[i + 1] if i + 1 < len(args) else None
+            if arg.startswith(name + "="):
+                return arg[len(name) + 1:]
+            if not name.startswith("--") and arg.startswith(name) and len(arg) > len(name):
+                return arg[len(name):]
+    return None
+
+
 def print_help() -> None:
     """Print help text for SugarBuilder."""
     help_text = """
@@ -67,16 +154,37 @@ Usage:
 
 Commands:
   configure [--config <path>]    Validate sugar.toml configuration
-  build [--config <path>]        Compile and link the C++ project
+  build [--config <path>] [-j N] [--watch] [--trace <file>]
+                                 Compile and link the C++ project
+  worker [--listen <address>] [-j N]
+                                 Serve remote compiles for other builds
+  stats [--config <path>] [--json]
+                                 Show build-time trends and regressions
+  includes [--config <path>] [--json]
+                                 Rank headers by parse cost, suggest PCHs
   help                           Show this help message
 
 Options:
   --config <path>                Path to sugar.toml (defaults to ./sugar.toml)
+  -j, --jobs <N>                 Parallel compile jobs (defaults to CPU count)
+  --watch                        Rebuild whenever sources or headers change
+  --trace <file>                 Write a Chrome trace (Perfetto) of the build
+  --time-report                  Report compile hotspots (Clang -ftime-trace)
+  --no-jobserver                 Ignore make's jobserver and don't serve one
+  --memory-budget <size>         Memory parallel jobs may use (auto, off, 8G)
+  --listen <address>             Worker address: host:port or unix:/path
+  --json                         Print stats or includes as JSON
 
 Examples:
   sugar-builder configure
   sugar-builder build
   sugar-builder build --config custom.toml
+  sugar-builder build -j 8
+  sugar-builder build --watch
+  sugar-builder build --trace build.json
+  sugar-builder worker --listen 0.0.0.0:7230 -j 16
+  sugar-builder stats --json
+  sugar-builder includes --top 10
 
 For detailed command help:
   sugar-builder configure --help
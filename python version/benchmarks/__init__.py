@@ -0,0 +1,14 @@
+"""Benchmarks for the SugarBuilder build driver."""
+
+from .fake_toolchain import FakeToolchain
+from .generator import ProjectSpec, generate_project
+from .suite import compare_results, run_benchmark, run_suite
+
+__all__ = [
+    "FakeToolchain",
+    "ProjectSpec",
+    "generate_project",
+    "compare_results",
+    "run_benchmark",
+    "run_suite",
+]
@@ -0,0 +1,66 @@
+"""
+Run the build driver benchmarks.
+
+Usage:
+    python -m src.benchmarks [--sizes 100,1000,10000,100000] [--jobs N]
+                             [--fanout N] [--depth N]
+                             [--compile-latency S] [--link-latency S]
+                             [--output results.json] [--compare baseline.json]
+                             [--workdir DIR]
+
+With the default zero latencies the fake toolchain does no work, so the
+timings measure driver overhead only.
+"""
+
+from pathlib import Path
+from typing import Optional
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+from src.core import default_job_count
+from .suite import compare_results, run_suite, save_results
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks", description="Build driver benchmarks")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="comma-separated TU counts")
+    parser.add_argument("--jobs", type=int, default=default_job_count(), help="parallel jobs")
+    parser.add_argument("--fanout", type=int, default=8, help="headers included per TU")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting depth")
+    parser.add_argument("--compile-latency", type=float, default=0.0, help="simulated seconds per compile")
+    parser.add_argument("--link-latency", type=float, default=0.0, help="simulated seconds per link")
+    parser.add_argument("--output", default="benchmark_results.json", help="results file to write")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as regression")
+    parser.add_argument("--workdir", help="directory for generated projects (kept afterwards)")
+    args = parser.parse_args(argv)
+    
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="sugar-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        results = run_suite(sizes, workdir.resolve(), args.jobs, args.fanout, args.depth,
+                            args.compile_latency, args.link_latency)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    save_results(results, Path(args.output))
+    print(f"Results written to: {args.output}")
+    
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines = compare_results(baseline, results, args.threshold)
+        print(f"\nCompared with {args.compare} ({baseline.get('commit', 'unknown')}):")
+        for line in lines:
+            print(f"  {line}")
+        if any(line.startswith("REGRESSION") for line in lines):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
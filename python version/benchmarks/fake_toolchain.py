@@ -0,0 +1,138 @@
+"""Toolchain that simulates compiler latency without running a compiler."""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import re
+import threading
+import time
+from src.core.depfile import write_depfile
+from src.toolchains import Toolchain
+from src.toolchains.probe import ToolchainProbe
+
+_INCLUDE_PATTERN = re.compile(r'^#include "([^"]+)"', re.MULTILINE)
+
+
+class FakeToolchain(Toolchain):
+    """
+    Stand-in toolchain for measuring driver overhead.
+    
+    Compiling sleeps for compile_latency seconds and writes a small object
+    (derived from the source content, so identical sources give identical
+    objects) plus a depfile listing the transitive project headers. Linking
+    sleeps for link_latency seconds. With zero latency, a build measures
+    nothing but the driver itself.
+    """
+    
+    def __init__(self, compile_latency: float = 0.0, link_latency: float = 0.0):
+        """
+        Initialize fake toolchain.
+        
+        Args:
+            compile_latency: Simulated seconds per compile.
+            link_latency: Simulated seconds per link.
+        """
+        super().__init__("Fake")
+        self.compile_latency = compile_latency
+        self.link_latency = link_latency
+        self.compiles = 0
+        self.links = 0
+        self._header_deps: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+    
+    def _dependencies(self, path: Path, include_dirs: List[Path]) -> List[str]:
+        """Resolve the transitive quoted includes of a file."""
+        deps: List[str] = []
+        seen = set()
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            cached = self._header_deps.get(str(current))
+            if cached is None:
+                cached = []
+                text = current.read_text(encoding="utf-8")
+                for name in _INCLUDE_PATTERN.findall(text):
+                    for directory in [current.parent, *include_dirs]:
+                        candidate = directory / name
+                        if candidate.is_file():
+                            cached.append(str(candidate))
+                            break
+                self._header_deps[str(current)] = cached
+            for dep in cached:
+                if dep not in seen:
+                    seen.add(dep)
+                    deps.append(dep)
+                    stack.append(Path(dep))
+        return deps
+    
+    def compile_object(
+        self,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> bool:
+        """Simulate a compile."""
+        if self.compile_latency:
+            time.sleep(self.compile_latency)
+        data = source_file.read_bytes()
+        output_file.write_bytes(b"FAKEOBJ" + hashlib.blake2b(data, digest_size=16).digest())
+        if depfile:
+            write_depfile(depfile, output_file, [str(source_file)] + self._dependencies(source_file, include_dirs or []))
+        with self._lock:
+            self.compiles += 1
+        return True
+    
+    def get_compile_command(
+        self,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """Get a command line shaped like a real compiler's."""
+        cmd = ["fakecc", "-c", "-o", str(output_file), str(source_file)]
+        cmd.extend(f"-I{inc_dir}" for inc_dir in include_dirs or [])
+        cmd.extend(flags or [])
+        if depfile:
+            cmd.extend(["-MMD", "-MF", str(depfile)])
+        return cmd
+    
+    def get_preprocess_command(
+        self,
+        source_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Get a preprocess command that just prints the source."""
+        return ["cat", str(source_file)]
+    
+    def get_probe(self) -> ToolchainProbe:
+        """Describe the fake compiler (there is nothing to detect or cache)."""
+        return ToolchainProbe("Fake", path="fakecc", version="fakecc 1.0", target="none")
+    
+    def _link(self, output_file: Path, object_files: List[Path]) -> bool:
+        """Simulate a link."""
+        if self.link_latency:
+            time.sleep(self.link_latency)
+        output_file.write_bytes(b"FAKEBIN" + len(object_files).to_bytes(8, "little"))
+        self.links += 1
+        return True
+    
+    def link_executable(self, object_files, output_file, lib_dirs=None, libraries=None, flags=None) -> bool:
+        """Simulate linking an executable."""
+        return self._link(output_file, object_files)
+    
+    def link_static_library(self, object_files, output_file, flags=None) -> bool:
+        """Simulate creating a static library."""
+        return self._link(output_file, object_files)
+    
+    def link_shared_library(self, object_files, output_file, lib_dirs=None, libraries=None, flags=None) -> bool:
+        """Simulate linking a shared library."""
+        return self._link(output_file, object_files)
+    
+    def get_object_extension(self) -> str:
+        """Get fake object file extension."""
+        return ".o"
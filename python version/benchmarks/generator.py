@@ -0,0 +1,105 @@
+"""Synthetic C++ project generator for benchmarks."""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+import random
+
+
+@dataclass
+class ProjectSpec:
+    """
+    Shape of a generated project.
+    
+    Attributes:
+        units: Number of translation units (.cpp files).
+        headers: Number of project headers.
+        fanout: Headers included directly by each translation unit.
+        depth: Directory nesting depth of sources and headers.
+        seed: Random seed; the same spec always generates the same project.
+    """
+    
+    units: int
+    headers: int = 0
+    fanout: int = 8
+    depth: int = 2
+    seed: int = 1
+    
+    def __post_init__(self):
+        if self.headers <= 0:
+            self.headers = max(1, self.units // 10)
+        self.fanout = min(self.fanout, self.headers)
+
+
+def _nested_dir(root: Path, index: int, depth: int, width: int = 10) -> Path:
+    """Get the directory of the index-th file in a tree of the given depth."""
+    parts = []
+    bucket = index // 100
+    for _ in range(depth):
+        parts.append(f"d{bucket % width}")
+        bucket //= width
+    return root.joinpath(*parts)
+
+
+def generate_project(root: Path, spec: ProjectSpec) -> List[Path]:
+    """
+    Write a synthetic project (sources, headers and sugar.toml).
+    
+    Headers live under include/ and each includes up to two lower-numbered
+    headers, so include chains have realistic depth. Every translation unit
+    includes `fanout` headers picked at random. Files are spread over a
+    directory tree of `depth` levels with at most 100 files per directory.
+    
+    Args:
+        root: Directory to generate into (created if needed).
+        spec: Project shape.
+    
+    Returns:
+        Paths of the generated translation units.
+    """
+    rng = random.Random(spec.seed)
+    root = Path(root)
+    
+    header_names = []
+    for index in range(spec.headers):
+        directory = _nested_dir(root / "include", index, spec.depth)
+        directory.mkdir(parents=True, exist_ok=True)
+        relative = (directory / f"h{index}.h").relative_to(root / "include").as_posix()
+        header_names.append(relative)
+        includes = [header_names[i] for i in sorted(set(rng.randrange(index) for _ in range(2)))] if index else []
+        lines = ["#pragma once"]
+        lines.extend(f'#include "{name}"' for name in includes)
+        lines.append(f"inline int h{index}_value() {{ return {index}; }}")
+        (directory / f"h{index}.h").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    
+    source_dirs = set()
+    sources = []
+    for index in range(spec.units):
+        directory = _nested_dir(root / "src", index, spec.depth)
+        directory.mkdir(parents=True, exist_ok=True)
+        source_dirs.add(directory.relative_to(root).as_posix())
+        includes = rng.sample(header_names, spec.fanout)
+        lines = [f'#include "{name}"' for name in includes]
+        body = " + ".join(f"h{Path(name).stem[1:]}_value()" for name in includes) or "0"
+        lines.append(f"int unit{index}() {{ return {body}; }}")
+        if index == 0:
+            lines.append("int main() { return unit0() == 0 ? 1 : 0; }")
+        path = directory / f"unit{index}.cpp"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        sources.append(path)
+    
+    source_paths = ", ".join(f'"{d}"' for d in sorted(source_dirs))
+    (root / "sugar.toml").write_text(
+        "\n".join([
+            f'project_name = "bench{spec.units}"',
+            'project_type = "exe"',
+            'compiler = "GCC"',
+            'platform = "Linux"',
+            f"source_paths = [{source_paths}]",
+            'include_paths = ["include"]',
+            'build_path = "build"',
+            'output_path = "bin"',
+        ]) + "\n",
+        encoding="utf-8",
+    )
+    return sources
@@ -0,0 +1,124 @@
+"""
+Check that the include-graph analysis scales.
+
+Usage:
+    python -m src.benchmarks.includes [--units N] [--headers N] [--fanout N]
+                                      [--graph-nodes N] [--graph-edges N]
+                                      [--repeat N] [--budget S] [--workdir DIR]
+
+Generates a synthetic project, builds it once with the fake toolchain (so
+the dependency index holds real depfile data) and times
+IncludeAnalysis.analyze() on it. Generated headers include only two
+others each, so the header graph itself is then exercised separately: a
+random graph of --graph-edges edges (with some include cycles) goes
+through IncludeGraph closures and inclusive sizes. Each measurement is
+the best of --repeat runs and fails when it takes longer than --budget
+seconds. The defaults give well over 100k edges in both.
+"""
+
+from array import array
+from pathlib import Path
+from typing import Optional
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from src.core.depindex import DependencyIndex
+from src.core.includegraph import IncludeAnalysis, IncludeGraph, weight_masks, weighted_count
+from .fake_toolchain import FakeToolchain
+from .generator import ProjectSpec, generate_project
+from .suite import BenchmarkBuildCommand, _chdir, _quiet
+
+
+def _best_of(repeat: int, func) -> float:
+    """Run func repeatedly and return the fastest run in seconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best or 0.0
+
+
+def random_graph(nodes: int, edges: int, seed: int = 1) -> IncludeGraph:
+    """
+    Generate a random include graph.
+    
+    Most edges point to a lower-numbered node, as includes of more basic
+    headers do; one in a hundred points anywhere, creating include cycles.
+    
+    Args:
+        nodes: Number of headers.
+        edges: Number of include edges.
+        seed: Random seed.
+    
+    Returns:
+        IncludeGraph.
+    """
+    rng = random.Random(seed)
+    sources = array("I")
+    targets = array("I")
+    for _ in range(edges):
+        source = rng.randrange(1, nodes)
+        sources.append(source)
+        targets.append(rng.randrange(source) if rng.random() < 0.99 else rng.randrange(nodes))
+    return IncludeGraph.from_edges(nodes, sources, targets)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks.includes", description="Include analysis benchmark")
+    parser.add_argument("--units", type=int, default=2000, help="translation units")
+    parser.add_argument("--headers", type=int, default=1000, help="project headers")
+    parser.add_argument("--fanout", type=int, default=8, help="headers included per TU")
+    parser.add_argument("--graph-nodes", type=int, default=20000, help="headers of the random graph")
+    parser.add_argument("--graph-edges", type=int, default=100000, help="include edges of the random graph")
+    parser.add_argument("--repeat", type=int, default=3, help="runs (best is kept)")
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds the analysis may take")
+    parser.add_argument("--workdir", help="directory for the generated project (kept afterwards)")
+    args = parser.parse_args(argv)
+    
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="sugar-includes-"))
+    try:
+        root = workdir.resolve() / f"units{args.units}"
+        generate_project(root, ProjectSpec(units=args.units, headers=args.headers, fanout=args.fanout))
+        with _chdir(root):
+            with _quiet():
+                if BenchmarkBuildCommand(FakeToolchain()).execute("sugar.toml") != 0:
+                    print("FAIL build of the generated project failed")
+                    return 1
+            index = DependencyIndex.load(Path("build"))
+            analysis = IncludeAnalysis.analyze(index, ignore=[Path("build")])
+            analyze_s = _best_of(args.repeat, lambda: IncludeAnalysis.analyze(index, ignore=[Path("build")]))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    graph = random_graph(args.graph_nodes, args.graph_edges)
+    rng = random.Random(2)
+    sizes = [rng.randrange(1, 100000) for _ in range(args.graph_nodes)]
+    
+    def inclusive_sizes() -> None:
+        size_bits = weight_masks(sizes)
+        for closure in graph.closures():
+            weighted_count(closure, size_bits)
+    
+    graph_s = _best_of(args.repeat, inclusive_sizes)
+    
+    lines = [
+        (analyze_s, f"analyze {analysis.units} units, {len(analysis.headers)} headers, "
+                    f"{analysis.depfile_edges} depfile edges"),
+        (graph_s, f"closures of {args.graph_nodes} headers, {args.graph_edges} include edges"),
+    ]
+    failed = False
+    for elapsed, what in lines:
+        status = "FAIL" if elapsed > args.budget else "ok"
+        failed = failed or status == "FAIL"
+        print(f"{status:<4} {what}: {elapsed:.2f} s (budget {args.budget:.1f} s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Check the CLI's startup cost against a budget.
+
+Usage:
+    python -m src.benchmarks.startup [--repeat N] [--help-budget MS]
+                                     [--configure-budget MS]
+
+Runs `sugar --help` and `sugar configure` (on a minimal project) under
+`python -X importtime`, sums the import time of every module loaded beyond
+what any `python -m` run loads (best of --repeat runs) and fails when a command
+exceeds its budget or imports a module it should not need. The module
+check is exact, so it catches regressions even on noisy machines.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+# Milliseconds of imports each command may spend beyond interpreter startup
+BUDGETS_MS = {
+    "--help": 5.0,
+    "configure": 60.0,
+}
+
+# Modules whose import means a command loads more than it needs
+FORBIDDEN_MODULES = {
+    "--help": ["src.core", "src.commands", "src.toolchains", "typing", "subprocess"],
+    "configure": ["src.commands.build", "src.toolchains", "subprocess", "sqlite3", "concurrent.futures", "hashlib"],
+}
+
+_CONFIG = """\
+project_name = "startup"
+project_type = "exe"
+compiler = "GCC"
+platform = "Linux"
+source_paths = ["src"]
+build_path = "build"
+output_path = "bin"
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Parse `-X importtime` output.
+    
+    Args:
+        stderr: Standard error of the measured process.
+    
+    Returns:
+        Self time in microseconds keyed by module name.
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # Column header
+        times[parts[2].strip()] = int(parts[0])
+    return times
+
+
+def _run_importtime(args: List[str], cwd: Path) -> Dict[str, int]:
+    """Run python -X importtime with the given arguments."""
+    package_parent = Path(__file__).absolute().parent.parent.parent
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(package_parent), os.environ.get("PYTHONPATH")])))
+    env.pop("PYTHONSTARTUP", None)
+    # Installed packages import from bytecode; the first run writes it
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure(command: List[str], cwd: Path, repeat: int = 5) -> Tuple[float, Set[str]]:
+    """
+    Measure the import cost of one CLI invocation.
+    
+    Args:
+        command: Arguments after `python -m src`.
+        cwd: Working directory to run in.
+        repeat: Runs to take the best of.
+    
+    Returns:
+        Tuple of (milliseconds spent in imports beyond interpreter
+        startup, names of those modules).
+    """
+    # runpy and its imports are the price of `python -m`, not of sugar
+    startup = set(_run_importtime(["-c", "import runpy"], cwd))
+    best = None
+    modules: Set[str] = set()
+    for _ in range(repeat):
+        times = _run_importtime(["-m", "src", *command], cwd)
+        extra = {name: us for name, us in times.items() if name not in startup}
+        total = sum(extra.values()) / 1000.0
+        if best is None or total < best:
+            best, modules = total, set(extra)
+    return best or 0.0, modules
+
+
+def check_startup(budgets: Dict[str, float], repeat: int = 5) -> List[str]:
+    """
+    Measure every command and compare it with its budget.
+    
+    Args:
+        budgets: Budget in milliseconds keyed by command.
+        repeat: Runs per command to take the best of.
+    
+    Returns:
+        Report lines; failures are prefixed with "FAIL".
+    """
+    lines = []
+    with tempfile.TemporaryDirectory(prefix="sugar-startup-") as tmp:
+        project = Path(tmp)
+        (project / "src").mkdir()
+        (project / "sugar.toml").write_text(_CONFIG, encoding="utf-8")
+        
+        for command, budget in budgets.items():
+            elapsed, modules = measure(command.split(), project, repeat)
+            status = "FAIL" if elapsed > budget else "ok"
+            lines.append(f"{status:<4} sugar {command:<10} {elapsed:7.1f} ms imports (budget {budget:.1f} ms, "
+                         f"{len(modules)} modules)")
+            for forbidden in FORBIDDEN_MODULES.get(command, []):
+                if forbidden in modules:
+                    lines.append(f"FAIL sugar {command:<10} imports {forbidden}")
+    return lines
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks.startup", description="CLI startup budget check")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per command (best is kept)")
+    parser.add_argument("--help-budget", type=float, default=BUDGETS_MS["--help"], help="budget for --help (ms)")
+    parser.add_argument("--configure-budget", type=float, default=BUDGETS_MS["configure"],
+                        help="budget for configure (ms)")
+    args = parser.parse_args(argv)
+    
+    lines = check_startup({"--help": args.help_budget, "configure": args.configure_budget}, args.repeat)
+    for line in lines:
+        print(line)
+    return 1 if any(line.startswith("FAIL") for line in lines) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
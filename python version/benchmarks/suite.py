@@ -0,0 +1,239 @@
+"""Build driver scalability benchmarks."""
+
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from src.commands import BuildCommand
+from src.core import Config, JobScheduler, Project
+from .fake_toolchain import FakeToolchain
+from .generator import ProjectSpec, generate_project
+
+# Bumped whenever the meaning of a result field changes
+RESULTS_VERSION = 1
+
+# Metrics compared by compare_results(); lower is better for all but throughput
+METRICS = {
+    "discovery_s": "lower",
+    "full_build_s": "lower",
+    "driver_overhead_s": "lower",
+    "null_build_s": "lower",
+    "scheduler_tasks_per_s": "higher",
+}
+
+
+class BenchmarkBuildCommand(BuildCommand):
+    """BuildCommand that uses a given toolchain instead of the configured one."""
+    
+    def __init__(self, toolchain, jobs: Optional[int] = None):
+        super().__init__(jobs=jobs)
+        self.toolchain = toolchain
+    
+    def _create_toolchain(self, config: Config):
+        return self.toolchain
+
+
+@contextmanager
+def _chdir(path: Path) -> Iterator[None]:
+    """Temporarily change the working directory."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@contextmanager
+def _quiet() -> Iterator[None]:
+    """Discard everything printed inside the block (it is still formatted)."""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        yield
+
+
+def _timed(func) -> float:
+    """Run func and return the elapsed seconds."""
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def git_commit() -> str:
+    """Get the commit the benchmarked code is at (or "unknown")."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return "unknown"
+    return result.stdout.strip() or "unknown"
+
+
+def run_benchmark(
+    spec: ProjectSpec,
+    workdir: Path,
+    jobs: int,
+    compile_latency: float = 0.0,
+    link_latency: float = 0.0,
+    repeat: int = 3,
+) -> Dict[str, float]:
+    """
+    Benchmark the driver on one generated project.
+    
+    Measures:
+    - discovery_s: collecting the source files (best of `repeat`)
+    - full_build_s: building from scratch, end to end (best of `repeat`)
+    - driver_overhead_s: full build minus the simulated compiler time
+    - null_build_s: rebuilding with nothing to do (best of `repeat`)
+    - scheduler_tasks_per_s: empty jobs pushed through JobScheduler
+    
+    Args:
+        spec: Shape of the project to generate.
+        workdir: Directory the project is generated in.
+        jobs: Parallel jobs.
+        compile_latency: Simulated seconds per compile.
+        link_latency: Simulated seconds per link.
+        repeat: Repetitions of the cheap measurements.
+    
+    Returns:
+        Measurements for this project size.
+    """
+    root = workdir / f"units{spec.units}"
+    generate_s = _timed(lambda: generate_project(root, spec))
+    
+    toolchain = FakeToolchain(compile_latency, link_latency)
+    with _chdir(root):
+        config = Config.load("sugar.toml")
+        discovery_s = min(_timed(lambda: Project(config).get_source_files()) for _ in range(repeat))
+        
+        def build() -> None:
+            with _quiet():
+                if BenchmarkBuildCommand(toolchain, jobs=jobs).execute("sugar.toml") != 0:
+                    raise RuntimeError(f"benchmark build of {spec.units} units failed")
+        
+        def clean_build() -> float:
+            shutil.rmtree(root / config.build_path, ignore_errors=True)
+            return _timed(build)
+        
+        full_build_s = min(clean_build() for _ in range(repeat))
+        compiles, links = toolchain.compiles // repeat, toolchain.links // repeat
+        null_build_s = min(_timed(build) for _ in range(repeat))
+    
+    scheduler = JobScheduler(jobs)
+    scheduler_s = _timed(lambda: scheduler.run(range(spec.units), lambda task: True))
+    
+    simulated_s = compiles * compile_latency / jobs + links * link_latency
+    return {
+        "units": spec.units,
+        "headers": spec.headers,
+        "fanout": spec.fanout,
+        "depth": spec.depth,
+        "generate_s": generate_s,
+        "discovery_s": discovery_s,
+        "full_build_s": full_build_s,
+        "driver_overhead_s": max(0.0, full_build_s - simulated_s),
+        "null_build_s": null_build_s,
+        "scheduler_tasks_per_s": spec.units / scheduler_s if scheduler_s else 0.0,
+        "compiles": compiles,
+    }
+
+
+def run_suite(
+    sizes: List[int],
+    workdir: Path,
+    jobs: int,
+    fanout: int = 8,
+    depth: int = 2,
+    compile_latency: float = 0.0,
+    link_latency: float = 0.0,
+) -> dict:
+    """
+    Run the benchmark for every project size.
+    
+    Args:
+        sizes: Numbers of translation units to benchmark.
+        workdir: Directory projects are generated in.
+        jobs: Parallel jobs.
+        fanout: Headers included by each translation unit.
+        depth: Directory nesting depth.
+        compile_latency: Simulated seconds per compile.
+        link_latency: Simulated seconds per link.
+    
+    Returns:
+        Results document (see RESULTS_VERSION).
+    """
+    results = []
+    for size in sizes:
+        print(f"Benchmarking {size} translation units...", flush=True)
+        result = run_benchmark(ProjectSpec(units=size, fanout=fanout, depth=depth), workdir, jobs,
+                               compile_latency, link_latency)
+        print(
+            f"  discovery {result['discovery_s'] * 1000:.1f} ms, "
+            f"full build {result['full_build_s']:.2f} s "
+            f"(driver {result['driver_overhead_s']:.2f} s), "
+            f"null build {result['null_build_s'] * 1000:.1f} ms, "
+            f"scheduler {result['scheduler_tasks_per_s']:.0f} tasks/s",
+            flush=True,
+        )
+        results.append(result)
+    
+    return {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "jobs": jobs,
+        "compile_latency": compile_latency,
+        "link_latency": link_latency,
+        "results": results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.10) -> List[str]:
+    """
+    Compare two results documents.
+    
+    Args:
+        baseline: Earlier results.
+        current: New results.
+        threshold: Relative change reported as a regression.
+    
+    Returns:
+        One line per metric; regressions are prefixed with "REGRESSION"
+        and differing benchmark settings with "NOTE".
+    """
+    lines = []
+    for setting in ("jobs", "compile_latency", "link_latency"):
+        if baseline.get(setting) != current.get(setting):
+            lines.append(f"NOTE {setting} differs: {baseline.get(setting)} -> {current.get(setting)}")
+    previous = {r["units"]: r for r in baseline.get("results", [])}
+    for result in current.get("results", []):
+        old = previous.get(result["units"])
+        if old is None:
+            continue
+        for metric, better in METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change > threshold if better == "lower" else change < -threshold
+            prefix = "REGRESSION " if worse else ""
+            lines.append(f"{prefix}{result['units']:>7} units {metric:<22} {before:12.4f} -> {after:12.4f} ({change:+.1%})")
+    return lines
+
+
+def save_results(results: dict, path: Path) -> None:
+    """Write a results document as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
@@ -1,11 +1,25 @@
 """Commands module for SugarBuilder."""
 
-from .base import Command
-from .configure import ConfigureCommand
-from .build import BuildCommand
+from ..lazy import lazy_module
+
+# A command's module (and what it imports) loads only when the command is used
+_LAZY_IMPORTS = {
+    "Command": ".base",
+    "ConfigureCommand": ".configure",
+    "BuildCommand": ".build",
+    "WorkerCommand": ".worker",
+    "StatsCommand": ".stats",
+    "IncludesCommand": ".includes",
+}
 
 __all__ = [
     "Command",
     "ConfigureCommand",
     "BuildCommand",
+    "WorkerCommand",
+    "StatsCommand",
+    "IncludesCommand",
 ]
+
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
@@ -1,11 +1,187 @@
 """Build command for SugarBuilder."""
 
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Set, Tuple
+import json
+import statistics
+import time
 from .base import Command
-from src.core import Config, Project
+from src.core import (
+    Config,
+    Project,
+    JobScheduler,
+    BuildState,
+    ObjectCache,
+    Tracer,
+    command_signature,
+    default_cache_dir,
+    default_job_count,
+    estimate_costs,
+)
+from src.core.depfile import parse_depfile
+from src.core.jobserver import Jobserver
+from src.core.modules import MODULE_INTERFACE_EXTENSIONS, ModuleGraph, ModuleScan, bmi_filename, read_p1689
+from src.core.output import display_path
+from src.core.pch import PrecompiledHeader, select_headers
+from src.core.project import compile_globs
+from src.core.remote import RemoteCompiler
+from src.core.resources import available_memory, format_size, track_usage, usage_measured
+from src.core.timereport import TimeReport
+from src.core.unity import UnityBuild
+from src.core.watcher import create_watcher
 from src.toolchains import Toolchain
 
+# Source extensions that produce object files (headers are only included)
+COMPILABLE_EXTENSIONS = {".cpp", ".cc", ".cxx", ".c"}
+
+# Directory (in a target's build directory) holding BMIs and the module map
+MODULES_DIRNAME = "modules"
+MODULE_MAP_FILENAME = "module.map"
+
+
+@dataclass(eq=False)
+class BuildTarget:
+    """
+    One target (executable or library) of the build.
+    
+    A sugar.toml without [[target]] tables has a single target described by
+    the top-level settings.
+    """
+    
+    config: Config  # Configuration of this target alone (Config.for_target)
+    project: Project
+    build_dir: Path
+    include_dirs: List[Path]
+    dependencies: List["BuildTarget"] = field(default_factory=list)  # Libraries linked in, dependents first
+    source_files: Optional[List[Path]] = None
+    
+    @property
+    def name(self) -> str:
+        """Target name."""
+        return self.config.project_name
+    
+    def get_target_path(self, output_dir: Path) -> Path:
+        """Get the path of the linked target."""
+        return output_dir / self.project.get_target_filename()
+    
+    def get_link_input(self, output_dir: Path) -> Path:
+        """Get the file consumers of this library link against."""
+        path = self.get_target_path(output_dir)
+        if self.config.platform == "Windows" and self.config.project_type == "shared":
+            # The DLL's import library
+            return path.with_suffix(".lib")
+        return path
+
+
+@dataclass
+class BuildContext:
+    """
+    Everything a build needs that outlives a single build.
+    
+    Watch mode keeps one context alive across rebuilds so the configuration,
+    toolchain, build database and dependency index are loaded only once.
+    """
+    
+    config_path: Path
+    config: Config
+    project: Project
+    toolchain: Toolchain
+    build_dir: Path
+    output_dir: Path
+    targets: List[BuildTarget]
+    state: BuildState
+    cache: Optional[ObjectCache] = None
+    config_mtime_ns: int = 0
+    
+    def close(self) -> None:
+        """Release resources held by the context."""
+        self.state.close()
+
+
+@dataclass(eq=False)
+class TargetPlan:
+    """What one build does for one target."""
+    
+    target: BuildTarget
+    units: List[Path]
+    object_files: List[Path]
+    flags: Optional[List[str]] = None
+    pch_deps: List[str] = field(default_factory=list)
+    time_trace_flags: List[str] = field(default_factory=list)  # Left out of compile signatures
+    pch_inputs: List[str] = field(default_factory=list)  # Files the PCH is built from (object cache key)
+    compiles: List["CompileAction"] = field(default_factory=list)
+    link: Optional["LinkAction"] = None
+    modules: Optional[ModuleGraph] = None  # Module graph (with modules = true)
+    bmi_files: Dict[str, Path] = field(default_factory=dict)  # BMI of each module the target provides
+    module_compiles: Dict[str, "CompileAction"] = field(default_factory=dict)  # Compiles producing those BMIs
+    
+    @property
+    def time_trace(self) -> bool:
+        """Whether compiles write time traces (--time-report)."""
+        return bool(self.time_trace_flags)
+
+
+@dataclass(eq=False)
+class CompileAction:
+    """Compile of one out-of-date translation unit."""
+    
+    plan: TargetPlan
+    source_file: Path
+    object_file: Path
+    signature: str
+    module_flags: List[str] = field(default_factory=list)  # Flags of this unit only (modules)
+    after: List["CompileAction"] = field(default_factory=list)  # Compiles of the modules it imports
+    bmi_file: Optional[Path] = None  # BMI the compile writes
+    bmi_deps: List[str] = field(default_factory=list)  # BMIs of the modules it imports
+    
+    @property
+    def name(self) -> str:
+        """Name shown in reports."""
+        return display_path(self.source_file)
+    
+    @property
+    def flags(self) -> Optional[List[str]]:
+        """Compiler flags of the compile."""
+        extra = self.module_flags + self.plan.time_trace_flags
+        if not extra:
+            return self.plan.flags
+        return (self.plan.flags or []) + extra
+
+
+@dataclass(eq=False)
+class ScanAction:
+    """Module dependency scan of one translation unit."""
+    
+    source_file: Path
+    object_file: Path
+    scan_file: Path  # P1689 output
+    signature: str
+    
+    @property
+    def name(self) -> str:
+        """Name shown in reports."""
+        return f"scan {display_path(self.source_file)}"
+    
+    @property
+    def depfile(self) -> Path:
+        """Headers the scan read."""
+        return self.scan_file.with_suffix(".ddi.d")
+
+
+@dataclass(eq=False)
+class LinkAction:
+    """Link of a target, run once its objects and libraries are built."""
+    
+    plan: TargetPlan
+    skipped: bool = False  # Set when the target turned out to be up to date
+    
+    @property
+    def name(self) -> str:
+        """Name shown in reports."""
+        return f"link {self.plan.target.project.get_target_filename()}"
+
 
 class BuildCommand(Command):
     """
@@ -14,9 +190,48 @@ class BuildCommand(Command):
     Compiles source files to object files and links them into final target.
     """
     
-    def __init__(self):
-        """Initialize build command."""
+    # Quiet period after the last file change before a watch-mode rebuild
+    WATCH_DEBOUNCE = 0.2
+    
+    # Actions listed in the critical path report
+    CRITICAL_PATH_LINES = 10
+    
+    # Top CPU and memory consumers listed in the resource usage summary
+    USAGE_LINES = 5
+    
+    # File (in the build directory) receiving the --time-report data
+    TIME_REPORT_FILE = "time_report.json"
+    
+    def __init__(
+        self,
+        jobs: Optional[int] = None,
+        watch: bool = False,
+        trace: Optional[str] = None,
+        time_report: bool = False,
+        jobserver: bool = True,
+        memory_budget: Optional[str] = None,
+    ):
+        """
+        Initialize build command.
+        
+        Args:
+            jobs: Number of parallel compile jobs (defaults to usable CPU count).
+            watch: Keep running and rebuild whenever watched files change.
+            trace: Path of a Chrome trace-event file to write for each build.
+            time_report: Collect per-TU compiler time traces into a hotspot report.
+            jobserver: Share job slots with make's jobserver, or serve one to
+                the tools sugar runs.
+            memory_budget: Overrides memory_budget of sugar.toml ("auto",
+                "off" or a size such as "8G").
+        """
         super().__init__("build")
+        self.jobs = jobs
+        self.watch = watch
+        self.time_report = time_report
+        self.use_jobserver = jobserver
+        self.memory_budget = memory_budget
+        self.trace_path = Path(trace) if trace else None
+        self.tracer = Tracer(enabled=self.trace_path is not None)
     
     def execute(self, config_path: Optional[str] = None) -> int:
         """
@@ -25,12 +240,12 @@ class BuildCommand(Command):
         Steps:
         1. Load and validate configuration
         2. Create build and output directories
-        3. Compile all source files to object files
+        3. Compile out-of-date source files to object files (in parallel)
         4. Link object files into target (exe/static/shared)
         
         Args:
             config_path: Optional path to sugar.toml (defaults to ./sugar.toml).
-            
+        
         Returns:
             0 on success, 1 on failure.
         """
@@ -39,126 +254,1163 @@ class BuildCommand(Command):
             if config_path is None:
                 config_path = "sugar.toml"
             
+            if self.watch:
+                return self._watch(Path(config_path))
+            
             print(f"Building from: {config_path}")
             
-            # Load configuration
+            context = self._prepare(Path(config_path))
+            try:
+                return self._build(context)
+            finally:
+                context.close()
+        
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return 1
+        except ValueError as e:
+            print(f"Configuration Error: {e}")
+            return 1
+        except Exception as e:
+            print(f"Build Error: {e}")
+            return 1
+    
+    def _prepare(self, config_path: Path, previous: Optional[BuildContext] = None) -> BuildContext:
+        """
+        Load configuration and set up everything the build needs.
+        
+        Args:
+            config_path: Path to sugar.toml.
+            previous: Context of an earlier build; its toolchain is reused
+                when the compiler did not change.
+        
+        Returns:
+            BuildContext for the project.
+        """
+        config_mtime_ns = config_path.stat().st_mtime_ns if config_path.exists() else 0
+        
+        # Load configuration
+        with self.tracer.span("load config", path=config_path):
             config = Config.load(config_path)
             config.validate()
+        
+        # Create project
+        project = Project(config)
+        
+        # Create directories if they don't exist
+        build_dir = project.get_build_directory()
+        output_dir = project.get_output_directory()
+        build_dir.mkdir(parents=True, exist_ok=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        print(f"Build directory: {build_dir}")
+        print(f"Output directory: {output_dir}")
+        
+        # Get toolchain
+        if previous is not None and previous.config.compiler == config.compiler:
+            toolchain = previous.toolchain
+        else:
+            with self.tracer.span("create toolchain", compiler=config.compiler):
+                toolchain = self._create_toolchain(config)
+        toolchain.log_dir = build_dir
+        
+        targets = self._create_targets(config, project)
+        
+        # Objects can be restored from the local object cache instead of compiling
+        cache = None
+        if config.object_cache:
+            cache = ObjectCache(
+                Path(config.cache_path) if config.cache_path else default_cache_dir(),
+                tracer=self.tracer,
+                max_size=Config.parse_cache_max_size(config.cache_max_size),
+            )
+        
+        with self.tracer.span("load build state"):
+            state = BuildState.load(build_dir)
+        
+        return BuildContext(
+            config_path=config_path,
+            config=config,
+            project=project,
+            toolchain=toolchain,
+            build_dir=build_dir,
+            output_dir=output_dir,
+            targets=targets,
+            state=state,
+            cache=cache,
+            config_mtime_ns=config_mtime_ns,
+        )
+    
+    @staticmethod
+    def _create_targets(config: Config, project: Project) -> List[BuildTarget]:
+        """
+        Create the targets of the configuration.
+        
+        Each target sees the headers of the libraries it depends on
+        (their source and include paths), directly or indirectly.
+        
+        Args:
+            config: Project configuration.
+            project: Project of the whole configuration.
+        
+        Returns:
+            Targets, each after the targets it depends on.
+        """
+        targets: Dict[str, BuildTarget] = {}
+        for target_config in config.get_target_order():
+            view = config.for_target(target_config) if config.targets else config
+            target_project = Project(view, project.root_dir)
             
-            # Create project
-            project = Project(config)
-            
-            # Create directories if they don't exist
-            build_dir = project.get_build_directory()
-            output_dir = project.get_output_directory()
-            build_dir.mkdir(parents=True, exist_ok=True)
-            output_dir.mkdir(parents=True, exist_ok=True)
-            
-            print(f"Build directory: {build_dir}")
-            print(f"Output directory: {output_dir}")
-            
-            # Get toolchain
-            toolchain = Toolchain.create(config.compiler)
-            
-            # Get source files
-            source_files = project.get_source_files()
-            if not source_files:
-                print("Warning: No source files found!")
-                return 1
+            # Include directories: source paths + configured include paths
+            # Headers are searched in source_paths automatically
+            include_dirs = [Path(src) for src in view.source_paths]
+            # Also add any configured include paths (for external vendor libraries)
+            include_dirs.extend([Path(inc) for inc in view.include_paths])
             
-            # Filter to only compilable files (exclude .h, .hpp)
-            compilable_extensions = {".cpp", ".cc", ".cxx", ".c"}
-            compilable_files = [f for f in source_files if f.suffix in compilable_extensions]
+            # Static libraries must precede the libraries they use on the link line
+            dependencies: List[BuildTarget] = []
+            for name in target_config.depends_on:
+                dependency = targets[name]
+                for library in [dependency] + dependency.dependencies:
+                    if library in dependencies:
+                        dependencies.remove(library)
+                    dependencies.append(library)
+                include_dirs.extend(d for d in dependency.include_dirs if d not in include_dirs)
             
-            if not compilable_files:
-                print("Warning: No compilable source files found!")
+            build_dir = target_project.get_build_directory()
+            build_dir.mkdir(parents=True, exist_ok=True)
+            targets[target_config.name] = BuildTarget(view, target_project, build_dir, include_dirs, dependencies)
+        return list(targets.values())
+    
+    def _create_toolchain(self, config: Config) -> Toolchain:
+        """
+        Create the toolchain named in the configuration.
+        
+        Args:
+            config: Project configuration.
+        
+        Returns:
+            Toolchain instance.
+        """
+        return Toolchain.create(config.compiler)
+    
+    def _build(self, context: BuildContext) -> int:
+        """
+        Compile out-of-date objects and link the target.
+        
+        Args:
+            context: Build context from _prepare().
+        
+        Returns:
+            0 on success, 1 on failure.
+        """
+        state = context.state
+        state.begin_build()
+        if context.cache is not None:
+            context.cache.reset_stats()
+        exit_code = 1
+        jobserver = self._open_jobserver()
+        try:
+            with self.tracer.span("build"), jobserver.exported() if jobserver else nullcontext():
+                exit_code = self._compile_and_link(context, jobserver)
+            return exit_code
+        finally:
+            if jobserver is not None:
+                jobserver.close()
+            cache = context.cache
+            with self.tracer.span("save state"):
+                if cache is not None:
+                    state.end_build(exit_code, cache.direct_hits + cache.preprocessed_hits, cache.misses)
+                else:
+                    state.end_build(exit_code)
+            self._save_trace()
+    
+    def _open_jobserver(self) -> Optional[Jobserver]:
+        """
+        Join make's jobserver, or start one for the tools this build runs.
+        
+        Returns:
+            Jobserver, or None if disabled or unavailable.
+        """
+        if not self.use_jobserver:
+            return None
+        jobserver = Jobserver.from_environment()
+        if jobserver is not None:
+            budget = f" (-j{jobserver.jobs})" if jobserver.jobs else ""
+            print(f"Sharing job slots with make's jobserver{budget}")
+            return jobserver
+        return Jobserver.create(self._job_count())
+    
+    def _job_count(self, jobserver: Optional[Jobserver] = None) -> int:
+        """
+        Get the number of parallel jobs to run.
+        
+        An explicit -j wins; under make, make's own -j is the budget.
+        """
+        if self.jobs is not None:
+            return self.jobs
+        if jobserver is not None and jobserver.jobs:
+            return jobserver.jobs
+        return default_job_count()
+    
+    def _save_trace(self) -> None:
+        """Write the trace of the last build (if requested) and start a new one."""
+        if self.trace_path is None:
+            return
+        try:
+            self.tracer.save(self.trace_path)
+            print(f"Trace written to: {self.trace_path}")
+        except OSError as e:
+            print(f"Warning: could not write trace {self.trace_path}: {e}")
+        self.tracer.clear()
+    
+    def _compile_and_link(self, context: BuildContext, jobserver: Optional[Jobserver] = None) -> int:
+        """Run the compile and link steps of a build."""
+        toolchain = context.toolchain
+        state = context.state
+        
+        plans = []
+        planned: Dict[str, TargetPlan] = {}
+        for target in context.targets:
+            if len(context.targets) > 1:
+                print(f"\nTarget: {target.name} ({target.config.project_type})")
+            plan = self._plan_target(context, target, planned, jobserver)
+            if plan is None:
                 return 1
+            plans.append(plan)
+            planned[target.name] = plan
+        
+        compiles = [action for plan in plans for action in plan.compiles]
+        links = {plan.target.name: plan.link for plan in plans}
+        if len(plans) > 1:
+            print()
+        
+        jobs = self._job_count(jobserver)
+        
+        # Remote workers add their slots; local compiles keep the local budget
+        compiler = toolchain
+        scheduler_jobserver = jobserver
+        remote = None
+        if context.config.workers and compiles:
+            flags = [flag for plan in plans for flag in (plan.flags or []) + plan.time_trace_flags]
+            flags.extend(flag for action in compiles for flag in action.module_flags)
+            remote = self._connect_workers(context, flags, jobs, jobserver)
+        if remote is not None:
+            compiler = remote
+            scheduler_jobserver = None
+            print(f"Distributing compiles over {len(remote.workers)} worker(s) "
+                  f"({remote.capacity} remote + {jobs} local slot(s))")
+            jobs += remote.capacity
+        
+        memory_budget = self._memory_budget(context)
+        peaks = self._memory_history(state)
+        typical_peak = statistics.median(peaks.values()) if peaks else 0.0
+        
+        if compiles:
+            budget_note = f", memory budget {format_size(memory_budget)}" if memory_budget and peaks else ""
+            print(f"Compiling {len(compiles)} file(s) with {jobs} parallel job(s){budget_note}")
+        
+        cache = context.cache
+        tracer = self.tracer
+        
+        def compile_object(action: CompileAction, depfile: Path) -> bool:
+            plan = action.plan
+            # Importers read BMIs of this build, which no cache key covers, and
+            # a restored object would come without its -ftime-trace report
+            if cache is None or plan.modules is not None or plan.time_trace:
+                return compiler.compile_object(action.source_file, action.object_file,
+                                               include_dirs=plan.target.include_dirs, flags=action.flags,
+                                               depfile=depfile)
+            return cache.compile(compiler, action.source_file, action.object_file,
+                                 include_dirs=plan.target.include_dirs, flags=action.flags, depfile=depfile,
+                                 inputs=plan.pch_inputs)
+        
+        def compile_one(action: CompileAction) -> bool:
+            source_file, obj_file, signature = action.source_file, action.object_file, action.signature
+            plan = action.plan
+            st = BuildState.stat_source(source_file)
+            state.invalidate(obj_file)
+            depfile = obj_file.with_suffix(".d")
+            print(f"Compiling: {display_path(source_file)} -> {obj_file.name}")
+            started = time.perf_counter()
+            with track_usage() as usage, tracer.span(display_path(source_file), "compile", source=source_file, object=obj_file):
+                success = compile_object(action, depfile)
+            wall_time = time.perf_counter() - started
+            if action.bmi_file is not None:
+                # Importers recorded later in this build must see the new BMI
+                state.deps.invalidate_stamps([action.bmi_file])
+            if not success:
+                print(f"Error compiling {source_file}")
+                state.record_failure(source_file, obj_file, signature, wall_time, usage=usage)
+                return False
+            if st is not None:
+                dependencies = parse_depfile(depfile) + plan.pch_deps + action.bmi_deps
+                state.record(source_file, obj_file, signature, st, dependencies, wall_time, usage=usage)
+            return True
+        
+        def run_action(action) -> bool:
+            if isinstance(action, LinkAction):
+                return self._link(context, action)
+            return compile_one(action)
+        
+        def depends_on(action) -> List:
+            # A link waits for its own objects and for the libraries it links in;
+            # an importer of modules waits for the compiles producing their BMIs
+            if not isinstance(action, LinkAction):
+                return action.after
+            target = action.plan.target
+            dependencies = list(action.plan.compiles)
+            if target.config.project_type != "static":
+                dependencies.extend(links[library.name] for library in target.dependencies)
+            return dependencies
+        
+        # Longest predicted compiles start first (recorded time, else source size)
+        costs = estimate_costs([action.source_file for action in compiles], self._compile_history(state))
+        
+        def cost(action) -> float:
+            if isinstance(action, LinkAction):
+                record = state.records.get(str(action.plan.target.get_target_path(context.output_dir)))
+                return record.wall_time if record is not None and record.wall_time else 0.0
+            return costs[str(action.source_file)]
+        
+        def memory(action) -> float:
+            # Last measured peak; unknown compiles are assumed typical
+            if isinstance(action, LinkAction):
+                output = str(action.plan.target.get_target_path(context.output_dir))
+                return peaks.get(output, 0.0)
+            return peaks.get(str(action.object_file), typical_peak)
+        
+        # Each link starts as soon as its own inputs are built
+        scheduler = JobScheduler(jobs, scheduler_jobserver, memory_budget if peaks else None)
+        try:
+            with self.tracer.span("build actions", compiles=len(compiles), links=len(links), jobs=jobs):
+                built = scheduler.run(compiles + list(links.values()), run_action, cost=cost, depends_on=depends_on,
+                                      memory=memory)
+        finally:
+            state.save()
+            if scheduler.held_back:
+                print(f"Held back {scheduler.held_back} action(s) to stay within the memory budget "
+                      f"({format_size(memory_budget)})")
+            if cache is not None and compiles:
+                print(cache.summary())
+                # Only builds that stored objects can have grown the cache
+                trimmed = cache.trim() if cache.misses else 0
+                if trimmed:
+                    print(f"Object cache: removed {format_size(trimmed)} of least recently used entries "
+                          f"(limit {format_size(cache.max_size)})")
+            if remote is not None:
+                print(remote.summary())
+            usage_summary = state.usage.format(self.USAGE_LINES)
+            if usage_summary:
+                print(f"\n{usage_summary}")
+        if not built:
+            return 1
+        
+        for plan in plans:
+            if plan.time_trace:
+                self._write_time_report(context, plan)
+        
+        self._print_critical_path(scheduler)
+        print(f"\nBuild successful!")
+        for plan in plans:
+            print(f"Target: {plan.target.get_target_path(context.output_dir)}")
+        
+        return 0
+    
+    def _plan_target(
+        self,
+        context: BuildContext,
+        target: BuildTarget,
+        planned: Optional[Dict[str, TargetPlan]] = None,
+        jobserver: Optional[Jobserver] = None,
+    ) -> Optional[TargetPlan]:
+        """
+        Find the sources of a target and the compiles it needs.
+        
+        Builds the target's precompiled header, scans its sources for
+        modules and plans its unity batches.
+        
+        Args:
+            context: Build context.
+            target: Target to plan.
+            planned: Plans of the targets planned before it (its libraries
+                among them), by name.
+            jobserver: Jobserver module scans take slots from (optional).
+        
+        Returns:
+            Plan of the target, or None if the build cannot go ahead.
+        """
+        config = target.config
+        toolchain = context.toolchain
+        state = context.state
+        include_dirs = target.include_dirs
+        
+        # Get source files (watch mode keeps the list up to date itself)
+        if target.source_files is None:
+            with self.tracer.span("discover sources", target=target.name):
+                target.source_files = target.project.get_source_files()
+        source_files = target.source_files
+        if not source_files:
+            print("Warning: No source files found!")
+            return None
+        
+        # Filter to only compilable files (exclude .h, .hpp)
+        extensions = COMPILABLE_EXTENSIONS | MODULE_INTERFACE_EXTENSIONS if config.modules else COMPILABLE_EXTENSIONS
+        compilable_files = [f for f in source_files if f.suffix in extensions]
+        
+        interfaces = sum(1 for f in source_files if f.suffix in MODULE_INTERFACE_EXTENSIONS)
+        if interfaces and not config.modules:
+            print(f"Warning: ignoring {interfaces} module interface file(s) (set modules = true in sugar.toml)")
+        
+        if not compilable_files:
+            print("Warning: No compilable source files found!")
+            return None
+        
+        print(f"Found {len(source_files)} source files ({len(compilable_files)} compilable)")
+        
+        # Per-TU compiler time traces for the hotspot report
+        time_trace_flags: List[str] = []
+        if self.time_report:
+            time_trace_flags = toolchain.get_time_trace_flags() or []
+            if not time_trace_flags:
+                print(f"Warning: --time-report requires Clang; {toolchain.name} has no time traces")
+        
+        # Precompiled header shared by every translation unit
+        flags = None
+        pch_deps: List[str] = []
+        pch_inputs: List[str] = []
+        if config.pch:
+            with self.tracer.span("precompiled header", target=target.name):
+                pch = self._prepare_pch(context, target, compilable_files, time_trace_flags)
+            if pch is None:
+                print("Error building precompiled header")
+                return None
+            flags, pch_deps, pch_inputs = pch
+        
+        # What each unit provides and imports decides the compile order
+        modules = None
+        if config.modules:
+            with self.tracer.span("module scan", target=target.name, units=len(compilable_files)):
+                modules = self._scan_modules(context, target, compilable_files, flags, planned or {}, jobserver)
+            if modules is None:
+                return None
+        
+        # Unity mode compiles generated batches instead of most individual files
+        units = compilable_files
+        if config.unity:
+            # Module units are compiled on their own
+            module_units = [f for f in compilable_files if modules is not None and modules.scans[f].uses_modules]
+            with self.tracer.span("unity plan", target=target.name):
+                units = self._plan_unity(context, target, [f for f in compilable_files if f not in module_units])
+            units += module_units
+        
+        # Compile sources to objects
+        obj_ext = toolchain.get_object_extension()
+        object_files = [target.project.get_object_path(f, obj_ext) for f in units]
+        
+        # Two sources mapping to one object (a.c and a.cpp) would overwrite each other
+        owners: Dict[Path, Path] = {}
+        for source_file, obj_file in zip(units, object_files):
+            other = owners.setdefault(obj_file, source_file)
+            if other != source_file:
+                print(f"Error: {other} and {source_file} both compile to {obj_file}")
+                return None
+        
+        plan = TargetPlan(target, units, object_files, flags, pch_deps, time_trace_flags, modules=modules,
+                          pch_inputs=pch_inputs)
+        
+        # Skip objects whose source, compile command and compiler are unchanged
+        fingerprint = toolchain.get_fingerprint()
+        with self.tracer.span("up-to-date check", target=target.name, units=len(units)):
+            if modules is not None:
+                self._plan_module_compiles(context, plan, planned or {}, fingerprint)
+            else:
+                for source_file, obj_file in zip(units, object_files):
+                    depfile = obj_file.with_suffix(".d")
+                    cmd = toolchain.get_compile_command(source_file, obj_file, include_dirs, flags, depfile=depfile)
+                    signature = command_signature(cmd + [fingerprint])
+                    if (not state.is_up_to_date(source_file, obj_file, signature)
+                            or (plan.time_trace and not self._has_time_trace(toolchain, obj_file))):
+                        plan.compiles.append(CompileAction(plan, source_file, obj_file, signature))
+        
+        # Object directories mirror the source tree
+        for directory in {action.object_file.parent for action in plan.compiles}:
+            directory.mkdir(parents=True, exist_ok=True)
+        
+        up_to_date = len(units) - len(plan.compiles)
+        if up_to_date:
+            print(f"{up_to_date} object(s) up to date")
+        
+        plan.link = LinkAction(plan)
+        return plan
+    
+    def _scan_modules(
+        self,
+        context: BuildContext,
+        target: BuildTarget,
+        compilable_files: List[Path],
+        flags: Optional[List[str]],
+        planned: Dict[str, TargetPlan],
+        jobserver: Optional[Jobserver] = None,
+    ) -> Optional[ModuleGraph]:
+        """
+        Scan the units of a target for the modules they provide and import.
+        
+        Each unit's P1689 output (<object>.ddi) is kept in the build
+        directory and reused until the unit, a header it includes or the
+        scan command changes. Out-of-date units are scanned in parallel.
+        
+        Args:
+            context: Build context.
+            target: Target to scan.
+            compilable_files: Translation units of the target.
+            flags: Compile flags shared by the target's units.
+            planned: Plans of the targets planned before it, by name.
+            jobserver: Jobserver the scans take slots from (optional).
+        
+        Returns:
+            Module graph of the target's units and those of the libraries it
+            depends on, or None if scanning failed or the graph is invalid.
+        """
+        toolchain = context.toolchain
+        state = context.state
+        if toolchain.get_bmi_extension() is None:
+            print(f"Error: {toolchain.name} does not support C++20 modules (modules = true)")
+            return None
+        
+        obj_ext = toolchain.get_object_extension()
+        fingerprint = toolchain.get_fingerprint()
+        scans: Dict[Path, ModuleScan] = {}
+        pending: List[ScanAction] = []
+        for source_file in compilable_files:
+            obj_file = target.project.get_object_path(source_file, obj_ext)
+            action = ScanAction(source_file, obj_file, obj_file.with_suffix(".ddi"), "")
+            cmd = toolchain.get_module_scan_command(source_file, action.scan_file, obj_file, target.include_dirs,
+                                                    flags, depfile=action.depfile)
+            action.signature = command_signature(cmd + [fingerprint])
+            if state.is_up_to_date(source_file, action.scan_file, action.signature):
+                try:
+                    scans[source_file] = read_p1689(action.scan_file)
+                    continue
+                except (OSError, ValueError):
+                    pass
+            pending.append(action)
+        
+        def scan_one(action: ScanAction) -> bool:
+            source_file = action.source_file
+            st = BuildState.stat_source(source_file)
+            state.invalidate(action.scan_file)
+            started = time.perf_counter()
+            with track_usage() as usage, self.tracer.span(action.name, "scan", source=source_file):
+                success = toolchain.scan_module_dependencies(source_file, action.scan_file, action.object_file,
+                                                             include_dirs=target.include_dirs, flags=flags,
+                                                             depfile=action.depfile)
+            wall_time = time.perf_counter() - started
+            if success:
+                try:
+                    scans[source_file] = read_p1689(action.scan_file)
+                except (OSError, ValueError) as e:
+                    print(f"Error: {source_file}: {e}")
+                    success = False
+            if not success:
+                state.record_failure(source_file, action.scan_file, action.signature, wall_time, kind="scan",
+                                     usage=usage)
+                return False
+            if st is not None:
+                state.record(source_file, action.scan_file, action.signature, st, parse_depfile(action.depfile),
+                             wall_time, kind="scan", usage=usage)
+            return True
+        
+        if pending:
+            print(f"Scanning {len(pending)} file(s) for module dependencies")
+            for directory in {action.scan_file.parent for action in pending}:
+                directory.mkdir(parents=True, exist_ok=True)
+            scheduler = JobScheduler(self._job_count(jobserver), jobserver)
+            if not scheduler.run(pending, scan_one):
+                print("Error scanning module dependencies")
+                return None
+        
+        # Modules of the libraries the target depends on can be imported too
+        for library in target.dependencies:
+            plan = planned.get(library.name)
+            if plan is not None and plan.modules is not None:
+                scans.update(plan.modules.scans)
+        
+        try:
+            return ModuleGraph(scans)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return None
+    
+    @staticmethod
+    def _plan_module_compiles(
+        context: BuildContext,
+        plan: TargetPlan,
+        planned: Dict[str, TargetPlan],
+        fingerprint: str,
+    ) -> None:
+        """
+        Plan the compiles of a target built with modules.
+        
+        Units are checked in import order. A unit is recompiled when it is
+        out of date, when the BMI it provides is missing, or when a module
+        it imports is recompiled in this build; its compile then waits for
+        those compiles (in this target or a library it depends on). Units
+        that import nothing being rebuilt still compile in parallel.
+        
+        Args:
+            context: Build context.
+            plan: Plan of the target (with its module graph).
+            planned: Plans of the targets planned before it, by name.
+            fingerprint: Toolchain fingerprint.
+        """
+        target = plan.target
+        toolchain = context.toolchain
+        state = context.state
+        graph = plan.modules
+        
+        # BMIs persist in the build directory between builds
+        bmi_dir = target.build_dir / MODULES_DIRNAME
+        bmi_dir.mkdir(parents=True, exist_ok=True)
+        extension = toolchain.get_bmi_extension()
+        bmi_files: Dict[str, Path] = {}
+        compiles: Dict[str, CompileAction] = {}
+        for library in target.dependencies:
+            bmi_files.update(planned[library.name].bmi_files)
+            compiles.update(planned[library.name].module_compiles)
+        for unit in plan.units:
+            scan = graph.scans.get(unit)
+            if scan is not None and scan.provides is not None:
+                plan.bmi_files[scan.provides] = bmi_dir / bmi_filename(scan.provides, extension)
+        bmi_files.update(plan.bmi_files)
+        map_file = bmi_dir / MODULE_MAP_FILENAME
+        toolchain.write_module_map(map_file, bmi_files)
+        
+        # Providers before importers; unity batches (no modules) last
+        objects = dict(zip(plan.units, plan.object_files))
+        order = [unit for unit in graph.order() if unit in objects]
+        order += [unit for unit in plan.units if unit not in graph.scans]
+        for unit in order:
+            obj_file = objects[unit]
+            scan = graph.scans.get(unit, ModuleScan())
+            imported = graph.closure(unit) if unit in graph.scans else []
+            unit_bmis = {name: bmi_files[name] for name in imported}
+            bmi_file = None
+            if scan.provides is not None:
+                bmi_file = unit_bmis[scan.provides] = bmi_files[scan.provides]
             
-            print(f"Found {len(source_files)} source files ({len(compilable_files)} compilable)")
-            
-            # Compile sources to objects
-            object_files = []
-            obj_ext = toolchain.get_object_extension()
-            
-            for source_file in compilable_files:
-                obj_name = source_file.stem + obj_ext
-                obj_file = build_dir / obj_name
-                
-                print(f"Compiling: {source_file.name} -> {obj_name}")
-                
-                # Include directories: source paths + configured include paths
-                # Headers are searched in source_paths automatically
-                include_dirs = [Path(src) for src in config.source_paths]
-                # Also add any configured include paths (for external vendor libraries)
-                include_dirs.extend([Path(inc) for inc in config.include_paths])
-                
-                success = toolchain.compile_object(source_file, obj_file, include_dirs=include_dirs)
-                
-                if not success:
-                    print(f"Error compiling {source_file}")
-                    return 1
-                
-                object_files.append(obj_file)
-            
-            # Link objects into target
-            target_name = project.get_target_filename()
-            target_path = output_dir / target_name
-            
-            print(f"\nLinking: {target_name}")
+            module_flags = toolchain.get_module_flags(map_file, unit_bmis, scan.provides)
+            depfile = obj_file.with_suffix(".d")
+            cmd = toolchain.get_compile_command(unit, obj_file, target.include_dirs,
+                                                (plan.flags or []) + module_flags, depfile=depfile)
+            signature = command_signature(cmd + [fingerprint])
             
+            after = [compiles[name] for name in scan.requires if name in compiles]
+            if (after
+                    or not state.is_up_to_date(unit, obj_file, signature)
+                    or (bmi_file is not None and not bmi_file.exists())
+                    or (plan.time_trace and not self._has_time_trace(toolchain, obj_file))):
+                action = CompileAction(plan, unit, obj_file, signature, module_flags, after, bmi_file,
+                                       [str(bmi_files[name]) for name in imported])
+                plan.compiles.append(action)
+                if scan.provides is not None:
+                    compiles[scan.provides] = plan.module_compiles[scan.provides] = action
+    
+    def _link(self, context: BuildContext, action: LinkAction) -> bool:
+        """
+        Link a target whose objects and libraries are built.
+        
+        Executables and shared libraries link in the libraries of their
+        depends_on targets; static libraries only archive their own objects.
+        
+        Args:
+            context: Build context.
+            action: Link of the target (marked skipped if it is up to date).
+        
+        Returns:
+            True on success (or when the target is up to date).
+        """
+        plan = action.plan
+        target = plan.target
+        config = target.config
+        toolchain = context.toolchain
+        state = context.state
+        object_files = plan.object_files
+        target_name = target.project.get_target_filename()
+        target_path = target.get_target_path(context.output_dir)
+        
+        libraries: List[Path] = []
+        link_flags: Optional[List[str]] = None
+        if config.project_type != "static" and target.dependencies:
+            libraries = [library.get_link_input(context.output_dir) for library in target.dependencies]
+            if any(library.config.project_type == "shared" for library in target.dependencies):
+                # Shared libraries are found next to what uses them
+                if config.platform == "Linux":
+                    link_flags = ["-Wl,-rpath,$ORIGIN"]
+                elif config.platform == "macOS":
+                    link_flags = ["-Wl,-rpath,@loader_path"]
+        inputs = object_files + libraries
+        
+        # Relink only when the objects, libraries, flags or toolchain changed
+        link_signature = self._link_signature(context, target, inputs, target_path, link_flags)
+        if state.is_link_up_to_date(target_path, link_signature):
+            print(f"Link skipped: {target_name} is up to date")
+            action.skipped = True
+            return True
+        
+        print(f"Linking: {target_name}")
+        
+        state.invalidate(target_path)
+        started = time.perf_counter()
+        with (
+            track_usage() as usage,
+            self.tracer.span(f"link {target_name}", "link", target=target_path, objects=len(object_files)),
+        ):
             if config.project_type == "exe":
                 success = toolchain.link_executable(
-                    object_files,
+                    inputs,
                     target_path,
                     libraries=config.link_dependencies,
+                    flags=link_flags,
                 )
             elif config.project_type == "static":
-                success = toolchain.link_static_library(object_files, target_path)
+                success = toolchain.link_static_library(object_files, target_path, flags=link_flags)
             elif config.project_type == "shared":
                 success = toolchain.link_shared_library(
-                    object_files,
+                    inputs,
                     target_path,
                     libraries=config.link_dependencies,
+                    flags=link_flags,
                 )
             else:
                 raise ValueError(f"Unknown project type: {config.project_type}")
-            
-            if not success:
-                print("Error during linking")
-                return 1
-            
-            print(f"\nBuild successful!")
-            print(f"Target: {target_path}")
-            
-            return 0
         
-        except FileNotFoundError as e:
+        link_time = time.perf_counter() - started
+        state.record_link(target_path, inputs, link_signature, success, link_time, usage)
+        if not success:
+            print(f"Error linking {target_name}")
+            return False
+        return True
+    
+    @staticmethod
+    def _connect_workers(
+        context: BuildContext,
+        flags: Optional[List[str]],
+        jobs: int,
+        jobserver: Optional[Jobserver],
+    ) -> Optional[RemoteCompiler]:
+        """
+        Connect to the configured remote compile workers.
+        
+        Compiles that depend on local build outputs (a precompiled header,
+        BMIs of modules or -ftime-trace files) are not distributed.
+        
+        Args:
+            context: Build context.
+            flags: Extra compile flags of this build.
+            jobs: Local job budget.
+            jobserver: Jobserver local compiles take slots from (optional).
+        
+        Returns:
+            RemoteCompiler, or None to compile everything locally.
+        """
+        if flags:
+            print("Warning: distributed compilation is disabled with pch, modules or --time-report")
+            return None
+        remote = RemoteCompiler.connect(context.toolchain, context.config.workers, jobserver, jobs)
+        if remote is None:
+            print("Warning: no usable workers; compiling locally")
+        return remote
+    
+    @staticmethod
+    def _has_time_trace(toolchain: Toolchain, obj_file: Path) -> bool:
+        """
+        Check whether an object still has the time trace of its compile.
+        
+        Time trace flags are not part of compile signatures, so toggling
+        --time-report rebuilds nothing by itself. With --time-report, only
+        objects compiled without a trace (or rebuilt since their trace was
+        written) are recompiled; the compiler writes the trace after the
+        object.
+        
+        Args:
+            toolchain: Toolchain writing the traces.
+            obj_file: Path to object file.
+        
+        Returns:
+            True if the trace is at least as new as the object.
+        """
+        try:
+            trace_mtime = toolchain.get_time_trace_file(obj_file).stat().st_mtime_ns
+            return trace_mtime >= obj_file.stat().st_mtime_ns
+        except OSError:
+            return False
+    
+    def _write_time_report(self, context: BuildContext, plan: TargetPlan) -> None:
+        """
+        Merge the time traces of all objects of a target into a report.
+        
+        Objects that were up to date still have the trace from the compile
+        that produced them, so the report always covers the whole target.
+        
+        Args:
+            context: Build context.
+            plan: Plan of the target.
+        """
+        report = TimeReport()
+        with self.tracer.span("time report", target=plan.target.name):
+            for unit, obj_file in zip(plan.units, plan.object_files):
+                report.add_file(context.toolchain.get_time_trace_file(obj_file), str(unit))
+        if not report.files:
+            print("Warning: no compiler time traces found")
+            return
+        
+        report_path = plan.target.build_dir / self.TIME_REPORT_FILE
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=2)
+        print()
+        print(report.format())
+        print(f"\nFull report: {report_path}")
+    
+    def _memory_budget(self, context: BuildContext) -> Optional[int]:
+        """
+        Get the memory the running actions of this build may use together.
+        
+        --memory-budget overrides memory_budget from sugar.toml. "auto"
+        means the memory available right now (MemAvailable, and what is
+        left below the cgroup memory limit).
+        
+        Returns:
+            Budget in bytes, or None for no budget.
+        """
+        setting = self.memory_budget if self.memory_budget is not None else context.config.memory_budget
+        budget = Config.parse_memory_budget(setting)
+        if budget == "auto":
+            return available_memory()
+        return budget
+    
+    @staticmethod
+    def _memory_history(state: BuildState) -> Dict[str, float]:
+        """Get the last measured peak memory (bytes) of each output."""
+        return {
+            output: float(record.peak_rss)
+            for output, record in state.records.items()
+            if record.peak_rss
+        }
+    
+    @staticmethod
+    def _compile_history(state: BuildState) -> Dict[str, float]:
+        """
+        Get the last recorded compile time of each source file.
+        
+        Cache restores and remote compiles ran no compiler here and took
+        next to no time, so only compiles with measured process usage
+        count (every compile where usage cannot be measured). Files
+        without one are estimated by estimate_costs().
+        """
+        measured = usage_measured()
+        return {
+            record.inputs[0]: record.wall_time
+            for record in state.records.values()
+            if record.kind == "compile" and record.exit_status == 0 and record.inputs
+            and (record.user_time is not None or not measured)
+        }
+    
+    @staticmethod
+    def _print_critical_path(scheduler: JobScheduler) -> None:
+        """
+        Report the chain of actions that bounded the build's wall time.
+        
+        Nothing is reported when every link was skipped and nothing was
+        compiled.
+        
+        Args:
+            scheduler: Scheduler that ran the compiles and links.
+        """
+        if not any(not getattr(timing.task, "skipped", False) for timing in scheduler.timings):
+            return
+        path = [(timing.task.name, timing.duration) for timing in scheduler.critical_path()
+                if not getattr(timing.task, "skipped", False)]
+        
+        total = sum(duration for _, duration in path)
+        print(f"\nCritical path: {len(path)} action(s), {total:.2f} s")
+        # Long chains (e.g. -j1) are summarized by their most expensive steps
+        shown = sorted(path, key=lambda step: step[1], reverse=True)[:BuildCommand.CRITICAL_PATH_LINES]
+        for name, duration in path:
+            if (name, duration) in shown:
+                print(f"  {duration:8.2f} s  {name}")
+        if len(path) > len(shown):
+            print(f"  ... {len(path) - len(shown)} shorter action(s)")
+    
+    @staticmethod
+    def _link_signature(
+        context: BuildContext,
+        target: BuildTarget,
+        object_files: List[Path],
+        target_path: Path,
+        flags: Optional[List[str]],
+    ) -> str:
+        """
+        Hash everything the link step depends on.
+        
+        Args:
+            context: Build context.
+            target: Target being linked.
+            object_files: Objects (and libraries of other targets) linked into the target.
+            target_path: Path to the linked target.
+            flags: Linker flags.
+        
+        Returns:
+            Signature of the link inputs.
+        """
+        toolchain = context.toolchain
+        parts = [
+            toolchain.get_fingerprint(),
+            target.config.project_type,
+            str(target_path),
+            "libraries:" + ",".join(target.config.link_dependencies),
+            "flags:" + ",".join(flags or []),
+        ]
+        for obj in object_files:
+            parts.extend([str(obj), context.state.output_hash(obj) or ""])
+        return command_signature(parts)
+    
+    @staticmethod
+    def _prepare_pch(
+        context: BuildContext,
+        target: BuildTarget,
+        compilable_files: List[Path],
+        time_trace_flags: List[str],
+    ) -> Optional[Tuple[List[str], List[str], List[str]]]:
+        """
+        Select the precompiled header's contents and build it if needed.
+        
+        A PCH is only used by compiles with the flags it was built with, and
+        it is force-included ahead of the unit's first line. Units of a
+        modules build get per-unit module flags, and a forced include in
+        front of a module declaration is an error, so modules = true
+        disables the PCH.
+        
+        Args:
+            context: Build context.
+            target: Target the header is for.
+            compilable_files: Translation units of the target.
+            time_trace_flags: Time trace flags of the units (--time-report).
+        
+        Returns:
+            Compiler flags that use the PCH, extra dependencies of every
+            object and the files the PCH is built from (all empty when no PCH
+            is used), or None if precompiling failed.
+        """
+        toolchain = context.toolchain
+        if toolchain.get_pch_extension() is None:
+            print(f"Warning: {toolchain.name} does not support precompiled headers; ignoring pch")
+            return [], [], []
+        if context.config.modules:
+            print("Warning: precompiled headers are not used with modules = true; ignoring pch")
+            return [], [], []
+        
+        if context.config.pch == "auto":
+            headers = select_headers(compilable_files, target.include_dirs)
+            if not headers:
+                print("No header is shared by enough sources to precompile")
+                return [], [], []
+        else:
+            headers = []
+            for header in context.config.pch:
+                path = target.project.root_dir / header
+                headers.append(str(path.resolve()) if path.is_file() else header)
+        
+        pch = PrecompiledHeader(target.build_dir, headers)
+        flags = pch.prepare(toolchain, context.state, include_dirs=target.include_dirs,
+                            time_trace_flags=time_trace_flags)
+        if flags is None:
+            return None
+        return flags, [str(pch.get_pch_file(toolchain))], pch.get_inputs(toolchain, context.state)
+    
+    @staticmethod
+    def _plan_unity(context: BuildContext, target: BuildTarget, compilable_files: List[Path]) -> List[Path]:
+        """
+        Group translation units into unity batches.
+        
+        Args:
+            context: Build context.
+            target: Target the units belong to.
+            compilable_files: Translation units of the target.
+        
+        Returns:
+            Units to compile: batch sources, isolated files and excluded files.
+        """
+        config = target.config
+        root_dir = target.project.root_dir
+        
+        matches = compile_globs(config.unity_exclude)
+        
+        def excluded(path: Path) -> bool:
+            try:
+                relative = path.resolve().relative_to(root_dir.resolve()).as_posix()
+            except ValueError:
+                relative = path.as_posix()
+            return matches(relative)
+        
+        unsafe = [f for f in compilable_files if excluded(f)]
+        candidates = [f for f in compilable_files if not excluded(f)]
+        
+        # Historical compile times of files that were last built on their own
+        history = BuildCommand._compile_history(context.state)
+        
+        unity = UnityBuild(target.build_dir, config.unity_batch_size)
+        units = unity.plan(candidates, estimate_costs(candidates, history))
+        
+        # Objects of dropped batches were deleted; so goes their build record
+        obj_ext = context.toolchain.get_object_extension()
+        for source_file in unity.removed:
+            context.state.invalidate(target.project.get_object_path(source_file, obj_ext))
+        batched = sum(len(batch) for batch in unity.batches)
+        print(
+            f"Unity build: {batched} file(s) in {len(unity.batches)} batch(es), "
+            f"{len(unity.isolated)} isolated, {len(unsafe)} excluded"
+        )
+        return units + unsafe
+    
+    def _watch(self, config_path: Path) -> int:
+        """
+        Build, then rebuild whenever sources, headers or sugar.toml change.
+        
+        The configuration, toolchain, source list and build database stay
+        loaded between rebuilds. sugar.toml is only re-read when it changes,
+        and the source list is patched from the reported file events instead
+        of re-scanning every directory.
+        
+        Args:
+            config_path: Path to sugar.toml.
+        
+        Returns:
+            0 when stopped with Ctrl+C, 1 if the initial configuration is invalid.
+        """
+        print(f"Watching from: {config_path}")
+        context = self._prepare(config_path)
+        watcher = None
+        try:
+            self._rebuild(context)
+            while True:
+                if watcher is None:
+                    watcher = create_watcher(
+                        self._watch_directories(context),
+                        files=[config_path],
+                        ignore=[context.build_dir, context.output_dir],
+                    )
+                
+                print("\nWatching for changes... (Ctrl+C to stop)")
+                changed = watcher.wait_for_changes(self.WATCH_DEBOUNCE)
+                
+                if self._config_changed(context, changed):
+                    print(f"\n{config_path} changed, reloading configuration")
+                    try:
+                        new_context = self._prepare(config_path, previous=context)
+                    except (FileNotFoundError, ValueError) as e:
+                        print(f"Configuration Error: {e}")
+                        continue
+                    context.close()
+                    context = new_context
+                    watcher.close()
+                    watcher = None
+                else:
+                    print(f"\n{len(changed)} file(s) changed, rebuilding")
+                    self._apply_changes(context, changed)
+                
+                self._rebuild(context)
+        except KeyboardInterrupt:
+            print("\nWatch stopped")
+            return 0
+        finally:
+            if watcher is not None:
+                watcher.close()
+            context.close()
+    
+    def _rebuild(self, context: BuildContext) -> None:
+        """Run one watch-mode build; errors are reported but keep the watch alive."""
+        try:
+            self._build(context)
+        except (FileNotFoundError, ValueError) as e:
             print(f"Error: {e}")
-            return 1
-        except ValueError as e:
-            print(f"Configuration Error: {e}")
-            return 1
-        except Exception as e:
+        except OSError as e:
             print(f"Build Error: {e}")
-            return 1
+    
+    @staticmethod
+    def _watch_directories(context: BuildContext) -> List[Path]:
+        """Get the directories watch mode monitors."""
+        directories: List[Path] = []
+        for target in context.targets:
+            for path in target.config.source_paths + target.config.include_paths:
+                directory = target.project.root_dir / path
+                if directory not in directories:
+                    directories.append(directory)
+        return directories
+    
+    @staticmethod
+    def _config_changed(context: BuildContext, changed: Set[Path]) -> bool:
+        """Check whether sugar.toml is among the changed files and really differs."""
+        config_path = context.config_path.resolve()
+        if not any(path.resolve() == config_path for path in changed):
+            return False
+        try:
+            return config_path.stat().st_mtime_ns != context.config_mtime_ns
+        except OSError:
+            return False
+    
+    @staticmethod
+    def _apply_changes(context: BuildContext, changed: Set[Path]) -> None:
+        """
+        Update the cached source list and file stamps for changed files.
+        
+        Args:
+            context: Build context to update.
+            changed: Paths reported by the file watcher.
+        """
+        context.state.deps.invalidate_stamps(changed)
+        for target in context.targets:
+            if target.source_files is None:
+                continue
+            
+            known = {path.resolve(): path for path in target.source_files}
+            for path in changed:
+                if not target.project.is_source_file(path):
+                    continue
+                resolved = path.resolve()
+                if path.exists() and resolved not in known:
+                    target.source_files.append(path)
+                elif not path.exists() and resolved in known:
+                    target.source_files.remove(known[resolved])
     
     def get_help(self) -> str:
         """Get help text for build command."""
         return """
 build - Compile and link the C++ project
 
-Usage: sugar-builder build [--config <path>]
+Usage: sugar-builder build [--config <path>] [-j <N>] [--watch] [--trace <file>]
+                           [--time-report] [--no-jobserver] [--memory-budget <size>]
 
 Options:
   --config <path>    Path to sugar.toml (defaults to ./sugar.toml)
+  -j, --jobs <N>     Number of parallel compile jobs (defaults to CPU count)
+  --watch            Keep running and rebuild when files change
+  --trace <file>     Write a Chrome trace-event timeline of the build
+  --time-report      Report compile hotspots from clang -ftime-trace
+  --no-jobserver     Neither join make's jobserver nor serve one
+  --memory-budget <size>
+                     Memory running jobs may use together: auto, off or a
+                     size such as 8G (overrides memory_budget in sugar.toml)
 
 Description:
   Builds the C++ project by:
   1. Validating sugar.toml configuration
   2. Creating build and output directories
-  3. Compiling all source files to object files
+  3. Compiling changed source files to object files (in parallel)
   4. Linking object files into final executable/library
 
 The project type (exe/static/shared) determines linking behavior.
 Dependencies are linked as specified in the configuration.
+See README.md for incremental builds, caching, unity builds, modules and
+distributed compilation.
 """
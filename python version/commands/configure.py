@@ -45,14 +45,33 @@ class ConfigureCommand(Command):
             
             print("Configuration validation successful!")
             print(f"  Project: {config.project_name}")
-            print(f"  Type: {config.project_type}")
+            if not config.targets:
+                print(f"  Type: {config.project_type}")
             print(f"  Compiler: {config.compiler}")
             print(f"  Platform: {config.platform}")
-            print(f"  Source paths: {', '.join(config.source_paths)}")
+            if not config.targets:
+                print(f"  Source paths: {', '.join(config.source_paths)}")
+                if config.source_include:
+                    print(f"  Source include: {', '.join(config.source_include)}")
+                if config.source_exclude:
+                    print(f"  Source exclude: {', '.join(config.source_exclude)}")
             print(f"  Build path: {config.build_path}")
             print(f"  Output path: {config.output_path}")
-            if config.link_dependencies:
+            if config.link_dependencies and not config.targets:
                 print(f"  Dependencies: {', '.join(config.link_dependencies)}")
+            for target in config.get_target_order() if config.targets else []:
+                uses = f", depends on {', '.join(target.depends_on)}" if target.depends_on else ""
+                print(f"  Target {target.name}: {target.type} from {', '.join(target.source_paths)}{uses}")
+            if config.object_cache:
+                print(f"  Object cache: {config.cache_path or 'default'} (max size {config.cache_max_size})")
+            if config.pch:
+                print(f"  Precompiled header: {config.pch if config.pch == 'auto' else ', '.join(config.pch)}")
+            if config.unity:
+                print(f"  Unity build: batches of up to {config.unity_batch_size}")
+            if config.workers:
+                print(f"  Workers: {', '.join(config.workers)}")
+            if config.memory_budget != "auto":
+                print(f"  Memory budget: {config.memory_budget}")
             
             return 0
         
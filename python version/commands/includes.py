@@ -0,0 +1,178 @@
+"""Includes command for SugarBuilder."""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import os
+from .base import Command
+from src.core import BuildDatabase, Config, Project
+from src.core.depindex import DependencyIndex
+from src.core.includegraph import IncludeAnalysis
+from src.core.unity import UnityBuild
+
+
+class IncludesCommand(Command):
+    """
+    Includes command ranks headers by what they cost the build.
+    
+    Works from the depfiles and compile times recorded by the last
+    builds; it never compiles anything itself.
+    """
+    
+    # File (in a target's build directory) written by build --time-report
+    TIME_REPORT_FILE = "time_report.json"
+    
+    def __init__(self, json_output: bool = False, top: int = 20):
+        """
+        Initialize includes command.
+        
+        Args:
+            json_output: Print the analysis as JSON instead of a report.
+            top: Headers to list.
+        """
+        super().__init__("includes")
+        self.json_output = json_output
+        self.top = top
+    
+    def execute(self, config_path: Optional[str] = None) -> int:
+        """
+        Analyze the include graph of the last build.
+        
+        Args:
+            config_path: Optional path to sugar.toml (defaults to ./sugar.toml).
+        
+        Returns:
+            0 on success, 1 if the project was not built yet or the data
+            cannot be read.
+        """
+        try:
+            # Default to ./sugar.toml if not specified
+            if config_path is None:
+                config_path = "sugar.toml"
+            
+            config = Config.load(config_path)
+            config.validate()
+            build_dir = Project(config).get_build_directory()
+            
+            if not (build_dir / DependencyIndex.FILENAME).exists():
+                print(f"Error: no dependency data in {build_dir} (run a build first)")
+                return 1
+            index = DependencyIndex.load(build_dir)
+            
+            sources: Dict[str, str] = {}
+            compile_times: Dict[str, float] = {}
+            if (build_dir / BuildDatabase.FILENAME).exists():
+                db = BuildDatabase(build_dir)
+                try:
+                    records = db.get_actions("compile")
+                finally:
+                    db.close()
+                # CPU time is steadier than wall time under parallel load; cache
+                # hits ran no compiler and say nothing about parse cost
+                measured_usage = any(record.user_time is not None for record in records.values())
+                for output, record in records.items():
+                    if record.inputs:
+                        sources[os.path.normpath(output)] = record.inputs[0]
+                    if record.exit_status != 0:
+                        continue
+                    if record.user_time is not None:
+                        compile_times[os.path.normpath(output)] = record.user_time + (record.system_time or 0.0)
+                    elif not measured_usage:
+                        compile_times[os.path.normpath(output)] = record.wall_time
+            
+            analysis = IncludeAnalysis.analyze(
+                index,
+                sources=sources,
+                compile_times=compile_times,
+                measured=self._measured_header_times(build_dir),
+                ignore=[build_dir],
+                compile_inputs=self._unity_members(build_dir),
+            )
+            
+            if self.json_output:
+                print(json.dumps(analysis.to_dict(self.top), indent=2))
+            else:
+                print(analysis.format(self.top))
+            return 0
+        
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return 1
+        except ValueError as e:
+            print(f"Configuration Error: {e}")
+            return 1
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            return 1
+    
+    @staticmethod
+    def _unity_members(build_dir: Path) -> List[str]:
+        """
+        Get the files compiled as part of unity batches.
+        
+        The depfile of a batch lists its members, which must not be taken
+        for headers.
+        
+        Args:
+            build_dir: Project build directory (targets build in its
+                subdirectories).
+        
+        Returns:
+            Paths of the planned translation units of every target.
+        """
+        members: List[str] = []
+        for target_dir in [build_dir, *(path for path in build_dir.iterdir() if path.is_dir())]:
+            members.extend(UnityBuild.planned_files(target_dir))
+        return members
+    
+    def _measured_header_times(self, build_dir: Path) -> Dict[str, float]:
+        """
+        Read the header parse times of the --time-report reports.
+        
+        Args:
+            build_dir: Project build directory (targets build in its
+                subdirectories).
+        
+        Returns:
+            Seconds spent parsing each header over all units, keyed by path
+            relative to the working directory.
+        """
+        times: Dict[str, float] = {}
+        for report_path in [build_dir / self.TIME_REPORT_FILE, *build_dir.glob(f"*/{self.TIME_REPORT_FILE}")]:
+            try:
+                with open(report_path, "r", encoding="utf-8") as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for entry in report.get("headers", []):
+                name = entry.get("name", "")
+                if os.path.isabs(name):
+                    name = os.path.relpath(name)
+                name = os.path.normpath(name)
+                times[name] = times.get(name, 0.0) + entry.get("total_ms", 0.0) / 1000.0
+        return times
+    
+    def get_help(self) -> str:
+        """Get help text for includes command."""
+        return """
+includes - Rank headers by parse cost and suggest precompiled headers
+
+Usage: sugar-builder includes [--config <path>] [--json] [--top <N>]
+
+Options:
+  --config <path>    Path to sugar.toml (defaults to ./sugar.toml)
+  --json             Print the analysis as JSON
+  --top <N>          Headers to list (default 20)
+
+Description:
+  Builds the include graph of the project headers from the depfiles of the
+  last build plus the #include lines of those headers, and reports for each
+  header how many translation units reach it, how many files include it
+  directly, its own and inclusive size and its parse cost over all units:
+  inclusive size x units, converted to seconds with the parse rate measured
+  from the recorded compile times (or the -ftime-trace time, for headers in
+  a build --time-report report). The most expensive headers are what
+  removing includes would save the most on; the PCH candidates are the
+  shared headers that precompiling (pch in sugar.toml) would save the most
+  on.
+"""
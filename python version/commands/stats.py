@@ -0,0 +1,115 @@
+"""Stats command for SugarBuilder."""
+
+from typing import Optional
+import json
+from .base import Command
+from src.core import BuildDatabase, Config, Project
+from src.core.stats import REGRESSION_MIN_RUNS, REGRESSION_MIN_SECONDS, REGRESSION_THRESHOLD, BuildStats
+
+
+class StatsCommand(Command):
+    """
+    Stats command reports trends from the recorded build history.
+    
+    Reads the build database that `build` keeps in the build directory;
+    it never builds anything itself.
+    """
+    
+    def __init__(
+        self,
+        json_output: bool = False,
+        builds: int = 20,
+        top: int = 10,
+        threshold: float = REGRESSION_THRESHOLD,
+    ):
+        """
+        Initialize stats command.
+        
+        Args:
+            json_output: Print the statistics as JSON instead of a report.
+            builds: Recent builds to summarize.
+            top: Slowest compiles to list.
+            threshold: Slowdown over a file's rolling median that counts
+                as a regression (0.3 = 30%).
+        """
+        super().__init__("stats")
+        self.json_output = json_output
+        self.builds = builds
+        self.top = top
+        self.threshold = threshold
+    
+    def execute(self, config_path: Optional[str] = None) -> int:
+        """
+        Print build statistics.
+        
+        Args:
+            config_path: Optional path to sugar.toml (defaults to ./sugar.toml).
+        
+        Returns:
+            0 on success, 1 if there is no build history or it cannot be read.
+        """
+        try:
+            # Default to ./sugar.toml if not specified
+            if config_path is None:
+                config_path = "sugar.toml"
+            
+            config = Config.load(config_path)
+            config.validate()
+            build_dir = Project(config).get_build_directory()
+            
+            # Opening the database would create it; an unbuilt project has no history
+            if not (build_dir / BuildDatabase.FILENAME).exists():
+                print(f"Error: no build history in {build_dir} (run a build first)")
+                return 1
+            
+            db = BuildDatabase(build_dir)
+            try:
+                stats = BuildStats.from_database(db, builds=self.builds, top=self.top, threshold=self.threshold)
+            finally:
+                db.close()
+            
+            if self.json_output:
+                print(json.dumps(stats.to_dict(), indent=2))
+            else:
+                print(f"Build history: {build_dir / BuildDatabase.FILENAME}\n")
+                print(stats.format())
+            return 0
+        
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return 1
+        except ValueError as e:
+            print(f"Configuration Error: {e}")
+            return 1
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            return 1
+    
+    def get_help(self) -> str:
+        """Get help text for stats command."""
+        return f"""
+stats - Show build-time trends and compile regressions
+
+Usage: sugar-builder stats [--config <path>] [--json] [--builds <N>] [--top <N>]
+                           [--threshold <percent>]
+
+Options:
+  --config <path>        Path to sugar.toml (defaults to ./sugar.toml)
+  --json                 Print the statistics as JSON (for dashboards)
+  --builds <N>           Recent builds to summarize (default 20)
+  --top <N>              Slowest compiles to list (default 10)
+  --threshold <percent>  Slowdown that counts as a regression
+                         (default {REGRESSION_THRESHOLD * 100:.0f})
+
+Description:
+  Reads the history `build` records in the build directory and reports:
+  - each recent build: wall time, compiles run and their total time, tool
+    CPU time and object cache hit rate
+  - whether compiles got slower, comparing the mean time per compile of
+    the newer half of those builds with the older half
+  - the object cache hit rate over those builds
+  - the slowest translation units by their latest compile
+  - regressions: files whose latest compile is more than the threshold
+    slower than the median of their previous runs (at least
+    {REGRESSION_MIN_RUNS} earlier runs, and at least {REGRESSION_MIN_SECONDS} s slower)
+"""
@@ -0,0 +1,75 @@
+"""Worker command for SugarBuilder."""
+
+from typing import Optional
+from .base import Command
+from src.core import default_job_count
+from src.core.remote import DEFAULT_PORT, WorkerServer
+
+
+class WorkerCommand(Command):
+    """
+    Worker command runs a remote compile daemon.
+    
+    Compiles preprocessed sources sent by `build` on other machines (or
+    other processes on this one) that list this worker in their workers.
+    """
+    
+    def __init__(self, listen: Optional[str] = None, jobs: Optional[int] = None):
+        """
+        Initialize worker command.
+        
+        Args:
+            listen: Address to listen on ("host:port" or "unix:/path").
+            jobs: Maximum concurrent compiles (defaults to usable CPU count).
+        """
+        super().__init__("worker")
+        self.listen = listen or f"127.0.0.1:{DEFAULT_PORT}"
+        self.jobs = jobs
+    
+    def execute(self, config_path: Optional[str] = None) -> int:
+        """
+        Serve compile requests until interrupted.
+        
+        Args:
+            config_path: Unused; workers need no project configuration.
+        
+        Returns:
+            0 when stopped, 1 if the worker could not start.
+        """
+        jobs = self.jobs if self.jobs is not None else default_job_count()
+        try:
+            server = WorkerServer(self.listen, jobs)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot listen on {self.listen}: {e}")
+            return 1
+        
+        print(f"Worker listening on {self.listen} with {jobs} slot(s)", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nWorker stopped")
+        finally:
+            server.close()
+        return 0
+    
+    def get_help(self) -> str:
+        """Get help text for worker command."""
+        return f"""
+worker - Run a remote compile worker
+
+Usage: sugar-builder worker [--listen <address>] [-j <N>]
+
+Options:
+  --listen <address>  host:port or unix:/path (defaults to 127.0.0.1:{DEFAULT_PORT})
+  -j, --jobs <N>      Maximum concurrent compiles (defaults to CPU count)
+
+Description:
+  Compiles preprocessed translation units for builds that list this worker
+  in workers (sugar.toml) or SUGAR_WORKERS, and sends back the object file
+  and diagnostics. The worker needs the same compiler version as the
+  clients, but not their sources or headers.
+
+  Workers run the compiler with flags chosen by the client: listen on a
+  non-local address (--listen 0.0.0.0:{DEFAULT_PORT}) only on trusted
+  networks.
+"""
@@ -1,7 +1,43 @@
 """Core module for SugarBuilder."""
 
-from .config import Config
-from .project import Project
-from .compiler import Compiler
+from ..lazy import lazy_module
 
-__all__ = ["Config", "Project", "Compiler"]
+# Name -> defining module, loaded on first access (PEP 562)
+_LAZY_IMPORTS = {
+    "Config": ".config",
+    "TargetConfig": ".config",
+    "Project": ".project",
+    "Compiler": ".compiler",
+    "JobScheduler": ".scheduler",
+    "default_job_count": ".scheduler",
+    "estimate_costs": ".scheduler",
+    "ActionRecord": ".builddb",
+    "BuildDatabase": ".builddb",
+    "BuildRecord": ".builddb",
+    "BuildState": ".buildstate",
+    "command_signature": ".buildstate",
+    "ObjectCache": ".objcache",
+    "default_cache_dir": ".objcache",
+    "Tracer": ".trace",
+}
+
+__all__ = [
+    "Config",
+    "TargetConfig",
+    "Project",
+    "Compiler",
+    "JobScheduler",
+    "default_job_count",
+    "estimate_costs",
+    "ActionRecord",
+    "BuildDatabase",
+    "BuildRecord",
+    "BuildState",
+    "command_signature",
+    "ObjectCache",
+    "default_cache_dir",
+    "Tracer",
+]
+
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
@@ -0,0 +1,486 @@
+"""Persistent build database (SQLite)."""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS actions (
+    output TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    output_hash TEXT,
+    source_mtime_ns INTEGER,
+    source_size INTEGER,
+    deps_digest TEXT,
+    wall_time REAL NOT NULL,
+    exit_status INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    peak_rss INTEGER,
+    user_time REAL,
+    system_time REAL,
+    read_bytes INTEGER,
+    write_bytes INTEGER
+);
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    wall_time REAL,
+    exit_status INTEGER,
+    cache_hits INTEGER,
+    cache_misses INTEGER
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_id INTEGER,
+    output TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    output_hash TEXT,
+    wall_time REAL NOT NULL,
+    exit_status INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    peak_rss INTEGER,
+    user_time REAL,
+    system_time REAL,
+    read_bytes INTEGER,
+    write_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS history_output ON history (output, id);
+"""
+
+
+@dataclass
+class ActionRecord:
+    """
+    Last known state of one build action (compile or link).
+    
+    The source_* and deps_digest fields hold the stamps the up-to-date
+    check compares against. For compile actions they describe the source
+    file; for link actions source_* is the stamp of the linked target.
+    """
+    
+    output: str
+    kind: str  # compile, pch, link
+    inputs: List[str] = field(default_factory=list)
+    signature: str = ""
+    output_hash: Optional[str] = None
+    source_mtime_ns: Optional[int] = None
+    source_size: Optional[int] = None
+    deps_digest: Optional[str] = None
+    wall_time: float = 0.0
+    exit_status: int = 0
+    timestamp: float = 0.0
+    # Resources of the action's processes (None when it ran none, e.g. cache hits)
+    peak_rss: Optional[int] = None  # Largest resident set (bytes)
+    user_time: Optional[float] = None  # CPU seconds in user mode
+    system_time: Optional[float] = None  # CPU seconds in the kernel
+    read_bytes: Optional[int] = None  # Block input
+    write_bytes: Optional[int] = None  # Block output
+    build_id: Optional[int] = None  # Build that ran the action (history entries only)
+
+
+@dataclass
+class BuildRecord:
+    """One build recorded in the database."""
+    
+    id: int
+    started: float
+    wall_time: Optional[float] = None  # None while running or if interrupted
+    exit_status: Optional[int] = None
+    cache_hits: Optional[int] = None  # None when the object cache was off
+    cache_misses: Optional[int] = None
+
+
+class BuildDatabase:
+    """
+    Durable per-build-directory database of actions and their history.
+    
+    The "actions" table holds the latest record per output path (primary
+    key, so lookups by output are a single index probe) and "history"
+    keeps one row per executed action for timing trends. Each build gets a
+    row in "builds".
+    
+    The database runs in WAL mode with a busy timeout so several sugar
+    processes can share a build directory; writes from worker threads are
+    queued and committed in short batched transactions. Every
+    COMPACT_INTERVAL builds, old history rows are pruned and free pages
+    reclaimed automatically.
+    """
+    
+    FILENAME = ".sugar_db.sqlite"
+    SCHEMA_VERSION = "4"
+    
+    # History rows kept per output path by auto-compaction
+    HISTORY_PER_OUTPUT = 50
+    # Builds kept by auto-compaction
+    MAX_BUILDS = 1000
+    # Pending writes that trigger a commit
+    COMMIT_BATCH = 64
+    # Builds between automatic compactions
+    COMPACT_INTERVAL = 25
+    # Columns read into history ActionRecords
+    _HISTORY_COLUMNS = (
+        "output, kind, signature, output_hash, wall_time, exit_status, timestamp, peak_rss, "
+        "user_time, system_time, read_bytes, write_bytes, build_id"
+    )
+    
+    def __init__(self, build_dir: Path):
+        """
+        Open (creating if needed) the build database.
+        
+        Args:
+            build_dir: Build directory holding the database.
+        """
+        self.build_dir = Path(build_dir)
+        self.build_id: Optional[int] = None
+        self._build_started = 0.0
+        self._queue: List[Tuple[str, tuple]] = []
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+    
+    @property
+    def path(self) -> Path:
+        """Path of the database file."""
+        return self.build_dir / self.FILENAME
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the connection and make sure the schema is current."""
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            if row is not None and row[0] != self.SCHEMA_VERSION:
+                # Unknown layout: start over rather than misread old records
+                for table in ("actions", "history", "builds"):
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in _SCHEMA.strip().split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema', ?)", (self.SCHEMA_VERSION,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            conn.close()
+            raise
+        return conn
+    
+    def compact(self) -> None:
+        """
+        Prune old history and reclaim free pages.
+        
+        Keeps the newest HISTORY_PER_OUTPUT history rows per output and the
+        newest MAX_BUILDS builds.
+        """
+        with self._lock:
+            self._commit_locked()
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                """
+                DELETE FROM history WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (PARTITION BY output ORDER BY id DESC) AS n
+                        FROM history
+                    ) WHERE n > ?
+                )
+                """,
+                (self.HISTORY_PER_OUTPUT,),
+            )
+            self._conn.execute(
+                "DELETE FROM builds WHERE id NOT IN (SELECT id FROM builds ORDER BY id DESC LIMIT ?)",
+                (self.MAX_BUILDS,),
+            )
+            self._conn.execute("COMMIT")
+            
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages:
+                self._conn.execute("PRAGMA incremental_vacuum")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    def begin_build(self) -> int:
+        """
+        Start recording a new build.
+        
+        Returns:
+            Id of the new build row.
+        """
+        self._build_started = time.time()
+        with self._lock:
+            self._commit_locked()
+            cursor = self._conn.execute("INSERT INTO builds (started) VALUES (?)", (self._build_started,))
+            self.build_id = cursor.lastrowid
+        
+        if self.build_id % self.COMPACT_INTERVAL == 0:
+            self.compact()
+        return self.build_id
+    
+    def end_build(
+        self,
+        exit_status: int,
+        cache_hits: Optional[int] = None,
+        cache_misses: Optional[int] = None,
+    ) -> None:
+        """
+        Finish the current build and commit everything recorded.
+        
+        Args:
+            exit_status: Exit status of the build.
+            cache_hits: Compiles the object cache answered (None if it was off).
+            cache_misses: Compiles the object cache had to run.
+        """
+        if self.build_id is None:
+            return
+        with self._lock:
+            self._queue.append((
+                "UPDATE builds SET wall_time = ?, exit_status = ?, cache_hits = ?, cache_misses = ? WHERE id = ?",
+                (time.time() - self._build_started, exit_status, cache_hits, cache_misses, self.build_id),
+            ))
+            self._commit_locked()
+    
+    def get_action(self, output: str) -> Optional[ActionRecord]:
+        """
+        Look up the latest record for an output path.
+        
+        Args:
+            output: Output file path.
+        
+        Returns:
+            ActionRecord, or None if the output was never built.
+        """
+        with self._lock:
+            self._commit_locked()
+            row = self._conn.execute("SELECT * FROM actions WHERE output = ?", (output,)).fetchone()
+        return self._to_record(row) if row else None
+    
+    def get_actions(self, kind: Optional[str] = None) -> Dict[str, ActionRecord]:
+        """
+        Load the latest records of all actions (optionally of one kind).
+        
+        Args:
+            kind: Action kind to filter on (e.g. "compile").
+        
+        Returns:
+            Records keyed by output path.
+        """
+        with self._lock:
+            self._commit_locked()
+            if kind is None:
+                rows = self._conn.execute("SELECT * FROM actions").fetchall()
+            else:
+                rows = self._conn.execute("SELECT * FROM actions WHERE kind = ?", (kind,)).fetchall()
+        return {row[0]: self._to_record(row) for row in rows}
+    
+    def record_action(self, record: ActionRecord) -> None:
+        """
+        Store the result of an action and append it to the history.
+        
+        Writes are queued and committed in batches of COMMIT_BATCH.
+        
+        Args:
+            record: Action record (timestamp defaults to now).
+        """
+        if not record.timestamp:
+            record.timestamp = time.time()
+        with self._lock:
+            self._queue.append((
+                "INSERT OR REPLACE INTO actions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.output,
+                    record.kind,
+                    json.dumps(record.inputs),
+                    record.signature,
+                    record.output_hash,
+                    record.source_mtime_ns,
+                    record.source_size,
+                    record.deps_digest,
+                    record.wall_time,
+                    record.exit_status,
+                    record.timestamp,
+                    record.peak_rss,
+                    record.user_time,
+                    record.system_time,
+                    record.read_bytes,
+                    record.write_bytes,
+                ),
+            ))
+            self._queue.append((
+                "INSERT INTO history (build_id, output, kind, signature, output_hash, wall_time, exit_status, timestamp, "
+                "peak_rss, user_time, system_time, read_bytes, write_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.build_id,
+                    record.output,
+                    record.kind,
+                    record.signature,
+                    record.output_hash,
+                    record.wall_time,
+                    record.exit_status,
+                    record.timestamp,
+                    record.peak_rss,
+                    record.user_time,
+                    record.system_time,
+                    record.read_bytes,
+                    record.write_bytes,
+                ),
+            ))
+            if len(self._queue) >= 2 * self.COMMIT_BATCH:
+                self._commit_locked()
+    
+    def remove_action(self, output: str) -> None:
+        """
+        Forget the latest record for an output (history is kept).
+        
+        Args:
+            output: Output file path.
+        """
+        with self._lock:
+            self._queue.append(("DELETE FROM actions WHERE output = ?", (output,)))
+    
+    def get_history(self, output: str, limit: int = 20) -> List[ActionRecord]:
+        """
+        Get the most recent executions of an action, newest first.
+        
+        Args:
+            output: Output file path.
+            limit: Maximum number of rows.
+        
+        Returns:
+            History entries as ActionRecords (inputs and stamps are not kept).
+        """
+        with self._lock:
+            self._commit_locked()
+            rows = self._conn.execute(
+                f"SELECT {self._HISTORY_COLUMNS} FROM history WHERE output = ? ORDER BY id DESC LIMIT ?",
+                (output, limit),
+            ).fetchall()
+        return [self._to_history_record(row) for row in rows]
+    
+    def get_all_history(self, first_build: Optional[int] = None) -> List[ActionRecord]:
+        """
+        Get every recorded execution, oldest first.
+        
+        Args:
+            first_build: Only include builds with this id or later.
+        
+        Returns:
+            History entries as ActionRecords (inputs and stamps are not kept).
+        """
+        with self._lock:
+            self._commit_locked()
+            rows = self._conn.execute(
+                f"SELECT {self._HISTORY_COLUMNS} FROM history WHERE build_id >= ? ORDER BY id",
+                (first_build or 0,),
+            ).fetchall()
+        return [self._to_history_record(row) for row in rows]
+    
+    def get_builds(self, limit: int = 20) -> List[BuildRecord]:
+        """
+        Get the most recent builds, oldest first.
+        
+        Args:
+            limit: Maximum number of builds.
+        
+        Returns:
+            Build records.
+        """
+        with self._lock:
+            self._commit_locked()
+            rows = self._conn.execute(
+                "SELECT id, started, wall_time, exit_status, cache_hits, cache_misses "
+                "FROM builds ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [BuildRecord(*row) for row in reversed(rows)]
+    
+    def commit(self) -> None:
+        """Commit pending writes."""
+        with self._lock:
+            self._commit_locked()
+    
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        with self._lock:
+            self._commit_locked()
+            self._conn.close()
+    
+    def _commit_locked(self) -> None:
+        """
+        Write queued statements in one short transaction (caller holds the lock).
+        
+        Transactions are only held for the duration of the batch so other
+        processes sharing the database are never blocked for long.
+        """
+        if not self._queue:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in self._queue:
+                self._conn.execute(sql, params)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._queue.clear()
+    
+    @staticmethod
+    def _to_history_record(row) -> ActionRecord:
+        """Convert a history row (_HISTORY_COLUMNS) to an ActionRecord."""
+        return ActionRecord(
+            output=row[0],
+            kind=row[1],
+            signature=row[2],
+            output_hash=row[3],
+            wall_time=row[4],
+            exit_status=row[5],
+            timestamp=row[6],
+            peak_rss=row[7],
+            user_time=row[8],
+            system_time=row[9],
+            read_bytes=row[10],
+            write_bytes=row[11],
+            build_id=row[12],
+        )
+    
+    @staticmethod
+    def _to_record(row) -> ActionRecord:
+        """Convert an actions row to an ActionRecord."""
+        return ActionRecord(
+            output=row[0],
+            kind=row[1],
+            inputs=json.loads(row[2]),
+            signature=row[3],
+            output_hash=row[4],
+            source_mtime_ns=row[5],
+            source_size=row[6],
+            deps_digest=row[7],
+            wall_time=row[8],
+            exit_status=row[9],
+            timestamp=row[10],
+            peak_rss=row[11],
+            user_time=row[12],
+            system_time=row[13],
+            read_bytes=row[14],
+            write_bytes=row[15],
+        )
+    
+    def __enter__(self) -> "BuildDatabase":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
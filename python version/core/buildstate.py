@@ -0,0 +1,353 @@
+"""Recorded build state for incremental builds."""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import os
+import threading
+from .builddb import ActionRecord, BuildDatabase
+from .depindex import DependencyIndex
+from .output import display_path
+from .resources import ResourceUsage, UsageReport
+
+
+def command_signature(cmd: List[str]) -> str:
+    """
+    Hash a command line.
+    
+    Any change to the compiler, flags, include paths or output path
+    produces a different signature.
+    
+    Args:
+        cmd: Command as a list of arguments.
+    
+    Returns:
+        Hex digest identifying the command line.
+    """
+    return hashlib.sha256("\0".join(cmd).encode("utf-8")).hexdigest()
+
+
+def usage_fields(usage: Optional[ResourceUsage]) -> Dict[str, object]:
+    """
+    Get the ActionRecord fields for the resources an action used.
+    
+    Args:
+        usage: Usage of the action's processes (None or empty when it ran
+            none, e.g. a cache hit or a remote compile).
+    
+    Returns:
+        Keyword arguments for ActionRecord (empty when nothing was measured).
+    """
+    if usage is None or not usage.processes:
+        return {}
+    return {
+        "peak_rss": usage.peak_rss,
+        "user_time": usage.user_time,
+        "system_time": usage.system_time,
+        "read_bytes": usage.read_bytes,
+        "write_bytes": usage.write_bytes,
+    }
+
+
+def hash_file(path: Path) -> Optional[str]:
+    """
+    Hash a file's contents.
+    
+    Args:
+        path: File path.
+    
+    Returns:
+        Hex digest, or None if the file cannot be read.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+class BuildState:
+    """
+    Per-build-directory record of how each object file was produced.
+    
+    An object is up to date when it exists, its last compile succeeded,
+    its source still has the recorded nanosecond mtime and size, the
+    compile command hashes to the recorded signature, and none of the
+    headers it included (according to the dependency index) changed since
+    it was built.
+    
+    Records live in the build database (see BuildDatabase); the action
+    records are read once up front so the up-to-date check needs no
+    queries per file. Precompiled headers are tracked the same way, with
+    the generated header as their source.
+    
+    The resources each action of the current build used are collected in
+    usage for the end-of-build summary.
+    """
+    
+    def __init__(self, build_dir: Path, db: Optional[BuildDatabase] = None):
+        """
+        Initialize build state.
+        
+        Args:
+            build_dir: Build directory the state belongs to.
+            db: Build database (opened from build_dir if not given).
+        """
+        self.build_dir = Path(build_dir)
+        self.db = db if db is not None else BuildDatabase(self.build_dir)
+        self.records: Dict[str, ActionRecord] = {}
+        self.deps = DependencyIndex(self.build_dir)
+        self.usage = UsageReport()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def load(cls, build_dir: Path) -> "BuildState":
+        """
+        Load build state from a build directory.
+        
+        Args:
+            build_dir: Build directory to load from.
+        
+        Returns:
+            BuildState: Loaded (possibly empty) state.
+        """
+        state = cls(build_dir)
+        state.records = state.db.get_actions()
+        state.deps = DependencyIndex.load(build_dir)
+        return state
+    
+    def begin_build(self) -> None:
+        """Start recording a build."""
+        self.usage = UsageReport()
+        self.db.begin_build()
+    
+    def end_build(
+        self,
+        exit_status: int,
+        cache_hits: Optional[int] = None,
+        cache_misses: Optional[int] = None,
+    ) -> None:
+        """
+        Finish the build record and persist everything recorded.
+        
+        Args:
+            exit_status: Exit status of the build.
+            cache_hits: Compiles the object cache answered (None if it was off).
+            cache_misses: Compiles the object cache had to run.
+        """
+        self.deps.save()
+        self.db.end_build(exit_status, cache_hits, cache_misses)
+    
+    def save(self) -> None:
+        """Commit recorded actions and write the dependency index."""
+        self.db.commit()
+        self.deps.save()
+    
+    def close(self) -> None:
+        """Close the build database."""
+        self.db.close()
+    
+    @staticmethod
+    def stat_source(source_file: Path) -> Optional[os.stat_result]:
+        """Stat a source file, returning None if it does not exist."""
+        try:
+            return os.stat(source_file)
+        except OSError:
+            return None
+    
+    def is_up_to_date(self, source_file: Path, object_file: Path, signature: str) -> bool:
+        """
+        Check whether an object file can be reused.
+        
+        Args:
+            source_file: Path to source file.
+            object_file: Path to object file.
+            signature: Signature of the current compile command.
+        
+        Returns:
+            True if the object does not need to be rebuilt.
+        """
+        record = self.records.get(str(object_file))
+        if record is None or record.exit_status != 0 or record.signature != signature:
+            return False
+        if record.inputs[:1] != [str(source_file)]:
+            return False
+        
+        st = self.stat_source(source_file)
+        if st is None or st.st_mtime_ns != record.source_mtime_ns or st.st_size != record.source_size:
+            return False
+        
+        if record.deps_digest != self.deps.digest(object_file):
+            return False
+        
+        return object_file.exists()
+    
+    def output_hash(self, output_file: Path) -> Optional[str]:
+        """
+        Get the content hash of a built file.
+        
+        Uses the hash recorded when the file was built and only hashes the
+        file itself when no record exists.
+        
+        Args:
+            output_file: Path to the built file.
+        
+        Returns:
+            Hex digest, or None if the file cannot be read.
+        """
+        record = self.records.get(str(output_file))
+        if record is not None and record.output_hash:
+            return record.output_hash
+        return hash_file(output_file)
+    
+    def is_link_up_to_date(self, target_file: Path, signature: str) -> bool:
+        """
+        Check whether a linked target can be reused.
+        
+        Args:
+            target_file: Path to the linked target.
+            signature: Signature of the current link inputs.
+        
+        Returns:
+            True if the target does not need to be relinked.
+        """
+        record = self.records.get(str(target_file))
+        if record is None or record.kind != "link" or record.exit_status != 0 or record.signature != signature:
+            return False
+        st = self.stat_source(target_file)
+        return st is not None and st.st_mtime_ns == record.source_mtime_ns and st.st_size == record.source_size
+    
+    def record_link(
+        self,
+        target_file: Path,
+        object_files: List[Path],
+        signature: str,
+        success: bool,
+        wall_time: float = 0.0,
+        usage: Optional[ResourceUsage] = None,
+    ) -> None:
+        """
+        Record a link of the target.
+        
+        Args:
+            target_file: Path to the linked target.
+            object_files: Objects linked into the target.
+            signature: Signature of the link inputs.
+            success: Whether the link succeeded.
+            wall_time: Seconds the link took.
+            usage: Resources the linker used, if measured.
+        """
+        st = self.stat_source(target_file) if success else None
+        record = ActionRecord(
+            output=str(target_file),
+            kind="link",
+            inputs=[str(obj) for obj in object_files],
+            signature=signature,
+            source_mtime_ns=st.st_mtime_ns if st else None,
+            source_size=st.st_size if st else None,
+            wall_time=wall_time,
+            exit_status=0 if success and st else 1,
+            **usage_fields(usage),
+        )
+        with self._lock:
+            self.records[record.output] = record
+        self.db.record_action(record)
+        if usage is not None:
+            self.usage.add(f"link {target_file.name}", "link", wall_time, usage)
+    
+    def invalidate(self, object_file: Path) -> None:
+        """Forget the record for an object file (e.g. before rebuilding it)."""
+        with self._lock:
+            self.records.pop(str(object_file), None)
+        self.db.remove_action(str(object_file))
+    
+    def record(
+        self,
+        source_file: Path,
+        object_file: Path,
+        signature: str,
+        st: os.stat_result,
+        dependencies: List[str],
+        wall_time: float = 0.0,
+        kind: str = "compile",
+        usage: Optional[ResourceUsage] = None,
+    ) -> None:
+        """
+        Record a successfully built object file.
+        
+        Args:
+            source_file: Path to source file.
+            object_file: Path to object file.
+            signature: Signature of the compile command used.
+            st: Stat of the source taken before compiling, so edits made
+                while the compiler ran still trigger a rebuild next time.
+            dependencies: Headers the object was built from (from its depfile).
+            wall_time: Seconds the compile took.
+            kind: Action kind ("compile" or "pch").
+            usage: Resources the compiler used, if measured.
+        """
+        source = os.path.normpath(str(source_file))
+        headers = [d for d in dependencies if os.path.normpath(d) != source]
+        self.deps.set_dependencies(object_file, headers)
+        deps_digest = self.deps.digest(object_file)
+        
+        record = ActionRecord(
+            output=str(object_file),
+            kind=kind,
+            inputs=[str(source_file)] + headers,
+            signature=signature,
+            output_hash=hash_file(object_file),
+            source_mtime_ns=st.st_mtime_ns,
+            source_size=st.st_size,
+            deps_digest=deps_digest,
+            wall_time=wall_time,
+            exit_status=0,
+            **usage_fields(usage),
+        )
+        with self._lock:
+            self.records[record.output] = record
+        self.db.record_action(record)
+        self._add_usage(source_file, kind, wall_time, usage)
+    
+    def record_failure(
+        self,
+        source_file: Path,
+        object_file: Path,
+        signature: str,
+        wall_time: float = 0.0,
+        kind: str = "compile",
+        usage: Optional[ResourceUsage] = None,
+    ) -> None:
+        """
+        Record a failed compile so it shows up in the action history.
+        
+        Args:
+            source_file: Path to source file.
+            object_file: Path to object file.
+            signature: Signature of the compile command used.
+            wall_time: Seconds until the compiler gave up.
+            kind: Action kind ("compile" or "pch").
+            usage: Resources the compiler used, if measured.
+        """
+        record = ActionRecord(
+            output=str(object_file),
+            kind=kind,
+            inputs=[str(source_file)],
+            signature=signature,
+            wall_time=wall_time,
+            exit_status=1,
+            **usage_fields(usage),
+        )
+        with self._lock:
+            self.records[record.output] = record
+        self.db.record_action(record)
+        self._add_usage(source_file, kind, wall_time, usage)
+    
+    def _add_usage(self, source_file: Path, kind: str, wall_time: float, usage: Optional[ResourceUsage]) -> None:
+        """Add a compile (named after its source) to the usage summary."""
+        if usage is not None:
+            name = display_path(source_file) if kind == "compile" else f"{kind} {display_path(source_file)}"
+            self.usage.add(name, kind, wall_time, usage)
@@ -1,8 +1,9 @@
 """Configuration loader and validator for SugarBuilder."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, replace
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
+import os
 import sys
 
 # tomllib available in Python 3.11+, use tomli as fallback
@@ -18,6 +19,29 @@ else:
         )
 
 
+# Target names double as directory names under build_path
+_TARGET_NAME_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-.+")
+
+
+@dataclass
+class TargetConfig:
+    """
+    One [[target]] table of sugar.toml.
+    
+    Targets share the project-wide settings (compiler, platform, paths,
+    cache, pch, unity, modules) and build into <build_path>/<name>.
+    """
+    
+    name: str
+    type: str  # exe, static, shared
+    source_paths: List[str]
+    include_paths: List[str] = field(default_factory=list)
+    link_dependencies: List[str] = field(default_factory=list)  # System libraries
+    depends_on: List[str] = field(default_factory=list)  # Static/shared library targets linked in
+    source_include: List[str] = field(default_factory=list)
+    source_exclude: List[str] = field(default_factory=list)
+
+
 @dataclass
 class Config:
     """
@@ -35,6 +59,20 @@ class Config:
     output_path: str
     include_paths: List[str]  # Additional include directories
     link_dependencies: List[str]
+    object_cache: bool = False  # Reuse objects from the local object cache
+    cache_path: str = ""  # Object cache directory (defaults to the user cache dir)
+    cache_max_size: str = "5G"  # Object cache size limit, least recently used entries go first ("off": none)
+    pch: Union[str, List[str]] = ""  # "auto" or headers to precompile ("" disables)
+    unity: bool = False  # Compile translation units in unity batches
+    unity_batch_size: int = 8  # Maximum translation units per unity batch
+    unity_exclude: List[str] = field(default_factory=list)  # Globs of unity-unsafe sources
+    modules: bool = False  # Scan sources for C++20 modules and compile them in import order
+    source_include: List[str] = field(default_factory=list)  # Globs a source must match (default: all)
+    source_exclude: List[str] = field(default_factory=list)  # Globs of skipped sources and directories
+    workers: List[str] = field(default_factory=list)  # Remote compile workers ("host:port", "unix:path")
+    memory_budget: str = "auto"  # Memory running jobs may use: "auto", "off" or a size ("8G")
+    targets: List[TargetConfig] = field(default_factory=list)  # [[target]] tables (empty: single target)
+    build_root: str = ""  # build_path shared by all targets (set on per-target views)
     
     @classmethod
     def load(cls, config_path: str | Path) -> "Config":
@@ -85,12 +123,18 @@ class Config:
             "output_path",
         ]
         
+        # With [[target]] tables, the type and sources are given per target
+        targets = cls._targets_from_list(data.get("target", []))
+        if targets:
+            required_fields = [f for f in required_fields if f not in ("project_type", "source_paths")]
+            data = {"project_type": "", "source_paths": [], **data}
+        
         missing = [f for f in required_fields if f not in data]
         if missing:
             raise ValueError(f"Missing required configuration fields: {', '.join(missing)}")
         
         # Validate project_type
-        if data["project_type"] not in ["exe", "static", "shared"]:
+        if not targets and data["project_type"] not in ["exe", "static", "shared"]:
             raise ValueError(
                 f"Invalid project_type: {data['project_type']}. "
                 "Must be 'exe', 'static', or 'shared'."
@@ -124,6 +168,65 @@ class Config:
         if not isinstance(link_deps, list):
             raise ValueError("link_dependencies must be a list.")
         
+        # object_cache / cache_path are optional
+        object_cache = data.get("object_cache", False)
+        if not isinstance(object_cache, bool):
+            raise ValueError("object_cache must be true or false.")
+        
+        cache_path = data.get("cache_path", "")
+        if not isinstance(cache_path, str):
+            raise ValueError("cache_path must be a string.")
+        
+        cache_max_size = data.get("cache_max_size", "5G")
+        if not isinstance(cache_max_size, str):
+            raise ValueError("cache_max_size must be a string such as \"5G\" or \"off\".")
+        cls.parse_cache_max_size(cache_max_size)
+        
+        # pch is optional: "auto" or a list of headers
+        pch = data.get("pch", "")
+        if isinstance(pch, list):
+            if not all(isinstance(h, str) and h.strip() for h in pch):
+                raise ValueError("pch must be a list of non-empty header names.")
+        elif pch not in ("", "auto"):
+            raise ValueError("pch must be 'auto' or a list of headers.")
+        
+        # unity / unity_batch_size / unity_exclude are optional
+        unity = data.get("unity", False)
+        if not isinstance(unity, bool):
+            raise ValueError("unity must be true or false.")
+        
+        unity_batch_size = data.get("unity_batch_size", 8)
+        if not isinstance(unity_batch_size, int) or isinstance(unity_batch_size, bool) or unity_batch_size < 2:
+            raise ValueError("unity_batch_size must be an integer of at least 2.")
+        
+        unity_exclude = data.get("unity_exclude", [])
+        if not isinstance(unity_exclude, list) or not all(isinstance(p, str) for p in unity_exclude):
+            raise ValueError("unity_exclude must be a list of glob patterns.")
+        
+        # modules is optional
+        modules = data.get("modules", False)
+        if not isinstance(modules, bool):
+            raise ValueError("modules must be true or false.")
+        
+        # source_include / source_exclude are optional
+        for name in ("source_include", "source_exclude"):
+            patterns = data.get(name, [])
+            if not isinstance(patterns, list) or not all(isinstance(p, str) and p.strip() for p in patterns):
+                raise ValueError(f"{name} must be a list of glob patterns.")
+        
+        # workers is optional; SUGAR_WORKERS (comma-separated) overrides it
+        workers = data.get("workers", [])
+        if not isinstance(workers, list) or not all(isinstance(w, str) and w.strip() for w in workers):
+            raise ValueError("workers must be a list of worker addresses.")
+        if "SUGAR_WORKERS" in os.environ:
+            workers = [w.strip() for w in os.environ["SUGAR_WORKERS"].split(",") if w.strip()]
+        
+        # memory_budget is optional: "auto" (available memory), "off" or a size
+        memory_budget = data.get("memory_budget", "auto")
+        if not isinstance(memory_budget, str):
+            raise ValueError("memory_budget must be a string such as \"auto\", \"off\" or \"8G\".")
+        cls.parse_memory_budget(memory_budget)
+        
         return cls(
             project_name=data["project_name"],
             project_type=data["project_type"],
@@ -134,8 +237,194 @@ class Config:
             output_path=data["output_path"],
             include_paths=inc_paths,
             link_dependencies=link_deps,
+            object_cache=object_cache,
+            cache_path=cache_path,
+            cache_max_size=cache_max_size,
+            pch=pch,
+            unity=unity,
+            unity_batch_size=unity_batch_size,
+            unity_exclude=unity_exclude,
+            modules=modules,
+            source_include=data.get("source_include", []),
+            source_exclude=data.get("source_exclude", []),
+            workers=workers,
+            memory_budget=memory_budget,
+            targets=targets,
+        )
+    
+    @staticmethod
+    def parse_memory_budget(value: str) -> Union[int, str, None]:
+        """
+        Interpret a memory_budget setting.
+        
+        Args:
+            value: "auto", "off" (or "0") or a size such as "512M" or "8G".
+        
+        Returns:
+            "auto", None for no budget, or the budget in bytes.
+        
+        Raises:
+            ValueError: If the value is none of these.
+        """
+        from .resources import parse_size
+        
+        value = value.strip().lower()
+        if value == "auto":
+            return "auto"
+        if value in ("off", "0", ""):
+            return None
+        try:
+            return parse_size(value)
+        except ValueError as e:
+            raise ValueError(f"memory_budget: {e}")
+    
+    @staticmethod
+    def parse_cache_max_size(value: str) -> Optional[int]:
+        """
+        Interpret a cache_max_size setting.
+        
+        Args:
+            value: "off" (or "0") or a size such as "500M" or "5G".
+        
+        Returns:
+            None for no limit, or the limit in bytes.
+        
+        Raises:
+            ValueError: If the value is neither.
+        """
+        from .resources import parse_size
+        
+        value = value.strip().lower()
+        if value in ("off", "0", ""):
+            return None
+        try:
+            return parse_size(value)
+        except ValueError as e:
+            raise ValueError(f"cache_max_size: {e}")
+    
+    @staticmethod
+    def _targets_from_list(tables: Any) -> List[TargetConfig]:
+        """
+        Create TargetConfig instances from the [[target]] tables.
+        
+        Args:
+            tables: Value of the "target" key.
+        
+        Returns:
+            Targets in file order.
+        
+        Raises:
+            ValueError: If a table is missing fields or has invalid values.
+        """
+        if not isinstance(tables, list) or not all(isinstance(t, dict) for t in tables):
+            raise ValueError("target must be an array of tables ([[target]]).")
+        
+        targets = []
+        for index, table in enumerate(tables):
+            name = table.get("name")
+            if not isinstance(name, str) or not name.strip():
+                raise ValueError(f"target #{index + 1} needs a name.")
+            if not set(name) <= _TARGET_NAME_CHARS or name in (".", ".."):
+                raise ValueError(f"Invalid target name '{name}': use letters, digits, '_', '-', '.' and '+'.")
+            
+            missing = [f for f in ("type", "source_paths") if f not in table]
+            if missing:
+                raise ValueError(f"target '{name}' is missing: {', '.join(missing)}")
+            if table["type"] not in ["exe", "static", "shared"]:
+                raise ValueError(
+                    f"Invalid type for target '{name}': {table['type']}. "
+                    "Must be 'exe', 'static', or 'shared'."
+                )
+            
+            for key in ("source_paths", "include_paths", "link_dependencies", "depends_on",
+                        "source_include", "source_exclude"):
+                value = table.get(key, [])
+                if not isinstance(value, list) or not all(isinstance(v, str) and v.strip() for v in value):
+                    raise ValueError(f"{key} of target '{name}' must be a list of strings.")
+            
+            unknown = set(table) - {f.name for f in fields(TargetConfig)}
+            if unknown:
+                raise ValueError(f"Unknown setting(s) in target '{name}': {', '.join(sorted(unknown))}")
+            targets.append(TargetConfig(**table))
+        return targets
+    
+    def get_targets(self) -> List[TargetConfig]:
+        """
+        Get the targets to build.
+        
+        A file without [[target]] tables describes a single target with the
+        top-level project_name, project_type and source settings.
+        
+        Returns:
+            Targets in file order.
+        """
+        if self.targets:
+            return self.targets
+        return [TargetConfig(
+            name=self.project_name,
+            type=self.project_type,
+            source_paths=self.source_paths,
+            include_paths=self.include_paths,
+            link_dependencies=self.link_dependencies,
+            source_include=self.source_include,
+            source_exclude=self.source_exclude,
+        )]
+    
+    def for_target(self, target: TargetConfig) -> "Config":
+        """
+        Get the single-target configuration of one [[target]].
+        
+        Args:
+            target: One of self.targets.
+        
+        Returns:
+            Copy of this configuration describing only that target, built
+            into <build_path>/<name>.
+        """
+        return replace(
+            self,
+            project_name=target.name,
+            project_type=target.type,
+            source_paths=target.source_paths,
+            build_path=str(Path(self.build_path) / target.name),
+            include_paths=target.include_paths,
+            link_dependencies=target.link_dependencies,
+            source_include=target.source_include,
+            source_exclude=target.source_exclude,
+            targets=[],
+            build_root=self.build_path,
         )
     
+    def get_target_order(self) -> List[TargetConfig]:
+        """
+        Get the targets with every target after the targets it depends on.
+        
+        Returns:
+            Targets in dependency order (file order where unconstrained).
+        
+        Raises:
+            ValueError: If depends_on forms a cycle.
+        """
+        by_name = {target.name: target for target in self.get_targets()}
+        order: List[TargetConfig] = []
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+        
+        def visit(target: TargetConfig, chain: List[str]) -> None:
+            if state.get(target.name) == 2:
+                return
+            if state.get(target.name) == 1:
+                cycle = chain[chain.index(target.name):] + [target.name]
+                raise ValueError(f"Target dependency cycle: {' -> '.join(cycle)}")
+            state[target.name] = 1
+            for name in target.depends_on:
+                visit(by_name[name], chain + [target.name])
+            state[target.name] = 2
+            order.append(target)
+        
+        for target in by_name.values():
+            visit(target, [])
+        return order
+    
     def validate(self) -> None:
         """
         Validate the configuration.
@@ -146,9 +435,38 @@ class Config:
         if not self.project_name.strip():
             raise ValueError("project_name cannot be empty.")
         
+        if self.targets:
+            self._validate_targets()
+            return
+        
         if not self.source_paths:
             raise ValueError("source_paths cannot be empty.")
         
         # Check that source paths are not empty strings
         if any(not path.strip() for path in self.source_paths):
             raise ValueError("source_paths cannot contain empty strings.")
+    
+    def _validate_targets(self) -> None:
+        """
+        Validate the [[target]] tables and their dependencies.
+        
+        Raises:
+            ValueError: If targets are invalid.
+        """
+        by_name: Dict[str, TargetConfig] = {}
+        for target in self.targets:
+            if target.name in by_name:
+                raise ValueError(f"Duplicate target name: {target.name}")
+            if not target.source_paths:
+                raise ValueError(f"source_paths of target '{target.name}' cannot be empty.")
+            by_name[target.name] = target
+        
+        for target in self.targets:
+            for name in target.depends_on:
+                dependency = by_name.get(name)
+                if dependency is None:
+                    raise ValueError(f"Target '{target.name}' depends on unknown target '{name}'.")
+                if dependency.type == "exe":
+                    raise ValueError(f"Target '{target.name}' cannot depend on executable '{name}'.")
+        
+        self.get_target_order()
@@ -0,0 +1,119 @@
+"""Makefile-style dependency file (depfile) reading and writing."""
+
+from pathlib import Path
+from typing import List
+
+# Suffix of the module pseudo-targets in depfiles GCC writes with -fmodules-ts
+_MODULE_SUFFIX = ".c++m"
+
+
+def _split_words(line: str) -> List[str]:
+    """
+    Split a depfile line into words, honouring Make escapes.
+    
+    "\\ " is an escaped space, "\\#" an escaped hash and "$$" a literal
+    dollar sign. Any other backslash is kept as-is so Windows paths
+    survive.
+    """
+    words = []
+    current = []
+    i = 0
+    while i < len(line):
+        ch = line[i]
+        nxt = line[i + 1] if i + 1 < len(line) else ""
+        if ch == "\\" and nxt in (" ", "#"):
+            current.append(nxt)
+            i += 2
+            continue
+        if ch == "$" and nxt == "$":
+            current.append("$")
+            i += 2
+            continue
+        if ch in " \t":
+            if current:
+                words.append("".join(current))
+                current = []
+        else:
+            current.append(ch)
+        i += 1
+    if current:
+        words.append("".join(current))
+    return words
+
+
+def parse_depfile_text(text: str) -> List[str]:
+    """
+    Extract the prerequisites listed in depfile text.
+    
+    Args:
+        text: Contents of a depfile as written by -MMD/-MF.
+    
+    Returns:
+        Prerequisite paths in order of first appearance, without duplicates.
+    """
+    # Join continuation lines
+    text = text.replace("\\\r\n", " ").replace("\\\n", " ")
+    
+    deps: List[str] = []
+    seen = set()
+    for line in text.splitlines():
+        words = _split_words(line)
+        # Everything up to the word ending in ':' is a target
+        for i, word in enumerate(words):
+            if word.endswith(":"):
+                targets = words[:i] + [word[:-1]]
+                prerequisites = words[i + 1:]
+                break
+        else:
+            continue
+        
+        # GCC's module rules name modules (m.c++m), not files
+        if all(target.endswith(_MODULE_SUFFIX) or target == ".PHONY" for target in targets):
+            continue
+        
+        for dep in prerequisites:
+            if dep.endswith(_MODULE_SUFFIX):
+                continue
+            if dep not in seen:
+                seen.add(dep)
+                deps.append(dep)
+    return deps
+
+
+def parse_depfile(depfile: Path) -> List[str]:
+    """
+    Read a depfile and return its prerequisites.
+    
+    Args:
+        depfile: Path to the depfile.
+    
+    Returns:
+        Prerequisite paths, or an empty list if the file does not exist.
+    """
+    try:
+        with open(depfile, "r", encoding="utf-8", errors="surrogateescape") as f:
+            return parse_depfile_text(f.read())
+    except OSError:
+        return []
+
+
+def _escape(path: str) -> str:
+    """Escape a path for use in a depfile."""
+    return path.replace("$", "$$").replace("#", "\\#").replace(" ", "\\ ")
+
+
+def write_depfile(depfile: Path, target: Path, dependencies: List[str]) -> None:
+    """
+    Write a depfile in the same format GCC and Clang produce.
+    
+    Used for toolchains (MSVC) that report includes some other way.
+    
+    Args:
+        depfile: Path of the depfile to write.
+        target: Target (object file) the dependencies belong to.
+        dependencies: Prerequisite paths.
+    """
+    lines = [f"{_escape(str(target))}:"]
+    lines.extend(f" {_escape(dep)}" for dep in dependencies)
+    with open(depfile, "w", encoding="utf-8", errors="surrogateescape") as f:
+        f.write(" \\\n".join(lines) + "\n")
@@ -0,0 +1,215 @@
+"""Persistent header dependency index."""
+
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import os
+import struct
+import threading
+
+# Stamp recorded for a dependency that no longer exists
+_MISSING = (-1, -1)
+
+
+class DependencyIndex:
+    """
+    Compact map from object files to the headers they were built from.
+    
+    Every path is interned once into a string table and edges are stored as
+    arrays of unsigned integer ids, so a tree with 100k headers costs one
+    string per header rather than one Path object per edge.
+    
+    On disk the index is a single binary file:
+        
+        magic, version, path count, path table (NUL separated UTF-8),
+        entry count, then per entry: object id, edge count, edge ids
+    """
+    
+    FILENAME = ".sugar_deps.bin"
+    MAGIC = b"SGDP"
+    VERSION = 1
+    
+    def __init__(self, build_dir: Path):
+        """
+        Initialize an empty dependency index.
+        
+        Args:
+            build_dir: Build directory the index belongs to.
+        """
+        self.build_dir = Path(build_dir)
+        self.paths: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._edges: Dict[int, array] = {}
+        self._stamps: Dict[int, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def path(self) -> Path:
+        """Path of the index file."""
+        return self.build_dir / self.FILENAME
+    
+    def intern(self, path: str) -> int:
+        """
+        Get the id of a path, adding it to the string table if needed.
+        
+        Args:
+            path: File path.
+        
+        Returns:
+            Integer id of the path.
+        """
+        path = os.path.normpath(path)
+        path_id = self._ids.get(path)
+        if path_id is None:
+            path_id = len(self.paths)
+            self.paths.append(path)
+            self._ids[path] = path_id
+        return path_id
+    
+    def set_dependencies(self, object_file: Path, dependencies: Iterable[str]) -> None:
+        """
+        Replace the recorded dependencies of an object file.
+        
+        Args:
+            object_file: Object file path.
+            dependencies: Header paths the object was built from.
+        """
+        with self._lock:
+            object_id = self.intern(str(object_file))
+            self._edges[object_id] = array("I", sorted({self.intern(dep) for dep in dependencies}))
+    
+    def get_dependencies(self, object_file: Path) -> List[str]:
+        """
+        Get the recorded dependencies of an object file.
+        
+        Args:
+            object_file: Object file path.
+        
+        Returns:
+            Header paths, or an empty list if nothing is recorded.
+        """
+        object_id = self._ids.get(os.path.normpath(str(object_file)))
+        if object_id is None:
+            return []
+        return [self.paths[i] for i in self._edges.get(object_id, ())]
+    
+    def items(self) -> Iterable[Tuple[str, List[str]]]:
+        """Iterate over (object file, dependency paths) pairs."""
+        for object_id, edges in self._edges.items():
+            yield self.paths[object_id], [self.paths[i] for i in edges]
+    
+    def entries(self) -> Iterable[Tuple[int, array]]:
+        """Iterate over (object id, dependency ids) pairs; ids index paths."""
+        return self._edges.items()
+    
+    def invalidate_stamps(self, paths: Iterable[Path]) -> None:
+        """
+        Forget cached stamps of specific files (e.g. reported by a file watcher).
+        
+        Args:
+            paths: Files that changed.
+        """
+        with self._lock:
+            for path in paths:
+                path_id = self._ids.get(os.path.normpath(str(path)))
+                if path_id is not None:
+                    self._stamps.pop(path_id, None)
+    
+    def _stamp(self, path_id: int) -> Tuple[int, int]:
+        """Get the (mtime_ns, size) stamp of a path, stat-ing it at most once."""
+        stamp = self._stamps.get(path_id)
+        if stamp is None:
+            try:
+                st = os.stat(self.paths[path_id])
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = _MISSING
+            self._stamps[path_id] = stamp
+        return stamp
+    
+    def digest(self, object_file: Path) -> Optional[str]:
+        """
+        Summarize the current state of an object's dependencies.
+        
+        Each header is stat-ed once no matter how many objects include it;
+        watch mode drops the stamps of changed files between rebuilds (see
+        invalidate_stamps()).
+        
+        Args:
+            object_file: Object file path.
+        
+        Returns:
+            Hex digest of every dependency's mtime and size, or None if the
+            object has no recorded dependencies.
+        """
+        object_id = self._ids.get(os.path.normpath(str(object_file)))
+        if object_id is None or object_id not in self._edges:
+            return None
+        
+        stamps = array("q")
+        for path_id in self._edges[object_id]:
+            stamps.extend(self._stamp(path_id))
+        return hashlib.blake2b(stamps.tobytes(), digest_size=16).hexdigest()
+    
+    @classmethod
+    def load(cls, build_dir: Path) -> "DependencyIndex":
+        """
+        Load the dependency index from a build directory.
+        
+        Args:
+            build_dir: Build directory to load from.
+        
+        Returns:
+            DependencyIndex: Loaded index (empty if missing or unreadable).
+        """
+        index = cls(build_dir)
+        try:
+            with open(index.path, "rb") as f:
+                data = f.read()
+            index._decode(data)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            index = cls(build_dir)
+        return index
+    
+    def _decode(self, data: bytes) -> None:
+        """Populate the index from its binary representation."""
+        magic, version, path_count, table_size = struct.unpack_from("<4sIII", data, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("Unsupported dependency index format")
+        offset = struct.calcsize("<4sIII")
+        
+        table = data[offset:offset + table_size].decode("utf-8", errors="surrogateescape")
+        offset += table_size
+        self.paths = table.split("\0") if path_count else []
+        if len(self.paths) != path_count:
+            raise ValueError("Corrupt dependency index path table")
+        self._ids = {path: i for i, path in enumerate(self.paths)}
+        
+        (entry_count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        for _ in range(entry_count):
+            object_id, edge_count = struct.unpack_from("<II", data, offset)
+            offset += 8
+            edges = array("I")
+            edges.frombytes(data[offset:offset + edge_count * edges.itemsize])
+            offset += edge_count * edges.itemsize
+            self._edges[object_id] = edges
+    
+    def save(self) -> None:
+        """Write the dependency index atomically."""
+        with self._lock:
+            table = "\0".join(self.paths).encode("utf-8", errors="surrogateescape")
+            chunks = [
+                struct.pack("<4sIII", self.MAGIC, self.VERSION, len(self.paths), len(table)),
+                table,
+                struct.pack("<I", len(self._edges)),
+            ]
+            for object_id, edges in self._edges.items():
+                chunks.append(struct.pack("<II", object_id, len(edges)))
+                chunks.append(edges.tobytes())
+        
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(chunks))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,504 @@
+"""Include graph analysis: header fan-in, parse cost and PCH candidates."""
+
+from array import array
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import os
+from .depindex import DependencyIndex
+from .modules import MODULE_INTERFACE_EXTENSIONS
+from .pch import _INCLUDE_PATTERN
+from .resources import format_size
+
+
+# Files with these extensions are compiled, never analyzed as headers
+TRANSLATION_UNIT_EXTENSIONS = {".cpp", ".cc", ".cxx", ".c"} | MODULE_INTERFACE_EXTENSIONS
+
+
+class IncludeGraph:
+    """
+    Directed graph in compressed sparse row (CSR) form.
+    
+    Nodes are integers 0..node_count-1; the successors of node n are
+    targets[offsets[n]:offsets[n + 1]]. Two flat arrays hold every edge,
+    so a graph with 100k edges takes well under a megabyte and traversals
+    allocate nothing per edge.
+    """
+    
+    def __init__(self, node_count: int, offsets: array, targets: array):
+        """
+        Initialize graph from its CSR arrays.
+        
+        Args:
+            node_count: Number of nodes.
+            offsets: node_count + 1 edge offsets.
+            targets: Edge targets, grouped by source node.
+        """
+        self.node_count = node_count
+        self.offsets = offsets
+        self.targets = targets
+    
+    @classmethod
+    def from_edges(cls, node_count: int, sources: Sequence[int], targets: Sequence[int]) -> "IncludeGraph":
+        """
+        Build a graph from parallel sequences of edge endpoints.
+        
+        Args:
+            node_count: Number of nodes.
+            sources: Source node of every edge.
+            targets: Target node of every edge.
+        
+        Returns:
+            IncludeGraph.
+        """
+        # Counting sort of the edges by source node
+        offsets = array("Q", bytes(8 * (node_count + 1)))
+        for source in sources:
+            offsets[source + 1] += 1
+        for node in range(node_count):
+            offsets[node + 1] += offsets[node]
+        fill = offsets[:-1]
+        ordered = array("I", bytes(4 * len(targets)))
+        for source, target in zip(sources, targets):
+            ordered[fill[source]] = target
+            fill[source] += 1
+        return cls(node_count, offsets, ordered)
+    
+    @property
+    def edge_count(self) -> int:
+        """Number of edges."""
+        return len(self.targets)
+    
+    def successors(self, node: int) -> array:
+        """Get the successors of a node."""
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+    
+    def in_degrees(self) -> array:
+        """Get the number of edges into every node."""
+        degrees = array("I", bytes(4 * self.node_count))
+        for target in self.targets:
+            degrees[target] += 1
+        return degrees
+    
+    def components(self) -> Tuple[array, int]:
+        """
+        Find the strongly connected components (include cycles).
+        
+        Uses an iterative Tarjan's algorithm, so deep include chains
+        cannot overflow the Python stack.
+        
+        Returns:
+            Tuple of (component id of every node, component count).
+            Components are numbered in reverse topological order: every
+            edge leads to a component with the same or a lower id.
+        """
+        offsets, targets = self.offsets, self.targets
+        unvisited = -1
+        index = array("q", [unvisited]) * self.node_count
+        low = array("q", [0]) * self.node_count
+        component = array("q", [unvisited]) * self.node_count
+        on_stack = bytearray(self.node_count)
+        stack: List[int] = []
+        counter = count = 0
+        
+        for root in range(self.node_count):
+            if index[root] != unvisited:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+            while work:
+                node, edge = work[-1]
+                if edge < offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    successor = targets[edge]
+                    if index[successor] == unvisited:
+                        index[successor] = low[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack[successor] = 1
+                        work.append((successor, offsets[successor]))
+                    elif on_stack[successor] and index[successor] < low[node]:
+                        low[node] = index[successor]
+                    continue
+                
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component[member] = count
+                        if member == node:
+                            break
+                    count += 1
+        return component, count
+    
+    def closures(self) -> List[int]:
+        """
+        Get the nodes reachable from every node, itself included.
+        
+        Each set is a bitmask (bit n set = node n reachable). Sets are
+        built once per component in reverse topological order as the union
+        of the successors' sets, and Python integers take that union at C
+        speed, so the cost is about edges x nodes / 64 word operations.
+        
+        Returns:
+            Bitmask per node.
+        """
+        component, count = self.components()
+        members: List[List[int]] = [[] for _ in range(count)]
+        for node in range(self.node_count):
+            members[component[node]].append(node)
+        
+        reach = [0] * count
+        offsets, targets = self.offsets, self.targets
+        for current in range(count):
+            mask = 0
+            for node in members[current]:
+                mask |= 1 << node
+                for edge in range(offsets[node], offsets[node + 1]):
+                    successor = component[targets[edge]]
+                    if successor != current:
+                        mask |= reach[successor]
+            reach[current] = mask
+        return [reach[component[node]] for node in range(self.node_count)]
+
+
+def weighted_count(mask: int, weight_bits: Sequence[int]) -> int:
+    """
+    Sum the weights of the nodes in a bitmask.
+    
+    Args:
+        mask: Node set.
+        weight_bits: weight_bits[k] is the set of nodes whose weight has
+            bit k set (see weight_masks()).
+    
+    Returns:
+        Total weight.
+    """
+    return sum((mask & bits).bit_count() << k for k, bits in enumerate(weight_bits))
+
+
+def weight_masks(weights: Sequence[int]) -> List[int]:
+    """Split node weights into one node set per weight bit (for weighted_count())."""
+    masks = [0] * max((weight.bit_length() for weight in weights), default=0)
+    for node, weight in enumerate(weights):
+        k = 0
+        while weight:
+            if weight & 1:
+                masks[k] |= 1 << node
+            weight >>= 1
+            k += 1
+    return masks
+
+
+@dataclass
+class HeaderCost:
+    """What one header costs the build."""
+    
+    path: str
+    size: int  # Bytes of the header itself
+    inclusive_size: int  # Bytes of the header and every project header it includes
+    includes: int  # Project headers it includes, directly or not
+    fan_in: int  # Translation units that include it, directly or not
+    includers: int  # Files that include it directly
+    cost: float  # Parse cost over all units (seconds, or bytes without compile times)
+    measured: bool = False  # Cost comes from -ftime-trace rather than an estimate
+    
+    @property
+    def pch_saving(self) -> float:
+        """Cost saved by precompiling the header (it is then parsed once)."""
+        return self.cost * (self.fan_in - 1) / self.fan_in if self.fan_in else 0.0
+
+
+class IncludeAnalysis:
+    """
+    Header costs computed from the depfiles of a build.
+    
+    The depfiles (see DependencyIndex) give every translation unit's
+    complete set of project headers, which is exact fan-in. Which header
+    includes which is recovered by scanning the #include directives of
+    those headers and matching them against the same set, giving the
+    include graph (an IncludeGraph over headers). A header's parse cost is
+    its inclusive size (its own bytes plus everything it pulls in) times
+    its fan-in, converted to seconds with the parse rate measured from the
+    recorded compile times; headers with -ftime-trace data use that
+    instead.
+    
+    Costs are upper bounds: include guards mean a header nested in
+    several others is parsed once per unit, not once per includer.
+    """
+    
+    def __init__(self):
+        """Initialize an empty analysis (see analyze())."""
+        self.headers: List[HeaderCost] = []
+        self.units = 0
+        self.depfile_edges = 0
+        self.include_edges = 0
+        self.seconds_per_byte: Optional[float] = None
+        self._closures: Dict[str, int] = {}
+        self._ids: Dict[str, int] = {}
+    
+    @classmethod
+    def analyze(
+        cls,
+        index: DependencyIndex,
+        sources: Optional[Dict[str, str]] = None,
+        compile_times: Optional[Dict[str, float]] = None,
+        measured: Optional[Dict[str, float]] = None,
+        ignore: Iterable[Path] = (),
+        compile_inputs: Iterable[str] = (),
+    ) -> "IncludeAnalysis":
+        """
+        Analyze the headers of a build.
+        
+        Args:
+            index: Dependency index of the build directory.
+            sources: Source file of each object file (for direct includes
+                and unit sizes).
+            compile_times: Seconds each object file took to compile.
+            measured: Measured parse seconds of headers over all units
+                (from -ftime-trace), keyed by path.
+            ignore: Directories whose files are not analyzed (generated
+                headers and PCHs in the build directory).
+            compile_inputs: Further files that are compiled rather than
+                included, such as unity batch members (which the depfiles
+                of the batches list). Sources and files with a translation
+                unit extension are never headers either.
+        
+        Returns:
+            IncludeAnalysis.
+        """
+        analysis = cls()
+        sources = sources or {}
+        compile_times = compile_times or {}
+        measured = {os.path.normpath(path): seconds for path, seconds in (measured or {}).items()}
+        ignored = tuple(os.path.join(os.path.abspath(directory), "") for directory in ignore)
+        inputs = {os.path.abspath(path) for path in [*sources.values(), *compile_inputs]}
+        
+        def is_header(path: str) -> bool:
+            absolute = os.path.abspath(path)
+            if absolute.startswith(ignored) or absolute in inputs:
+                return False
+            return os.path.splitext(path)[1] not in TRANSLATION_UNIT_EXTENSIONS
+        
+        # Fan-in straight from the depfiles
+        paths = index.paths
+        fan_in: Counter = Counter()
+        entries = list(index.entries())
+        for _, dependencies in entries:
+            fan_in.update(dependencies)
+            analysis.depfile_edges += len(dependencies)
+        analysis.units = len(entries)
+        
+        header_ids = [path_id for path_id in sorted(fan_in) if is_header(paths[path_id])]
+        local = {path_id: i for i, path_id in enumerate(header_ids)}
+        header_paths = [paths[path_id] for path_id in header_ids]
+        sizes = [_file_size(path) for path in header_paths]
+        analysis._ids = {path: i for i, path in enumerate(header_paths)}
+        
+        by_name: Dict[str, List[int]] = {}
+        for i, path in enumerate(header_paths):
+            by_name.setdefault(os.path.basename(path), []).append(i)
+        
+        def resolve(name: str, including_dir: str, quoted: bool) -> Optional[int]:
+            if quoted:
+                found = analysis._ids.get(os.path.normpath(os.path.join(including_dir, name)))
+                if found is not None:
+                    return found
+            name = os.path.normpath(name)
+            for candidate in by_name.get(os.path.basename(name), ()):
+                path = header_paths[candidate]
+                if path == name or path.endswith(os.sep + name):
+                    return candidate
+            return None
+        
+        def scan(path: str) -> List[int]:
+            try:
+                with open(path, "rb") as f:
+                    text = f.read()
+            except OSError:
+                return []
+            found = set()
+            including_dir = os.path.dirname(path)
+            for match in _INCLUDE_PATTERN.finditer(text):
+                target = resolve(os.fsdecode(match.group(2).strip()), including_dir, match.group(1) == b'"')
+                if target is not None:
+                    found.add(target)
+            return sorted(found)
+        
+        # Header -> header edges
+        edge_sources = array("I")
+        edge_targets = array("I")
+        for i, path in enumerate(header_paths):
+            for target in scan(path):
+                if target != i:
+                    edge_sources.append(i)
+                    edge_targets.append(target)
+        graph = IncludeGraph.from_edges(len(header_paths), edge_sources, edge_targets)
+        analysis.include_edges = graph.edge_count
+        includers = graph.in_degrees()
+        
+        # Unit -> header edges, and the bytes each timed unit parses
+        timed_seconds = 0.0
+        timed_bytes = 0
+        for object_id, dependencies in entries:
+            object_path = paths[object_id]
+            source = sources.get(object_path)
+            if source is not None:
+                for target in scan(source):
+                    includers[target] += 1
+            seconds = compile_times.get(object_path)
+            if seconds and source is not None:
+                timed_seconds += seconds
+                timed_bytes += _file_size(source) + sum(sizes[local[d]] for d in dependencies if d in local)
+        if timed_bytes:
+            analysis.seconds_per_byte = timed_seconds / timed_bytes
+        
+        closures = graph.closures()
+        size_bits = weight_masks(sizes)
+        for i, path in enumerate(header_paths):
+            inclusive_size = weighted_count(closures[i], size_bits)
+            count = fan_in[header_ids[i]]
+            cost: float = inclusive_size * count
+            if analysis.seconds_per_byte is not None:
+                cost *= analysis.seconds_per_byte
+            header = HeaderCost(
+                path=path,
+                size=sizes[i],
+                inclusive_size=inclusive_size,
+                includes=closures[i].bit_count() - 1,
+                fan_in=count,
+                includers=includers[i],
+                cost=cost,
+            )
+            if path in measured:
+                header.cost = measured[path]
+                header.measured = True
+            analysis.headers.append(header)
+            analysis._closures[path] = closures[i]
+        
+        analysis.headers.sort(key=lambda h: (-h.cost, h.path))
+        return analysis
+    
+    @property
+    def unit(self) -> str:
+        """Unit of the costs ("s", or "bytes" when no compile time is known)."""
+        if self.seconds_per_byte is not None or any(h.measured for h in self.headers):
+            return "s"
+        return "bytes"
+    
+    def pch_candidates(self, max_headers: int = 8, min_share: float = 0.5) -> List[HeaderCost]:
+        """
+        Choose the headers worth precompiling.
+        
+        Headers included by at least min_share of the units (and by at
+        least two) are taken by the cost precompiling them saves. A header
+        already pulled in by a chosen one is skipped, since precompiling
+        the includer covers it.
+        
+        Args:
+            max_headers: Maximum number of headers to choose.
+            min_share: Fraction of units a header must reach.
+        
+        Returns:
+            Chosen headers, largest saving first.
+        """
+        needed = max(2, math.ceil(self.units * min_share))
+        chosen: List[HeaderCost] = []
+        covered = 0
+        for header in sorted(self.headers, key=lambda h: (-h.pch_saving, h.path)):
+            if header.fan_in < needed or covered >> self._ids[header.path] & 1:
+                continue
+            chosen.append(header)
+            covered |= self._closures[header.path]
+            if len(chosen) >= max_headers:
+                break
+        return chosen
+    
+    def to_dict(self, top: int = 20) -> Dict[str, object]:
+        """
+        Get the analysis as JSON-serializable data.
+        
+        Args:
+            top: Headers listed.
+        
+        Returns:
+            Analysis dictionary.
+        """
+        def entry(header: HeaderCost) -> Dict[str, object]:
+            data = asdict(header)
+            data["pch_saving"] = header.pch_saving
+            return data
+        
+        return {
+            "units": self.units,
+            "headers": len(self.headers),
+            "depfile_edges": self.depfile_edges,
+            "include_edges": self.include_edges,
+            "cost_unit": self.unit,
+            "seconds_per_byte": self.seconds_per_byte,
+            "most_expensive": [entry(header) for header in self.headers[:top]],
+            "pch_candidates": [entry(header) for header in self.pch_candidates()],
+        }
+    
+    def format(self, top: int = 20) -> str:
+        """
+        Format the analysis as a text report.
+        
+        Args:
+            top: Headers listed.
+        
+        Returns:
+            Report text.
+        """
+        def cost(value: float) -> str:
+            return f"{value:8.2f} s" if self.unit == "s" else f"{format_size(value):>10}"
+        
+        lines = [
+            f"Include graph: {self.units} translation unit(s), {len(self.headers)} header(s), "
+            f"{self.depfile_edges} depfile edge(s), {self.include_edges} include edge(s)",
+        ]
+        if self.seconds_per_byte:
+            lines.append(f"Parse rate from recorded compile times: {format_size(1.0 / self.seconds_per_byte)}/s")
+        elif self.unit == "bytes":
+            lines.append("No compile times recorded: costs are bytes parsed over all units")
+        if not self.headers:
+            return "\n".join(lines)
+        
+        lines.append("")
+        lines.append("Most expensive headers (parse cost over all units; at most what removing them saves):")
+        lines.append(f"  {'cost':>10} {'units':>6} {'direct':>6} {'size':>10} {'inclusive':>10}  header")
+        for header in self.headers[:top]:
+            note = " (measured)" if header.measured else ""
+            lines.append(f"  {cost(header.cost)} {header.fan_in:>6} {header.includers:>6} "
+                         f"{format_size(header.size):>10} {format_size(header.inclusive_size):>10}  "
+                         f"{header.path}{note}")
+        
+        candidates = self.pch_candidates()
+        lines.append("")
+        if candidates:
+            lines.append("PCH candidates (precompiling them saves about):")
+            for header in candidates:
+                lines.append(f"  {cost(header.pch_saving)}  {header.path}")
+            names = ", ".join(f'"{Path(header.path).as_posix()}"' for header in candidates)
+            lines.append(f"  sugar.toml: pch = [{names}]")
+        else:
+            lines.append("No header is shared by enough units to be worth precompiling.")
+        return "\n".join(lines)
+
+
+def _file_size(path: str) -> int:
+    """Get the size of a file (0 if it is missing)."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
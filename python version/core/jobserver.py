@@ -0,0 +1,230 @@
+"""GNU make jobserver client and server."""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+import os
+import select
+import shlex
+import shutil
+import tempfile
+import threading
+
+
+def parse_makeflags(makeflags: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Extract the job count and jobserver address from MAKEFLAGS.
+    
+    Understands "-jN", "--jobserver-auth=fifo:PATH" (make 4.4+),
+    "--jobserver-auth=R,W" and the older "--jobserver-fds=R,W". When an
+    option appears several times, the last one wins (as in make).
+    
+    Args:
+        makeflags: Value of the MAKEFLAGS environment variable.
+    
+    Returns:
+        Tuple of (job count or None, jobserver address or None).
+    """
+    jobs = None
+    auth = None
+    try:
+        words = shlex.split(makeflags)
+    except ValueError:
+        words = makeflags.split()
+    for word in words:
+        if word.startswith("--jobserver-auth=") or word.startswith("--jobserver-fds="):
+            auth = word.split("=", 1)[1]
+        elif word.startswith("-j") and word[2:].isdigit():
+            jobs = int(word[2:])
+    return jobs, auth
+
+
+class Jobserver:
+    """
+    Pool of job tokens shared with make and the tools sugar launches.
+    
+    Every process owns one implicit job slot; each further concurrent job
+    needs a token (one byte) read from the jobserver and written back when
+    the job ends. As a client, sugar takes tokens from the jobserver its
+    parent make advertises in MAKEFLAGS. Otherwise sugar can serve its own
+    (a named fifo holding jobs - 1 tokens) and export it to the compilers
+    and linkers it runs, so tools such as gcc -flto=jobserver stay within
+    the same budget.
+    
+    Only POSIX is supported.
+    """
+    
+    # Seconds between checks for close() while waiting for a token
+    POLL_INTERVAL = 0.5
+    
+    def __init__(self, read_fd: int, write_fd: int, fifo_path: Optional[Path] = None, owner: bool = False):
+        """
+        Initialize jobserver.
+        
+        Args:
+            read_fd: Descriptor tokens are read from.
+            write_fd: Descriptor tokens are written back to.
+            fifo_path: Path of the fifo (fifo-style jobservers only).
+            owner: Whether this process created the jobserver.
+        """
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+        self.fifo_path = fifo_path
+        self.owner = owner
+        self.jobs: Optional[int] = None
+        self._implicit_free = True
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    @classmethod
+    def from_environment(cls, makeflags: Optional[str] = None) -> Optional["Jobserver"]:
+        """
+        Connect to the jobserver advertised in MAKEFLAGS.
+        
+        Args:
+            makeflags: MAKEFLAGS value (defaults to the environment's).
+        
+        Returns:
+            Jobserver client, or None if there is no usable jobserver.
+        """
+        if os.name == "nt":
+            return None
+        if makeflags is None:
+            makeflags = os.environ.get("MAKEFLAGS", "")
+        jobs, auth = parse_makeflags(makeflags)
+        if not auth:
+            return None
+        
+        if auth.startswith("fifo:"):
+            path = Path(auth[len("fifo:"):])
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            except OSError as e:
+                print(f"Warning: cannot open jobserver fifo {path}: {e}")
+                return None
+            jobserver = cls(fd, fd, fifo_path=path)
+        else:
+            try:
+                read_fd, write_fd = (int(fd) for fd in auth.split(","))
+                os.fstat(read_fd)
+                os.fstat(write_fd)
+            except (ValueError, OSError):
+                # make did not pass the pipe (recipe not marked with '+')
+                print("Warning: jobserver in MAKEFLAGS is not accessible; ignoring it")
+                return None
+            if read_fd < 0 or write_fd < 0:
+                return None
+            # Every client selects on the pipe, so a token select reported may
+            # be gone by the time we read it; a blocking read would then hang
+            # (as make itself does, the read side is made non-blocking)
+            try:
+                os.set_blocking(read_fd, False)
+            except OSError as e:
+                print(f"Warning: cannot use jobserver pipe: {e}")
+                return None
+            jobserver = cls(read_fd, write_fd)
+        jobserver.jobs = jobs
+        return jobserver
+    
+    @classmethod
+    def create(cls, jobs: int) -> Optional["Jobserver"]:
+        """
+        Start a fifo-style jobserver with jobs - 1 tokens.
+        
+        Args:
+            jobs: Total job budget (including the implicit slot).
+        
+        Returns:
+            Jobserver owning the fifo, or None if fifos are unavailable.
+        """
+        if os.name == "nt" or not hasattr(os, "mkfifo"):
+            return None
+        directory = Path(tempfile.mkdtemp(prefix="sugar-jobserver-"))
+        path = directory / "fifo"
+        try:
+            os.mkfifo(path, 0o600)
+            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+            os.write(fd, b"+" * max(0, jobs - 1))
+        except OSError as e:
+            print(f"Warning: cannot create jobserver: {e}")
+            shutil.rmtree(directory, ignore_errors=True)
+            return None
+        jobserver = cls(fd, fd, fifo_path=path, owner=True)
+        jobserver.jobs = jobs
+        return jobserver
+    
+    def acquire(self) -> Optional[bytes]:
+        """
+        Wait for a job slot.
+        
+        Returns:
+            Token byte to hand back to release(), or None for the implicit slot.
+        
+        Raises:
+            RuntimeError: If the jobserver was closed while waiting.
+        """
+        with self._lock:
+            if self._implicit_free:
+                self._implicit_free = False
+                return None
+        
+        while True:
+            if self._closed:
+                raise RuntimeError("jobserver closed")
+            readable, _, _ = select.select([self.read_fd], [], [], self.POLL_INTERVAL)
+            if not readable:
+                continue
+            try:
+                token = os.read(self.read_fd, 1)
+            except (BlockingIOError, InterruptedError):
+                # Another process or thread took the token first
+                continue
+            if token:
+                return token
+            raise RuntimeError("jobserver closed")
+    
+    def release(self, token: Optional[bytes]) -> None:
+        """
+        Give a job slot back.
+        
+        Args:
+            token: Value returned by acquire().
+        """
+        if token is None:
+            with self._lock:
+                self._implicit_free = True
+            return
+        os.write(self.write_fd, token)
+    
+    @contextmanager
+    def exported(self) -> Iterator[None]:
+        """
+        Advertise this jobserver to child processes via MAKEFLAGS.
+        
+        Only a server we own needs exporting; clients leave the inherited
+        MAKEFLAGS untouched.
+        """
+        if not self.owner:
+            yield
+            return
+        previous = os.environ.get("MAKEFLAGS")
+        flags = f"-j{self.jobs} --jobserver-auth=fifo:{self.fifo_path}"
+        os.environ["MAKEFLAGS"] = f"{previous} {flags}" if previous else flags
+        try:
+            yield
+        finally:
+            if previous is None:
+                os.environ.pop("MAKEFLAGS", None)
+            else:
+                os.environ["MAKEFLAGS"] = previous
+    
+    def close(self) -> None:
+        """Stop waiting for tokens and release what this process owns."""
+        self._closed = True
+        if self.fifo_path is not None:
+            try:
+                os.close(self.read_fd)
+            except OSError:
+                pass
+            if self.owner:
+                shutil.rmtree(self.fifo_path.parent, ignore_errors=True)
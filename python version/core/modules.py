@@ -0,0 +1,219 @@
+"""C++20 named modules: P1689 scan results and the module dependency graph."""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+
+# Extensions of module interface units (compiled like .cpp when modules are on)
+MODULE_INTERFACE_EXTENSIONS = {".cppm", ".ixx", ".mpp", ".cxxm"}
+
+
+@dataclass
+class ModuleScan:
+    """What one translation unit provides and imports."""
+    
+    provides: Optional[str] = None  # Module or partition the unit declares ("m", "m:part")
+    requires: List[str] = field(default_factory=list)  # Modules the unit imports
+    
+    @property
+    def uses_modules(self) -> bool:
+        """Whether the unit takes part in the module graph at all."""
+        return self.provides is not None or bool(self.requires)
+
+
+def parse_p1689(text: str) -> ModuleScan:
+    """
+    Parse the P1689 dependency information of one translation unit.
+    
+    This is the format written by clang-scan-deps -format=p1689 and by
+    GCC's -fdeps-format=p1689r5 (one rule per scanned unit).
+    
+    Args:
+        text: Contents of the .ddi file.
+    
+    Returns:
+        ModuleScan of the unit.
+    
+    Raises:
+        ValueError: If the text is not P1689 data, or the unit imports
+            header units or provides more than one module.
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid P1689 data: {e}")
+    rules = data.get("rules") if isinstance(data, dict) else None
+    if not isinstance(rules, list):
+        raise ValueError("invalid P1689 data: no rules")
+    
+    scan = ModuleScan()
+    for rule in rules:
+        provides = [entry["logical-name"] for entry in rule.get("provides", [])]
+        if len(provides) + (scan.provides is not None) > 1:
+            raise ValueError(f"a translation unit can provide one module, not {', '.join(provides)}")
+        if provides:
+            scan.provides = provides[0]
+        for entry in rule.get("requires", []):
+            name = entry["logical-name"]
+            if entry.get("lookup-method", "by-name") != "by-name":
+                raise ValueError(f"header units are not supported (import {name})")
+            if name not in scan.requires:
+                scan.requires.append(name)
+    return scan
+
+
+def read_p1689(path: Path) -> ModuleScan:
+    """
+    Read a P1689 file.
+    
+    Args:
+        path: Path to the .ddi file.
+    
+    Returns:
+        ModuleScan of the unit.
+    
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If it holds no usable P1689 data.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_p1689(f.read())
+
+
+def bmi_filename(module: str, extension: str) -> str:
+    """
+    Get the file name of a module's built module interface (BMI).
+    
+    Partitions ("m:part") become "m-part", as ':' is not allowed in
+    Windows file names.
+    
+    Args:
+        module: Module name.
+        extension: BMI extension of the toolchain (".gcm", ".pcm").
+    
+    Returns:
+        File name.
+    """
+    return module.replace(":", "-") + extension
+
+
+class ModuleGraph:
+    """
+    Module dependency DAG of a set of translation units.
+    
+    Every unit that imports a module depends on the unit providing it,
+    whose compile produces the BMI the importer reads. The graph is checked
+    when it is created: each module has exactly one provider, every import
+    is provided, and imports form no cycle.
+    """
+    
+    def __init__(self, scans: Dict[Path, ModuleScan]):
+        """
+        Build and check the graph.
+        
+        Args:
+            scans: Scan result of every unit, keyed by source file.
+        
+        Raises:
+            ValueError: If a module is provided twice, an imported module
+                is provided by no unit, or imports are circular.
+        """
+        self.scans = scans
+        self.providers: Dict[str, Path] = {}
+        for source, scan in scans.items():
+            if scan.provides is None:
+                continue
+            other = self.providers.setdefault(scan.provides, source)
+            if other != source:
+                raise ValueError(f"module {scan.provides} is provided by both {other} and {source}")
+        
+        for source, scan in scans.items():
+            for name in scan.requires:
+                if name not in self.providers:
+                    raise ValueError(f"{source} imports module {name}, which no source file provides")
+        
+        self._order = self._sort()
+        self._closures: Dict[Path, List[str]] = {}
+    
+    def provider(self, module: str) -> Optional[Path]:
+        """Get the source file providing a module (None if unknown)."""
+        return self.providers.get(module)
+    
+    def requires(self, source: Path) -> List[str]:
+        """Get the modules a unit imports directly."""
+        scan = self.scans.get(source)
+        return scan.requires if scan is not None else []
+    
+    def order(self) -> List[Path]:
+        """Get the units in build order: every provider before its importers."""
+        return list(self._order)
+    
+    def closure(self, source: Path) -> List[str]:
+        """
+        Get every module a unit imports, directly or through other modules.
+        
+        Compilers that load BMIs explicitly need all of them, not only
+        the direct imports.
+        
+        Args:
+            source: Source file of the unit.
+        
+        Returns:
+            Module names, each after the modules it imports.
+        """
+        closure = self._closures.get(source)
+        if closure is not None:
+            return closure
+        # Units come in build order, so providers' closures are ready first
+        for unit in self._order:
+            if unit in self._closures:
+                continue
+            modules: List[str] = []
+            for name in self.requires(unit):
+                for module in self._closures[self.providers[name]] + [name]:
+                    if module not in modules:
+                        modules.append(module)
+            self._closures[unit] = modules
+        return self._closures.get(source, [])
+    
+    def _sort(self) -> List[Path]:
+        """
+        Order the units topologically (iterative depth-first search).
+        
+        Returns:
+            Units, each after the providers of its imports.
+        
+        Raises:
+            ValueError: If imports are circular (the cycle is named).
+        """
+        order: List[Path] = []
+        done = set()
+        active: List[Path] = []  # Units on the current path
+        on_path = set()
+        for root in self.scans:
+            if root in done:
+                continue
+            stack = [(root, iter(self.requires(root)))]
+            active.append(root)
+            on_path.add(root)
+            while stack:
+                unit, imports = stack[-1]
+                for name in imports:
+                    provider = self.providers[name]
+                    if provider in on_path:
+                        cycle = active[active.index(provider):] + [provider]
+                        names = [self.scans[u].provides or str(u) for u in cycle]
+                        raise ValueError(f"circular module imports: {' -> '.join(names)}")
+                    if provider not in done:
+                        stack.append((provider, iter(self.requires(provider))))
+                        active.append(provider)
+                        on_path.add(provider)
+                        break
+                else:
+                    stack.pop()
+                    active.pop()
+                    on_path.discard(unit)
+                    done.add(unit)
+                    order.append(unit)
+        return order
@@ -0,0 +1,425 @@
+"""Content-addressed local object file cache."""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import uuid
+from .depfile import parse_depfile, write_depfile
+from .trace import Tracer
+
+
+def default_cache_dir() -> Path:
+    """
+    Get the default per-user cache directory for SugarBuilder.
+    
+    Honours SUGAR_CACHE_DIR, then LOCALAPPDATA (Windows) or XDG_CACHE_HOME.
+    
+    Returns:
+        Path to the cache directory (not created).
+    """
+    if os.environ.get("SUGAR_CACHE_DIR"):
+        return Path(os.environ["SUGAR_CACHE_DIR"])
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "sugar-builder" / "cache"
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "sugar-builder"
+
+
+def _hash_bytes(*parts: bytes) -> str:
+    """Hash byte strings into a hex digest (parts are length-prefixed)."""
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+# Line markers of preprocessed output: # 12 "file" (GCC, Clang) or #line 12 "file" (MSVC)
+_LINE_MARKER = re.compile(rb'^#(?:line)?[ \t]+\d+[ \t]+"((?:[^"\\\n]|\\.)*)"', re.MULTILINE)
+
+
+def included_files(preprocessed: bytes, source_file: Path) -> List[str]:
+    """
+    List every file a preprocessed translation unit was read from.
+    
+    Unlike -MMD depfiles, this includes system headers.
+    
+    Args:
+        preprocessed: Preprocessor output with line markers.
+        source_file: The translation unit itself (left out).
+    
+    Returns:
+        Paths of the included files, in order of first appearance.
+    """
+    source = os.path.normpath(str(source_file))
+    files: List[str] = []
+    seen = {source}
+    for match in _LINE_MARKER.finditer(preprocessed):
+        name = match.group(1).decode("utf-8", "surrogateescape")
+        name = name.replace("\\\\", "\\").replace('\\"', '"')
+        if name.startswith("<") or os.path.normpath(name) in seen:
+            # <built-in>, <command-line>
+            continue
+        seen.add(os.path.normpath(name))
+        files.append(name)
+    return files
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write a file via a unique temporary name and rename it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ObjectCache:
+    """
+    ccache-style cache placed in front of Toolchain.compile_object().
+    
+    Objects are stored under a key combining the toolchain name and
+    version, the normalized compile command (flags and include dirs with
+    the source/object paths replaced by placeholders), the content of any
+    extra inputs (a precompiled header, whose headers neither the
+    depfile nor Clang's preprocessed output show) and a hash of the
+    preprocessed translation unit.
+    
+    Direct mode skips the preprocessor as well: a manifest keyed by the
+    command and the source file's content records, for every cached
+    result, the hash of each header the TU included (taken from the line
+    markers of the preprocessed source, so system headers count too).
+    When all of those headers still hash the same, the object key is
+    taken from the manifest.
+    
+    With a size limit, trim() removes the least recently used entries:
+    restoring an entry refreshes its mtime.
+    
+    Layout:
+        <cache_dir>/objects/<ab>/<key>.o      cached object file
+        <cache_dir>/objects/<ab>/<key>.deps   headers the object depends on
+        <cache_dir>/manifests/<ab>/<key>.json direct mode manifest
+    
+    Every file is written to a temporary name and renamed, so concurrent
+    builds sharing a cache never see partial entries.
+    """
+    
+    # Results remembered per direct-mode manifest
+    MAX_MANIFEST_ENTRIES = 16
+    
+    # Trimming stops once the cache is this far below its size limit
+    TRIM_TARGET = 0.9
+    
+    def __init__(self, cache_dir: Path, tracer: Optional[Tracer] = None, max_size: Optional[int] = None):
+        """
+        Initialize object cache.
+        
+        Args:
+            cache_dir: Root directory of the cache.
+            tracer: Tracer recording cache lookups (disabled if not given).
+            max_size: Size limit in bytes enforced by trim() (None: no limit).
+        """
+        self.cache_dir = Path(cache_dir)
+        self.tracer = tracer if tracer is not None else Tracer(enabled=False)
+        self.max_size = max_size
+        self.direct_hits = 0
+        self.preprocessed_hits = 0
+        self.misses = 0
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+    
+    def _object_path(self, key: str) -> Path:
+        return self.cache_dir / "objects" / key[:2] / f"{key}.o"
+    
+    def _deps_path(self, key: str) -> Path:
+        return self.cache_dir / "objects" / key[:2] / f"{key}.deps"
+    
+    def _manifest_path(self, key: str) -> Path:
+        return self.cache_dir / "manifests" / key[:2] / f"{key}.json"
+    
+    def hash_file(self, path: str) -> Optional[str]:
+        """
+        Hash a file's contents, reusing the result while it is unchanged.
+        
+        Args:
+            path: File path.
+        
+        Returns:
+            Hex digest, or None if the file cannot be read.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        
+        stamp = (path, st.st_mtime_ns, st.st_size)
+        digest = self._file_hashes.get(stamp)
+        if digest is None:
+            try:
+                with open(path, "rb") as f:
+                    digest = _hash_bytes(f.read())
+            except OSError:
+                return None
+            self._file_hashes[stamp] = digest
+        return digest
+    
+    def compile(
+        self,
+        toolchain,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+        inputs: Optional[List[str]] = None,
+    ) -> bool:
+        """
+        Compile a source file, restoring the object from the cache if possible.
+        
+        Takes the same arguments as Toolchain.compile_object(), plus:
+        
+        Args:
+            inputs: Other files the object is built from (e.g. the
+                precompiled header); their content is part of the key.
+        
+        Returns:
+            True if the object file is in place, False if compilation failed.
+        """
+        # Normalized command: paths that differ between checkouts/build dirs
+        # are replaced so only flags and include dirs contribute
+        normalized = toolchain.get_compile_command(
+            Path("<source>"), Path("<object>"), include_dirs, flags,
+            depfile=Path("<depfile>") if depfile else None,
+        )
+        input_hashes = [self.hash_file(path) for path in inputs or []]
+        if None in input_hashes:
+            # An input that cannot be read cannot be part of the key
+            return toolchain.compile_object(source_file, output_file, include_dirs, flags, depfile=depfile)
+        command_key = _hash_bytes(
+            toolchain.get_fingerprint().encode(),
+            "\0".join(normalized).encode(),
+            *(digest.encode() for digest in input_hashes),
+        )
+        
+        # Direct mode: source content + recorded header hashes
+        source_hash = self.hash_file(str(source_file))
+        direct_key = None
+        if source_hash is not None:
+            direct_key = _hash_bytes(command_key.encode(), str(source_file).encode(), source_hash.encode())
+            with self.tracer.span("cache lookup (direct)", "cache", source=source_file):
+                object_key = self._lookup_manifest(direct_key)
+                restored = bool(object_key) and self._restore(object_key, source_file, output_file, depfile)
+            if restored:
+                with self._lock:
+                    self.direct_hits += 1
+                print(f"[cache] Restored {output_file} (direct)")
+                return True
+        
+        # Preprocessor mode: hash of the preprocessed translation unit
+        object_key = None
+        included: List[str] = []
+        cmd = toolchain.get_preprocess_command(source_file, include_dirs, flags)
+        with self.tracer.span("cache lookup (preprocessed)", "cache", source=source_file):
+            try:
+                result = subprocess.run(cmd, capture_output=True, check=False)
+                if result.returncode == 0:
+                    object_key = _hash_bytes(command_key.encode(), result.stdout)
+                    included = included_files(result.stdout, source_file)
+            except OSError:
+                pass
+            restored = bool(object_key) and self._restore(object_key, source_file, output_file, depfile)
+        
+        if restored:
+            with self._lock:
+                self.preprocessed_hits += 1
+            print(f"[cache] Restored {output_file} (preprocessed)")
+            if direct_key and included:
+                self._update_manifest(direct_key, object_key, included)
+            return True
+        
+        with self._lock:
+            self.misses += 1
+        
+        if not toolchain.compile_object(source_file, output_file, include_dirs, flags, depfile=depfile):
+            return False
+        
+        if object_key:
+            with self.tracer.span("cache store", "cache", source=source_file):
+                self._store(object_key, source_file, output_file, depfile, direct_key, included)
+        return True
+    
+    def _lookup_manifest(self, direct_key: str) -> Optional[str]:
+        """Find a manifest entry whose recorded headers all still match."""
+        try:
+            with open(self._manifest_path(direct_key), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        for entry in reversed(entries):
+            headers: Dict[str, str] = entry.get("headers", {})
+            if all(self.hash_file(path) == digest for path, digest in headers.items()):
+                self._touch(self._manifest_path(direct_key))
+                return entry.get("object")
+        return None
+    
+    def _update_manifest(self, direct_key: str, object_key: str, headers: List[str]) -> None:
+        """Add (or refresh) a result in a direct-mode manifest."""
+        hashed = {}
+        for header in headers:
+            digest = self.hash_file(header)
+            if digest is None:
+                return
+            hashed[header] = digest
+        
+        path = self._manifest_path(direct_key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+        
+        entries = [e for e in entries if e.get("headers") != hashed]
+        entries.append({"object": object_key, "headers": hashed})
+        entries = entries[-self.MAX_MANIFEST_ENTRIES:]
+        try:
+            _atomic_write(path, json.dumps(entries).encode("utf-8"))
+        except OSError:
+            pass
+    
+    def _read_deps(self, object_key: str) -> List[str]:
+        """Read the header list stored with a cached object."""
+        try:
+            with open(self._deps_path(object_key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+    
+    def _restore(self, object_key: str, source_file: Path, output_file: Path, depfile: Optional[Path]) -> bool:
+        """Copy a cached object (and its depfile) into the build directory."""
+        cached = self._object_path(object_key)
+        if not cached.exists():
+            return False
+        
+        headers = self._read_deps(object_key)
+        try:
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = output_file.with_name(f"{output_file.name}.{uuid.uuid4().hex}.tmp")
+            shutil.copyfile(cached, tmp_path)
+            os.replace(tmp_path, output_file)
+            self._touch(cached)
+            if depfile:
+                write_depfile(depfile, output_file, [str(source_file)] + headers)
+        except OSError:
+            return False
+        return True
+    
+    def _store(
+        self,
+        object_key: str,
+        source_file: Path,
+        output_file: Path,
+        depfile: Optional[Path],
+        direct_key: Optional[str],
+        included: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Copy a freshly compiled object into the cache.
+        
+        Its depfile headers are stored with it (restores rewrite the
+        depfile from them); the direct-mode manifest records every included
+        file instead, system headers too.
+        """
+        source = os.path.normpath(str(source_file))
+        headers = [d for d in parse_depfile(depfile) if os.path.normpath(d) != source] if depfile else []
+        try:
+            with open(output_file, "rb") as f:
+                _atomic_write(self._object_path(object_key), f.read())
+            _atomic_write(self._deps_path(object_key), json.dumps(headers).encode("utf-8"))
+        except OSError as e:
+            print(f"[cache] Warning: could not store {output_file}: {e}")
+            return
+        
+        # Without the full header set, direct mode is unsafe
+        if direct_key and included:
+            self._update_manifest(direct_key, object_key, included)
+    
+    @staticmethod
+    def _touch(path: Path) -> None:
+        """Mark a cache file as used (its mtime orders trimming)."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def trim(self) -> int:
+        """
+        Remove least recently used files until the cache fits its size limit.
+        
+        Objects and manifests are removed oldest first (by mtime) until the
+        cache is down to TRIM_TARGET of max_size. An object's header list
+        goes with it; manifest entries of removed objects then just miss.
+        
+        Returns:
+            Bytes removed.
+        """
+        if self.max_size is None:
+            return 0
+        files: List[Tuple[int, int, str]] = []
+        for directory in (self.cache_dir / "objects", self.cache_dir / "manifests"):
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    if name.endswith(".deps"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    size = st.st_size
+                    if name.endswith(".o"):
+                        try:
+                            size += os.stat(path[:-2] + ".deps").st_size
+                        except OSError:
+                            pass
+                    files.append((st.st_mtime_ns, size, path))
+        
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_size:
+            return 0
+        removed = 0
+        target = total - self.max_size * self.TRIM_TARGET
+        for _, size, path in sorted(files):
+            if removed >= target:
+                break
+            for victim in (path, path[:-2] + ".deps") if path.endswith(".o") else (path,):
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+            removed += size
+        return removed
+    
+    def reset_stats(self) -> None:
+        """Reset the hit/miss counters (watch mode reports them per build)."""
+        with self._lock:
+            self.direct_hits = 0
+            self.preprocessed_hits = 0
+            self.misses = 0
+    
+    def summary(self) -> str:
+        """Get a one-line summary of cache activity for this build."""
+        hits = self.direct_hits + self.preprocessed_hits
+        total = hits + self.misses
+        rate = (100.0 * hits / total) if total else 0.0
+        return (
+            f"Object cache: {hits}/{total} hits ({rate:.0f}%), "
+            f"{self.direct_hits} direct, {self.preprocessed_hits} preprocessed, "
+            f"{self.misses} misses"
+        )
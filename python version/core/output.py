@@ -0,0 +1,322 @@
+"""Per-thread console output capture and streamed tool output."""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, List, Optional
+import os
+import sys
+import threading
+
+# Tool output shown on the console per action before the rest goes to a log
+DEFAULT_MAX_OUTPUT_BYTES = 64 * 1024
+
+
+def display_path(path: Path) -> str:
+    """
+    Get the name a file's output is attributed to.
+    
+    Files under the project root (the working directory) are named by
+    their path relative to it, so src/a/util.cpp and src/b/util.cpp stay
+    apart; files outside it keep the path they were given.
+    
+    Args:
+        path: File path.
+    
+    Returns:
+        Display name with '/' separators.
+    """
+    try:
+        relative = os.path.relpath(os.path.abspath(path))
+    except ValueError:
+        # Another drive on Windows
+        return Path(path).as_posix()
+    if relative == ".." or relative.startswith(".." + os.sep):
+        return Path(path).as_posix()
+    return Path(relative).as_posix()
+
+
+class _ThreadLocalStream:
+    """
+    Stream proxy that routes writes to the calling thread's buffer.
+    
+    Threads without an active buffer write straight through to the
+    wrapped stream. In live mode, write_live() bypasses the buffer so tool
+    output reaches the console while the job is still running.
+    """
+    
+    def __init__(self, stream, live: bool = False, prefix: bool = False):
+        """
+        Initialize stream proxy.
+        
+        Args:
+            stream: Underlying stream (usually the original sys.stdout).
+            live: Whether write_live() writes straight to the stream.
+            prefix: Whether live lines are prefixed with their job's label.
+        """
+        self._stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.live = live
+        self.prefix = prefix
+    
+    def write(self, text: str) -> int:
+        """Write text to the thread's buffer or the underlying stream."""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            with self._lock:
+                return self._stream.write(text)
+        buffer.append(text)
+        label = getattr(self._local, "label", None)
+        if label is not None:
+            self._drain(buffer, label)
+        return len(text)
+    
+    def write_live(self, text: str, label: str) -> None:
+        """
+        Write whole lines to the underlying stream right away.
+        
+        A job printing into a buffer goes live from here on: what it
+        printed before (e.g. the "Compiling: ..." line) is written first,
+        and its later lines follow as they are printed, so the job's
+        output keeps its order on the console.
+        
+        Args:
+            text: One or more complete lines.
+            label: Job the lines belong to (shown when prefixing).
+        """
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            self._emit(text, label)
+            return
+        self._local.label = label
+        buffer.append(text)
+        self._drain(buffer, label)
+    
+    def finish(self, buffer: List[str]) -> None:
+        """
+        End the current thread's capture.
+        
+        Output of a job that went live is written out (an unfinished last
+        line included), leaving the buffer empty.
+        
+        Args:
+            buffer: The thread's buffer.
+        """
+        label = getattr(self._local, "label", None)
+        self._local.buffer = None
+        self._local.label = None
+        if label is not None and buffer:
+            text = "".join(buffer)
+            del buffer[:]
+            self._emit(text if text.endswith("\n") else text + "\n", label)
+    
+    def _drain(self, buffer: List[str], label: str) -> None:
+        """Write the complete lines of a buffer, keeping an unfinished last line."""
+        text = "".join(buffer)
+        end = text.rfind("\n") + 1
+        del buffer[:]
+        if end < len(text):
+            buffer.append(text[end:])
+        if end:
+            self._emit(text[:end], label)
+    
+    def _emit(self, text: str, label: str) -> None:
+        """Write whole lines to the underlying stream, prefixed if enabled."""
+        if self.prefix:
+            text = "".join(f"[{label}] {line}" for line in text.splitlines(keepends=True))
+        with self._lock:
+            self._stream.write(text)
+            self._stream.flush()
+    
+    def flush(self) -> None:
+        """Flush the underlying stream when writing through."""
+        if getattr(self._local, "buffer", None) is None:
+            self._stream.flush()
+    
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+class OutputCapture:
+    """
+    Collects everything a worker thread prints while it runs a job.
+    
+    Toolchains report progress and compiler diagnostics with print(). When
+    several jobs run at once their lines would interleave on the console, so
+    each job prints into its own buffer and the scheduler writes the buffer
+    out in one piece when the job finishes.
+    
+    In live mode, tool output written with write_live() is shown as it is
+    produced instead, and so is everything else the job prints from then
+    on (its earlier lines are written first, keeping them in order); with
+    several jobs running, each line is prefixed with the job's label so it
+    stays attributable. A single job needs neither buffering nor prefixes,
+    so its output is not captured at all.
+    """
+    
+    def __init__(self, live: bool = False, parallel: bool = True):
+        """
+        Initialize output capture (not yet installed).
+        
+        Args:
+            live: Whether tool output is streamed rather than buffered.
+            parallel: Whether several jobs can print at the same time.
+        """
+        self.live = live
+        self.parallel = parallel
+        self._proxy: Optional[_ThreadLocalStream] = None
+        self._original = None
+    
+    def install(self) -> None:
+        """Replace sys.stdout with the thread-aware proxy."""
+        if self._proxy is not None:
+            return
+        self._original = sys.stdout
+        self._proxy = _ThreadLocalStream(sys.stdout, live=self.live, prefix=self.live and self.parallel)
+        sys.stdout = self._proxy
+    
+    def uninstall(self) -> None:
+        """Restore the original sys.stdout."""
+        if self._proxy is None:
+            return
+        if sys.stdout is self._proxy:
+            sys.stdout = self._original
+        self._proxy = None
+        self._original = None
+    
+    @contextmanager
+    def capture(self) -> Iterator[List[str]]:
+        """
+        Capture output printed by the current thread.
+        
+        Yields:
+            List that receives every chunk of text printed inside the block
+            (emptied again if the job's output went live).
+        """
+        if self._proxy is None:
+            raise RuntimeError("OutputCapture.capture() requires install() first")
+        
+        buffer: List[str] = []
+        if self.live and not self.parallel:
+            yield buffer
+            return
+        self._proxy._local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._proxy.finish(buffer)
+    
+    def __enter__(self) -> "OutputCapture":
+        self.install()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.uninstall()
+
+
+def write_live(text: str, label: str) -> None:
+    """
+    Write tool output to the console as soon as it is produced.
+    
+    Goes straight to the console when a live OutputCapture is installed;
+    otherwise it is printed like anything else (and captured per job).
+    
+    Args:
+        text: One or more complete lines.
+        label: Job the lines belong to, usually the source file name.
+    """
+    stream = sys.stdout
+    if isinstance(stream, _ThreadLocalStream) and stream.live:
+        stream.write_live(text, label)
+    else:
+        stream.write(text)
+
+
+class ActionOutput:
+    """
+    Bounded, streamed output of one compile or link.
+    
+    Lines are passed to write_live() as the tool prints them, until
+    max_bytes have been shown. From then on lines only go to log_file,
+    which receives the whole output of the action (the lines already
+    shown are kept for it, so memory use stays bounded by max_bytes
+    however much the tool prints). close() reports where the rest went.
+    """
+    
+    def __init__(
+        self,
+        label: str,
+        log_file: Optional[Path] = None,
+        max_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+        indent: str = "  ",
+    ):
+        """
+        Initialize action output.
+        
+        A log left behind by an earlier run of the same action is removed.
+        
+        Args:
+            label: Name the output is attributed to.
+            log_file: Where output beyond max_bytes is written (dropped if None).
+            max_bytes: Bytes shown on the console.
+            indent: Prefix of every shown line.
+        """
+        self.label = label
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.indent = indent
+        self.shown_bytes = 0
+        self.spilled_bytes = 0
+        self._shown: List[str] = []
+        self._log: Optional[IO[str]] = None
+        if log_file is not None:
+            try:
+                log_file.unlink()
+            except OSError:
+                pass
+    
+    def write(self, line: str) -> None:
+        """
+        Show or log one line of tool output.
+        
+        Args:
+            line: Line of output (a missing newline is added).
+        """
+        if not line.endswith("\n"):
+            line += "\n"
+        size = len(line.encode("utf-8", "replace"))
+        if not self.spilled_bytes and self.shown_bytes + size <= self.max_bytes:
+            self.shown_bytes += size
+            if self.log_file is not None:
+                self._shown.append(line)
+            write_live(self.indent + line, self.label)
+            return
+        
+        if not self.spilled_bytes:
+            self._open_log()
+        self.spilled_bytes += size
+        if self._log is not None:
+            self._log.write(line)
+    
+    def _open_log(self) -> None:
+        """Start the log with the lines already shown."""
+        if self.log_file is None:
+            return
+        try:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            self._log = open(self.log_file, "w", encoding="utf-8", errors="replace")
+            self._log.writelines(self._shown)
+        except OSError as e:
+            print(f"  Warning: cannot write {self.log_file}: {e}")
+            self._log = None
+        self._shown = []
+    
+    def close(self) -> None:
+        """Finish the log and say how much output was not shown."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self._shown = []
+        if self.spilled_bytes:
+            where = f"full output in {self.log_file}" if self.log_file is not None else "not shown"
+            print(f"  ... {self.spilled_bytes} more bytes of output ({where})")
@@ -0,0 +1,220 @@
+"""Precompiled header selection and generation."""
+
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Sequence
+import os
+import re
+import time
+from .buildstate import BuildState, command_signature
+from .depfile import parse_depfile
+from .resources import track_usage
+
+# Matches #include <...> and #include "..." directives
+_INCLUDE_PATTERN = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*([<"])([^>"\r\n]+)[>"]', re.MULTILINE)
+# Matches #pragma once or a leading #ifndef include guard
+_GUARD_PATTERN = re.compile(rb"^[ \t]*#[ \t]*(pragma[ \t]+once|ifndef[ \t]+\w+)", re.MULTILINE)
+
+
+def _resolve_quoted(name: str, including_dir: Path, include_dirs: Sequence[Path]) -> Optional[Path]:
+    """Resolve a quoted include the way the compiler does (including dir first)."""
+    for directory in [including_dir, *include_dirs]:
+        candidate = directory / name
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _has_include_guard(header: Path) -> bool:
+    """Check whether a header can safely be included twice."""
+    try:
+        with open(header, "rb") as f:
+            return _GUARD_PATTERN.search(f.read()) is not None
+    except OSError:
+        return False
+
+
+def select_headers(
+    source_files: Sequence[Path],
+    include_dirs: Sequence[Path],
+    max_headers: int = 8,
+    min_share: float = 0.5,
+) -> List[str]:
+    """
+    Choose the headers worth precompiling.
+    
+    Counts the headers each translation unit includes directly and keeps
+    those included by at least min_share of the units (and by at least
+    two). System headers are kept by name; project headers are resolved to
+    absolute paths and only used when they have an include guard, since
+    the precompiled header is included ahead of the unit's own includes.
+    
+    Args:
+        source_files: Translation units of the project.
+        include_dirs: Include directories passed to the compiler.
+        max_headers: Maximum number of headers to select.
+        min_share: Fraction of units a header must be included by.
+    
+    Returns:
+        Include targets ("<vector>" or "/abs/path/header.h"), most included first.
+    """
+    counts: Counter = Counter()
+    first_seen = {}
+    guarded = {}
+    for source_file in source_files:
+        try:
+            with open(source_file, "rb") as f:
+                text = f.read()
+        except OSError:
+            continue
+        
+        seen = set()
+        for match in _INCLUDE_PATTERN.finditer(text):
+            delimiter, name = match.group(1), os.fsdecode(match.group(2).strip())
+            if delimiter == b"<":
+                target = f"<{name}>"
+            else:
+                resolved = _resolve_quoted(name, source_file.parent, include_dirs)
+                if resolved is None:
+                    continue
+                target = str(resolved.resolve())
+                if target not in guarded:
+                    guarded[target] = _has_include_guard(resolved)
+                if not guarded[target]:
+                    continue
+            seen.add(target)
+            first_seen.setdefault(target, len(first_seen))
+        counts.update(seen)
+    
+    needed = max(2, int(len(source_files) * min_share + 0.999))
+    selected = [target for target, count in counts.items() if count >= needed]
+    selected.sort(key=lambda target: (-counts[target], first_seen[target]))
+    return selected[:max_headers]
+
+
+class PrecompiledHeader:
+    """
+    A project-wide precompiled header kept in the build directory.
+    
+    The chosen headers are written to a generated header (FILENAME) which
+    the toolchain precompiles to a .gch/.pch next to it. The generated
+    header is only rewritten when the header list changes, and the PCH
+    itself is tracked like any other action in the build state, so it is
+    rebuilt only when the header list, the compile command or one of the
+    headers it pulls in changed.
+    """
+    
+    FILENAME = "sugar_pch.h"
+    
+    def __init__(self, build_dir: Path, headers: List[str]):
+        """
+        Initialize precompiled header.
+        
+        Args:
+            build_dir: Build directory the header and PCH are written to.
+            headers: Include targets ("<name>" for system headers, paths otherwise).
+        """
+        self.build_dir = Path(build_dir)
+        self.headers = headers
+    
+    @property
+    def header_path(self) -> Path:
+        """Path of the generated header."""
+        return self.build_dir / self.FILENAME
+    
+    def get_pch_file(self, toolchain) -> Path:
+        """
+        Get the path of the precompiled header built by a toolchain.
+        
+        Translation units do not list the headers inside a PCH in their
+        depfiles, so builds add this path to their dependencies instead.
+        """
+        return self.header_path.with_name(self.FILENAME + toolchain.get_pch_extension())
+    
+    def get_inputs(self, toolchain, state: BuildState) -> List[str]:
+        """
+        Get the files the PCH was built from.
+        
+        Unlike the PCH itself (GCC's .gch differs between builds of the
+        same headers), their content is stable, so the object cache keys
+        objects using the PCH on them.
+        
+        Args:
+            toolchain: Toolchain compiling the project.
+            state: Build state holding the PCH's recorded dependencies.
+        
+        Returns:
+            The generated header followed by the headers it pulled in.
+        """
+        return [str(self.header_path)] + state.deps.get_dependencies(self.get_pch_file(toolchain))
+    
+    def write_header(self) -> None:
+        """Write the generated header, leaving it untouched if unchanged."""
+        # Only ever pulled in once with -include; as the main file of the PCH
+        # compile, #pragma once would draw a warning
+        lines = ["// Generated by SugarBuilder; do not edit."]
+        for header in self.headers:
+            if header.startswith("<"):
+                lines.append(f"#include {header}")
+            else:
+                lines.append(f'#include "{Path(header).as_posix()}"')
+        content = "\n".join(lines) + "\n"
+        
+        try:
+            if self.header_path.read_text(encoding="utf-8") == content:
+                return
+        except OSError:
+            pass
+        self.header_path.write_text(content, encoding="utf-8")
+    
+    def prepare(
+        self,
+        toolchain,
+        state: BuildState,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        time_trace_flags: Optional[List[str]] = None,
+    ) -> Optional[List[str]]:
+        """
+        Build the PCH if it is out of date.
+        
+        Compilers only use a PCH built with the language options of the
+        translation unit, so flags must hold what every unit is compiled
+        with. Time trace flags do not change the PCH; as for objects, they
+        are passed when building but left out of the signature.
+        
+        Args:
+            toolchain: Toolchain compiling the project.
+            state: Build state used to decide whether the PCH is current.
+            include_dirs: Include directories of the translation units.
+            flags: Compiler flags shared by the translation units.
+            time_trace_flags: Time trace flags of the translation units (--time-report).
+        
+        Returns:
+            Flags that make a translation unit use the PCH, or None if
+            building the PCH failed.
+        """
+        self.write_header()
+        header = self.header_path
+        pch_file = self.get_pch_file(toolchain)
+        depfile = header.with_suffix(".d")
+        
+        cmd = toolchain.get_pch_command(header, pch_file, include_dirs, flags, depfile)
+        signature = command_signature(cmd + [toolchain.get_fingerprint()])
+        if not state.is_up_to_date(header, pch_file, signature):
+            st = BuildState.stat_source(header)
+            state.invalidate(pch_file)
+            print(f"Precompiling {len(self.headers)} header(s): {', '.join(Path(h).name for h in self.headers)}")
+            started = time.perf_counter()
+            with track_usage() as usage:
+                success = toolchain.compile_pch(header, pch_file, include_dirs,
+                                                (flags or []) + (time_trace_flags or []), depfile)
+            wall_time = time.perf_counter() - started
+            if not success:
+                state.record_failure(header, pch_file, signature, wall_time, kind="pch", usage=usage)
+                return None
+            state.record(header, pch_file, signature, st, parse_depfile(depfile), wall_time, kind="pch", usage=usage)
+            # Objects depend on the PCH itself; drop any stamp taken before it was rebuilt
+            state.deps.invalidate_stamps([pch_file])
+        
+        return toolchain.get_pch_flags(header, pch_file)
@@ -1,10 +1,39 @@
 """Project representation and management."""
 
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterable, List, Optional
+import fnmatch
+import os
+import re
 from .config import Config
 
 
+def compile_globs(patterns: Iterable[str]) -> Callable[[str], bool]:
+    """
+    Build a matcher for sugar.toml glob patterns.
+    
+    Patterns use fnmatch syntax ("*" also matches "/") and are tried
+    against both the path relative to the project root and the file or
+    directory name, so "*_test.cpp" and "src/legacy/*" both work.
+    
+    Args:
+        patterns: Glob patterns.
+    
+    Returns:
+        Function taking a project-relative POSIX path and returning whether
+        any pattern matches it.
+    """
+    translated = [fnmatch.translate(pattern.strip().rstrip("/").removeprefix("./")) for pattern in patterns]
+    if not translated:
+        return lambda relative: False
+    regex = re.compile("|".join(translated))
+    
+    def matches(relative: str) -> bool:
+        return regex.match(relative) is not None or regex.match(relative.rpartition("/")[2]) is not None
+    
+    return matches
+
+
 class Project:
     """
     Represents a SugarBuilder C++ project.
@@ -12,6 +41,9 @@ class Project:
     Manages project configuration, source files, and build artifacts.
     """
     
+    # Source and header extensions collected from source_paths
+    SOURCE_EXTENSIONS = {".cpp", ".cc", ".cxx", ".c", ".h", ".hpp", ".cppm", ".ixx", ".mpp", ".cxxm"}
+    
     def __init__(self, config: Config, root_dir: str | Path = "."):
         """
         Initialize project with configuration.
@@ -22,30 +54,174 @@ class Project:
         """
         self.config = config
         self.root_dir = Path(root_dir)
+        self._included = compile_globs(config.source_include) if config.source_include else None
+        self._excluded = compile_globs(config.source_exclude)
     
     def get_source_files(self) -> List[Path]:
         """
         Collect all C++ source files from configured source paths.
         
+        Each source path is walked recursively in a single os.scandir pass.
+        Hidden directories and the build and output directories are
+        skipped, as are directories matching source_exclude. Files must
+        have a source extension, match source_include (if given) and not
+        match source_exclude.
+        
         Returns:
-            List of Path objects pointing to C++ source files (.cpp, .cc, .cxx, .c, .h, .hpp).
+            Sorted, de-duplicated list of source files (.cpp, .cc, .cxx, .c, .h, .hpp
+            and the module interface extensions .cppm, .ixx, .mpp, .cxxm).
         """
         source_files = []
+        seen = set()
+        linked_dirs = set()
         # Include both source and header files from source_paths
         # Headers in source_paths are included during compilation
-        source_extensions = {".cpp", ".cc", ".cxx", ".c", ".h", ".hpp"}
+        source_extensions = self.SOURCE_EXTENSIONS
+        skipped_dirs = {
+            os.path.normcase(os.path.abspath(directory)) for directory in self._generated_directories()
+        }
         
         for src_path in self.config.source_paths:
             src_dir = self.root_dir / src_path
-            if not src_dir.exists():
+            if not src_dir.is_dir():
                 continue
             
-            # Search only in the specified directory (not subdirectories)
-            for ext in source_extensions:
-                source_files.extend(src_dir.glob(f"*{ext}"))
+            # (directory, its path relative to the project root)
+            relative_root = Path(src_path).as_posix().strip("/")
+            stack = [(str(src_dir), "" if relative_root == "." else relative_root)]
+            while stack:
+                directory, relative_dir = stack.pop()
+                try:
+                    with os.scandir(directory) as entries:
+                        entries = list(entries)
+                except OSError:
+                    continue
+                
+                for entry in entries:
+                    name = entry.name
+                    relative = f"{relative_dir}/{name}" if relative_dir else name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if name.startswith(".") or self._excluded(relative):
+                            continue
+                        if os.path.normcase(os.path.abspath(entry.path)) in skipped_dirs:
+                            continue
+                        if entry.is_symlink():
+                            # Follow each linked directory once (links can form cycles)
+                            target = os.path.realpath(entry.path)
+                            if target in linked_dirs:
+                                continue
+                            linked_dirs.add(target)
+                        stack.append((entry.path, relative))
+                    elif os.path.splitext(name)[1] in source_extensions and self._selected(relative):
+                        key = os.path.normcase(os.path.abspath(entry.path))
+                        if key not in seen:
+                            seen.add(key)
+                            source_files.append(Path(entry.path))
         
+        source_files.sort()
         return source_files
     
+    def _selected(self, relative: str) -> bool:
+        """Check a source file's project-relative path against include/exclude globs."""
+        if self._included is not None and not self._included(relative):
+            return False
+        return not self._excluded(relative)
+    
+    def is_source_file(self, path: Path) -> bool:
+        """
+        Check whether get_source_files() would collect a path.
+        
+        Used to patch the source list from file events instead of walking
+        the tree again.
+        
+        Args:
+            path: File path (need not exist).
+        
+        Returns:
+            True if the path lies under a source path and passes the filters.
+        """
+        if path.suffix not in self.SOURCE_EXTENSIONS:
+            return False
+        
+        relative = self._relative_path(path)
+        if relative is None:
+            return False
+        parts = relative.split("/")
+        if any(part.startswith(".") for part in parts[:-1]):
+            return False
+        
+        absolute = os.path.normcase(os.path.abspath(path))
+        for directory in self._generated_directories():
+            if absolute.startswith(os.path.normcase(os.path.abspath(directory)) + os.sep):
+                return False
+        
+        in_source_path = False
+        for src_path in self.config.source_paths:
+            src_dir = os.path.normcase(os.path.abspath(self.root_dir / src_path))
+            if absolute.startswith(src_dir + os.sep):
+                in_source_path = True
+                break
+        if not in_source_path:
+            return False
+        
+        # Excluded parent directories prune the whole subtree
+        for i in range(1, len(parts)):
+            if self._excluded("/".join(parts[:i])):
+                return False
+        return self._selected(relative)
+    
+    def _generated_directories(self) -> List[Path]:
+        """Get the directories sugar writes to (never searched for sources)."""
+        directories = [self.get_build_directory(), self.get_output_directory()]
+        if self.config.build_root:
+            # Other targets build next to this one
+            directories.append(self.root_dir / self.config.build_root)
+        return directories
+    
+    def _relative_path(self, path: Path) -> Optional[str]:
+        """Get a path relative to the project root (None if it is outside)."""
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root_dir))
+        if relative == ".." or relative.startswith(".." + os.sep):
+            return None
+        return Path(relative).as_posix()
+    
+    def get_object_path(self, source_file: Path, extension: str) -> Path:
+        """
+        Get the object file a source compiles to.
+        
+        The build directory mirrors the source tree (src/a/util.cpp becomes
+        <build>/src/a/util.o), so equal file names in different directories
+        never share an object. Generated sources inside the build directory
+        keep their place there; sources outside the project root go under
+        <build>/_external/<hash of their directory>/.
+        
+        Args:
+            source_file: Translation unit.
+            extension: Object file extension of the toolchain.
+        
+        Returns:
+            Path of the object file.
+        """
+        build_dir = self.get_build_directory()
+        absolute = os.path.abspath(source_file)
+        stem = os.path.splitext(os.path.basename(absolute))[0] + extension
+        
+        build_relative = os.path.relpath(os.path.dirname(absolute), os.path.abspath(build_dir))
+        if not build_relative.startswith(".."):
+            return build_dir / build_relative / stem
+        
+        relative = self._relative_path(Path(absolute).parent)
+        if relative is None:
+            import hashlib
+            
+            digest = hashlib.blake2b(os.path.dirname(absolute).encode("utf-8", "surrogateescape"), digest_size=6)
+            return build_dir / "_external" / digest.hexdigest() / stem
+        return build_dir / relative / stem
+    
     def get_build_directory(self) -> Path:
         """
         Get the build directory path.
@@ -0,0 +1,556 @@
+"""Distributed compilation: worker daemon and remote compile client."""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import json
+import os
+import re
+import socket
+import socketserver
+import struct
+import subprocess
+import tempfile
+import threading
+import zlib
+from .depfile import write_depfile
+from .output import ActionOutput, OutputCapture, display_path
+
+# Port workers listen on when an address gives none
+DEFAULT_PORT = 7230
+
+# Toolchains whose preprocessed output can be compiled elsewhere
+REMOTE_TOOLCHAINS = {"GCC", "Clang"}
+
+# Largest JSON header accepted, as a guard against garbage on the socket
+MAX_HEADER_SIZE = 1 << 20
+
+# Compiler output a worker sends back per compile (clients apply their own
+# console limit); it travels in the payload, so JSON escaping cannot push
+# a reply past MAX_HEADER_SIZE
+MAX_REMOTE_OUTPUT_BYTES = 512 << 10
+
+# Seconds allowed for connecting to a worker / for a remote compile
+CONNECT_TIMEOUT = 2.0
+COMPILE_TIMEOUT = 600.0
+
+# "# 12 "path" 1 3" line markers in preprocessed output
+_LINEMARKER = re.compile(rb'^#(?:line)? *\d+ +"((?:[^"\\]|\\.)*)"([ \d]*)\r?$', re.MULTILINE)
+
+Address = Union[str, Tuple[str, int]]
+
+
+class RemoteError(Exception):
+    """A worker could not be reached or broke the protocol."""
+
+
+def parse_address(address: str) -> Address:
+    """
+    Parse a worker address.
+    
+    Args:
+        address: "unix:/path/to/socket", "host:port" or "host".
+    
+    Returns:
+        Socket path (str) for unix sockets, else a (host, port) tuple.
+    
+    Raises:
+        ValueError: If the port is not a number.
+    """
+    if address.startswith("unix:"):
+        return address[len("unix:"):]
+    host, sep, port = address.rpartition(":")
+    if not sep:
+        return (address, DEFAULT_PORT)
+    if not port.isdigit():
+        raise ValueError(f"Invalid worker address: {address}")
+    return (host.strip("[]") or "127.0.0.1", int(port))
+
+
+def connect(address: Address, timeout: float = CONNECT_TIMEOUT) -> socket.socket:
+    """
+    Open a connection to a worker.
+    
+    Raises:
+        RemoteError: If the worker cannot be reached.
+    """
+    try:
+        if isinstance(address, str):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(address)
+            return sock
+        return socket.create_connection(address, timeout=timeout)
+    except OSError as e:
+        raise RemoteError(f"cannot connect: {e}") from e
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes from a socket."""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise RemoteError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    """
+    Send one message: a length-prefixed JSON header, then the payload.
+    
+    Payloads are zlib-compressed (preprocessed sources shrink several-fold).
+    
+    Args:
+        sock: Connected socket.
+        header: JSON-serializable message header.
+        payload: Optional binary payload.
+    """
+    body = zlib.compress(payload, 1) if payload else b""
+    data = json.dumps(dict(header, size=len(body))).encode("utf-8")
+    sock.sendall(struct.pack("!I", len(data)) + data + body)
+
+
+def recv_message(sock: socket.socket) -> Tuple[dict, bytes]:
+    """
+    Receive one message sent by send_message().
+    
+    Returns:
+        Tuple of (header, payload).
+    
+    Raises:
+        RemoteError: If the connection drops or the message is malformed.
+    """
+    try:
+        (length,) = struct.unpack("!I", _recv_exact(sock, 4))
+        if length > MAX_HEADER_SIZE:
+            raise RemoteError("message header too large")
+        header = json.loads(_recv_exact(sock, length))
+        body = _recv_exact(sock, int(header.get("size", 0)))
+        return header, zlib.decompress(body) if body else b""
+    except (OSError, ValueError, zlib.error) as e:
+        raise RemoteError(f"bad message: {e}") from e
+
+
+def preprocessed_dependencies(preprocessed: bytes) -> List[str]:
+    """
+    Get the user files a translation unit read, from its line markers.
+    
+    Matches what -MMD reports: system headers (flag 3) and pseudo files
+    such as <built-in> are left out.
+    
+    Args:
+        preprocessed: Output of the preprocessor.
+    
+    Returns:
+        File paths in order of first appearance.
+    """
+    deps: List[str] = []
+    seen = set()
+    for match in _LINEMARKER.finditer(preprocessed):
+        name = re.sub(rb"\\(.)", rb"\1", match.group(1)).decode("utf-8", "surrogateescape")
+        if name.startswith("<") or name.endswith("//") or b"3" in match.group(2).split():
+            continue
+        if name not in seen:
+            seen.add(name)
+            deps.append(name)
+    return deps
+
+
+class _LocalSlots:
+    """Bounded local job slots with the same interface as Jobserver."""
+    
+    def __init__(self, jobs: int):
+        """Initialize with the given number of slots."""
+        self._semaphore = threading.Semaphore(max(1, jobs))
+    
+    def acquire(self) -> None:
+        """Wait for a free slot."""
+        self._semaphore.acquire()
+    
+    def release(self, token) -> None:
+        """Free a slot taken by acquire()."""
+        self._semaphore.release()
+
+
+class RemoteWorker:
+    """Client-side view of one worker: address, capacity and load."""
+    
+    def __init__(self, address: str):
+        """
+        Initialize worker.
+        
+        Args:
+            address: Worker address as given in the configuration.
+        """
+        self.address = address
+        self.endpoint = parse_address(address)
+        self.slots = 0
+        self.load = 0  # Jobs the worker reported running (from any client)
+        self.in_flight = 0  # Jobs this client has sent it
+        self.alive = False
+    
+    def request(self, header: dict, payload: bytes = b"", timeout: float = COMPILE_TIMEOUT) -> Tuple[dict, bytes]:
+        """
+        Send a request and wait for the reply.
+        
+        Raises:
+            RemoteError: If the worker cannot be reached or replies garbage.
+        """
+        with connect(self.endpoint) as sock:
+            sock.settimeout(timeout)
+            try:
+                send_message(sock, header, payload)
+            except OSError as e:
+                raise RemoteError(f"send failed: {e}") from e
+            return recv_message(sock)
+
+
+class RemoteCompiler:
+    """
+    Toolchain wrapper that runs compile_object() on remote workers.
+    
+    Each compile is preprocessed locally, so workers need only the same
+    compiler, not the project's headers. The preprocessed source is sent
+    to the least loaded worker with a free slot, which compiles it and
+    returns the object file and diagnostics; the depfile is written from
+    the preprocessor's line markers. When every worker is busy (or one
+    fails), the compile runs locally, bounded by the local job budget.
+    
+    Everything except compile_object() is delegated to the wrapped
+    toolchain, so the object cache and build state see no difference.
+    """
+    
+    def __init__(self, toolchain, workers: List[RemoteWorker], local_slots=None, local_jobs: int = 1):
+        """
+        Initialize remote compiler.
+        
+        Args:
+            toolchain: Local toolchain (GCC or Clang).
+            workers: Workers to distribute compiles over.
+            local_slots: Jobserver to take local slots from (optional).
+            local_jobs: Local job budget when there is no jobserver.
+        """
+        self.toolchain = toolchain
+        self.workers = workers
+        self.local_slots = local_slots or _LocalSlots(local_jobs)
+        self.remote_compiles = 0
+        self.local_compiles = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def connect(cls, toolchain, addresses: List[str], local_slots=None, local_jobs: int = 1) -> Optional["RemoteCompiler"]:
+        """
+        Probe the configured workers and keep the usable ones.
+        
+        Workers that are unreachable or have a different compiler version
+        are skipped with a warning.
+        
+        Args:
+            toolchain: Local toolchain.
+            addresses: Worker addresses.
+            local_slots: Jobserver to take local slots from (optional).
+            local_jobs: Local job budget when there is no jobserver.
+        
+        Returns:
+            RemoteCompiler, or None if no worker is usable.
+        """
+        if toolchain.name not in REMOTE_TOOLCHAINS:
+            print(f"Warning: distributed compilation is not supported for {toolchain.name}")
+            return None
+        
+        version = toolchain.get_fingerprint()
+        workers = []
+        for address in addresses:
+            try:
+                worker = RemoteWorker(address)
+                status, _ = worker.request({"op": "status", "toolchain": toolchain.name}, timeout=CONNECT_TIMEOUT)
+            except (RemoteError, ValueError) as e:
+                print(f"Warning: worker {address} unavailable: {e}")
+                continue
+            if status.get("version") != version:
+                print(f"Warning: worker {address} has compiler "
+                      f"'{status.get('version') or 'not installed'}', expected '{version}'")
+                continue
+            worker.slots = int(status.get("slots", 0))
+            worker.load = int(status.get("running", 0))
+            worker.alive = worker.slots > 0
+            if worker.alive:
+                workers.append(worker)
+        
+        if not workers:
+            return None
+        return cls(toolchain, workers, local_slots, local_jobs)
+    
+    @property
+    def capacity(self) -> int:
+        """Total slots of the usable workers."""
+        return sum(worker.slots for worker in self.workers if worker.alive)
+    
+    def __getattr__(self, name: str):
+        return getattr(self.toolchain, name)
+    
+    def _pick(self) -> Optional[RemoteWorker]:
+        """Reserve a slot on the least loaded worker (None if all are full)."""
+        with self._lock:
+            best = None
+            best_load = 1.0
+            for worker in self.workers:
+                if not worker.alive:
+                    continue
+                load = (worker.in_flight + worker.load) / worker.slots
+                if worker.in_flight < worker.slots and load < best_load:
+                    best, best_load = worker, load
+            if best is not None:
+                best.in_flight += 1
+            return best
+    
+    def compile_object(
+        self,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> bool:
+        """
+        Compile on a worker if one has a free slot, else locally.
+        
+        Takes the same arguments as Toolchain.compile_object().
+        
+        Returns:
+            True if compilation succeeded, False otherwise.
+        """
+        worker = self._pick()
+        if worker is not None:
+            try:
+                result = self._compile_remote(worker, source_file, output_file, include_dirs, flags, depfile)
+            finally:
+                with self._lock:
+                    worker.in_flight -= 1
+            if result is not None:
+                return result
+            with self._lock:
+                self.fallbacks += 1
+        
+        token = self.local_slots.acquire()
+        try:
+            with self._lock:
+                self.local_compiles += 1
+            return self.toolchain.compile_object(source_file, output_file, include_dirs, flags, depfile=depfile)
+        finally:
+            self.local_slots.release(token)
+    
+    def _compile_remote(
+        self,
+        worker: RemoteWorker,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]],
+        flags: Optional[List[str]],
+        depfile: Optional[Path],
+    ) -> Optional[bool]:
+        """
+        Run one compile on a worker.
+        
+        Returns:
+            True/False for the compile's outcome, or None if the worker
+            could not do it and the compile should run locally.
+        """
+        cmd = self.toolchain.get_preprocess_command(source_file, include_dirs, flags)
+        try:
+            result = subprocess.run(cmd, capture_output=True, check=False)
+        except OSError as e:
+            print(f"  Error: {e}")
+            return False
+        if result.returncode != 0:
+            # Preprocessing errors are the source's fault; report them as is
+            print(f"  Error: {result.stderr.decode('utf-8', 'replace')}")
+            return False
+        
+        print(f"[{worker.address}] Compiling {source_file} -> {output_file}")
+        header = {
+            "op": "compile",
+            "toolchain": self.toolchain.name,
+            "version": self.toolchain.get_fingerprint(),
+            "flags": flags or [],
+            "name": source_file.name,
+        }
+        try:
+            reply, payload = worker.request(header, result.stdout)
+        except RemoteError as e:
+            print(f"  Warning: worker {worker.address} failed ({e}); compiling locally")
+            worker.alive = False
+            return None
+        
+        worker.load = int(reply.get("running", worker.load))
+        if reply.get("error"):
+            print(f"  Warning: worker {worker.address}: {reply['error']}; compiling locally")
+            return None
+        # The payload is the compiler output followed by the object file
+        output_size = int(reply.get("output_size", 0))
+        text = payload[:output_size].decode("utf-8", "replace")
+        if text:
+            # The worker already indented its lines
+            output = ActionOutput(display_path(source_file), self.toolchain.get_log_file(output_file),
+                                  self.toolchain.max_output_bytes, indent="")
+            for line in text.splitlines(keepends=True):
+                output.write(line)
+            output.close()
+        if not reply.get("success"):
+            return False
+        
+        output_file.write_bytes(payload[output_size:])
+        if depfile:
+            write_depfile(depfile, output_file, preprocessed_dependencies(result.stdout))
+        with self._lock:
+            self.remote_compiles += 1
+        return True
+    
+    def summary(self) -> str:
+        """Get a one-line summary of where compiles ran."""
+        summary = f"Distributed: {self.remote_compiles} remote, {self.local_compiles} local"
+        if self.fallbacks:
+            summary += f" ({self.fallbacks} fallback(s))"
+        return summary
+
+
+class WorkerServer:
+    """
+    Daemon that compiles preprocessed sources for remote clients.
+    
+    Each connection carries one request: "status" reports the compiler
+    version and load, "compile" compiles the payload and replies with the
+    compiler output and the object file (both in the payload; the header
+    gives the size of the output). At most `jobs` compiles run at once;
+    further requests queue (and count towards the reported load).
+    
+    Workers run the local compiler with flags chosen by the client, so
+    only listen on networks whose clients are trusted.
+    """
+    
+    def __init__(self, address: str, jobs: int):
+        """
+        Initialize worker server.
+        
+        Args:
+            address: Listen address ("host:port" or "unix:/path").
+            jobs: Maximum concurrent compiles.
+        """
+        from src.toolchains import Toolchain
+        
+        self.address = address
+        self.jobs = max(1, jobs)
+        self.running = 0
+        self.completed = 0
+        self._toolchain_factory = Toolchain.create
+        self._toolchains: Dict[str, object] = {}
+        self._slots = threading.Semaphore(self.jobs)
+        self._lock = threading.Lock()
+        self._capture = OutputCapture()
+        
+        worker = self
+        
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                worker.handle(self.request)
+        
+        endpoint = parse_address(address)
+        if isinstance(endpoint, str):
+            if os.path.exists(endpoint):
+                os.unlink(endpoint)
+            server_class = socketserver.ThreadingUnixStreamServer
+        else:
+            server_class = socketserver.ThreadingTCPServer
+        server_class.daemon_threads = True
+        server_class.allow_reuse_address = True
+        self._server = server_class(endpoint, Handler)
+    
+    @property
+    def bound_address(self) -> str:
+        """Address clients can reach the worker at (with the port chosen for port 0)."""
+        endpoint = self._server.server_address
+        if isinstance(endpoint, str):
+            return f"unix:{endpoint}"
+        return f"{endpoint[0]}:{endpoint[1]}"
+    
+    def serve_forever(self) -> None:
+        """Serve requests until shutdown() is called."""
+        with self._capture:
+            self._server.serve_forever()
+    
+    def shutdown(self) -> None:
+        """Stop serve_forever() (call from another thread)."""
+        self._server.shutdown()
+    
+    def close(self) -> None:
+        """Close the listening socket."""
+        self._server.server_close()
+        endpoint = parse_address(self.address)
+        if isinstance(endpoint, str) and os.path.exists(endpoint):
+            os.unlink(endpoint)
+    
+    def _toolchain(self, name: str):
+        """Get (and keep) the local toolchain of the given name."""
+        with self._lock:
+            if name not in self._toolchains:
+                toolchain = self._toolchain_factory(name)
+                toolchain.max_output_bytes = MAX_REMOTE_OUTPUT_BYTES
+                self._toolchains[name] = toolchain
+            return self._toolchains[name]
+    
+    def handle(self, sock: socket.socket) -> None:
+        """Serve one request on an accepted connection."""
+        try:
+            header, payload = recv_message(sock)
+        except RemoteError:
+            return
+        
+        try:
+            op = header.get("op")
+            name = header.get("toolchain", "")
+            if name not in REMOTE_TOOLCHAINS:
+                reply, data = {"error": f"unsupported toolchain '{name}'"}, b""
+            elif op == "status":
+                reply, data = {"version": self._toolchain(name).get_fingerprint(), "slots": self.jobs}, b""
+            elif op == "compile":
+                reply, data = self._compile(header, payload)
+            else:
+                reply, data = {"error": f"unknown request '{op}'"}, b""
+            with self._lock:
+                reply["running"] = self.running
+            send_message(sock, reply, data)
+        except OSError:
+            pass
+    
+    def _compile(self, header: dict, payload: bytes) -> Tuple[dict, bytes]:
+        """Compile a preprocessed source and return (reply, object bytes)."""
+        toolchain = self._toolchain(header["toolchain"])
+        if header.get("version") != toolchain.get_fingerprint():
+            return {"error": f"compiler version mismatch ({toolchain.get_fingerprint() or 'not installed'})"}, b""
+        
+        flags = [str(flag) for flag in header.get("flags", [])]
+        with self._lock:
+            self.running += 1
+        try:
+            with self._slots, tempfile.TemporaryDirectory(prefix="sugar-worker-") as tmp:
+                source_file = Path(tmp) / "unit.ii"
+                output_file = Path(tmp) / ("unit" + toolchain.get_object_extension())
+                source_file.write_bytes(payload)
+                with self._capture.capture() as buffer:
+                    success = toolchain.compile_object(source_file, output_file, flags=flags)
+                # Keep the diagnostics, not the worker's temporary paths
+                output = "".join(
+                    line for line in "".join(buffer).splitlines(keepends=True)
+                    if not line.startswith(f"[{toolchain.name}] Compiling")
+                )
+                data = output_file.read_bytes() if success and output_file.exists() else b""
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+        print(f"{'Compiled' if success else 'Failed'}: {header.get('name', '?')}")
+        text = output.encode("utf-8", "replace")
+        return {"success": success and bool(data), "output_size": len(text)}, text + data
@@ -0,0 +1,390 @@
+"""Machine limits (cgroups) and resource usage of the tools sugar runs."""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+import math
+import os
+import re
+import sys
+import threading
+
+# Limits at or above this are how cgroups spell "unlimited"
+_UNLIMITED = 1 << 62
+
+# Memory a job is given when -j is derived from a cgroup memory limit
+MEMORY_PER_JOB = 512 << 20
+
+_SIZE_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a memory size such as "512M", "6G" or "8GiB".
+    
+    Units are binary (K = 1024 bytes); a bare number is a byte count.
+    
+    Args:
+        text: Size string.
+    
+    Returns:
+        Size in bytes.
+    
+    Raises:
+        ValueError: If the text is not a size.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*", text.lower())
+    if match is None:
+        raise ValueError(f"invalid size '{text}' (expected e.g. 512M or 8G)")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def format_size(size: float) -> str:
+    """Format a byte count for humans (e.g. "1.5 GiB")."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _read(path: Path) -> Optional[str]:
+    """Read a small pseudo-file (None if missing or unreadable)."""
+    try:
+        with open(path, "r", encoding="ascii", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_directories(controller: str) -> List[Path]:
+    """
+    Get the cgroup directories whose limits apply to this process.
+    
+    Covers both the cgroup v1 hierarchy of the controller and the cgroup v2
+    unified hierarchy. A limit set on any ancestor applies too, so every
+    directory from the process's own cgroup up to the mount point is
+    returned.
+    
+    Args:
+        controller: cgroup v1 controller name ("cpu", "memory").
+    
+    Returns:
+        Directories, innermost first (empty outside Linux).
+    """
+    membership = _read(Path("/proc/self/cgroup"))
+    mountinfo = _read(Path("/proc/self/mountinfo"))
+    if not membership or not mountinfo:
+        return []
+    
+    # hierarchy-id:controllers:path ("0::path" for cgroup v2)
+    paths = {}
+    for line in membership.splitlines():
+        parts = line.split(":", 2)
+        if len(parts) == 3:
+            for name in parts[1].split(",") if parts[1] else [""]:
+                paths[name] = parts[2]
+    
+    directories = []
+    for line in mountinfo.splitlines():
+        mount, _, filesystem = line.partition(" - ")
+        mount_fields = mount.split()
+        fs_fields = filesystem.split()
+        if len(mount_fields) < 5 or len(fs_fields) < 3:
+            continue
+        if fs_fields[0] == "cgroup2":
+            path = paths.get("")
+        elif fs_fields[0] == "cgroup" and controller in fs_fields[2].split(","):
+            path = paths.get(controller)
+        else:
+            continue
+        if path is None:
+            continue
+        
+        # Inside a container the mount root is the container's own cgroup
+        root, mount_point = mount_fields[3], Path(mount_fields[4])
+        relative = os.path.relpath(path, root) if path.startswith(root) else "."
+        directory = mount_point / relative if relative != "." else mount_point
+        if not directory.is_dir():
+            directory = mount_point
+        while True:
+            directories.append(directory)
+            if directory == mount_point or directory.parent == directory:
+                break
+            directory = directory.parent
+    return directories
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """
+    Get the CPU quota of this process's cgroups.
+    
+    Returns:
+        CPUs' worth of time the cgroup may use (e.g. 2.5), or None if unlimited.
+    """
+    limits = []
+    for directory in cgroup_directories("cpu"):
+        quota = period = None
+        text = _read(directory / "cpu.max")  # v2: "<quota|max> <period>"
+        if text:
+            fields = text.split()
+            if fields[0] != "max" and len(fields) == 2:
+                quota, period = fields
+        else:
+            quota = _read(directory / "cpu.cfs_quota_us")  # v1: -1 = unlimited
+            period = _read(directory / "cpu.cfs_period_us")
+        try:
+            if quota is not None and period is not None and int(quota) > 0 and int(period) > 0:
+                limits.append(int(quota) / int(period))
+        except ValueError:
+            continue
+    return min(limits) if limits else None
+
+
+def cgroup_memory_limit() -> Optional[int]:
+    """
+    Get the memory limit of this process's cgroups.
+    
+    Returns:
+        Limit in bytes, or None if unlimited.
+    """
+    limits = []
+    for directory in cgroup_directories("memory"):
+        for name in ("memory.max", "memory.limit_in_bytes"):
+            text = _read(directory / name)
+            if text and text.isdigit() and int(text) < _UNLIMITED:
+                limits.append(int(text))
+    return min(limits) if limits else None
+
+
+def _cgroup_memory_usage() -> Optional[int]:
+    """Get the memory charged to this process's innermost memory cgroup."""
+    for directory in cgroup_directories("memory"):
+        for name in ("memory.current", "memory.usage_in_bytes"):
+            text = _read(directory / name)
+            if text and text.isdigit():
+                return int(text)
+    return None
+
+
+def available_memory() -> Optional[int]:
+    """
+    Get the memory new processes can use without swapping or an OOM kill.
+    
+    The smaller of the kernel's MemAvailable and what is left below the
+    cgroup memory limit.
+    
+    Returns:
+        Bytes, or None if unknown (non-Linux).
+    """
+    available = None
+    meminfo = _read(Path("/proc/meminfo"))
+    if meminfo:
+        match = re.search(r"^MemAvailable:\s+(\d+) kB", meminfo, re.MULTILINE)
+        if match:
+            available = int(match.group(1)) * 1024
+    
+    limit = cgroup_memory_limit()
+    if limit is not None:
+        remaining = max(0, limit - (_cgroup_memory_usage() or 0))
+        available = remaining if available is None else min(available, remaining)
+    return available
+
+
+@dataclass
+class ResourceUsage:
+    """
+    Resources used by the tool processes of one action.
+    
+    Times and I/O add up over the processes; peak_rss is the largest of
+    them. Each process's figures include the children it waited for
+    (cc1plus and as under the g++ driver, for example).
+    """
+    
+    processes: int = 0  # Processes accounted
+    user_time: float = 0.0  # CPU seconds in user mode
+    system_time: float = 0.0  # CPU seconds in the kernel
+    peak_rss: int = 0  # Largest resident set of any process, in bytes
+    read_bytes: int = 0  # Block input (reads that went to the disk)
+    write_bytes: int = 0  # Block output
+    
+    # Block I/O counts are in 512-byte units
+    BLOCK_SIZE = 512
+    
+    @property
+    def cpu_time(self) -> float:
+        """User plus system CPU seconds."""
+        return self.user_time + self.system_time
+    
+    def add_rusage(self, rusage) -> None:
+        """
+        Add the usage of one finished process.
+        
+        Args:
+            rusage: resource.struct_rusage from os.wait4().
+        """
+        # ru_maxrss is in kilobytes, except on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        self.processes += 1
+        self.user_time += rusage.ru_utime
+        self.system_time += rusage.ru_stime
+        self.peak_rss = max(self.peak_rss, rusage.ru_maxrss * scale)
+        self.read_bytes += rusage.ru_inblock * self.BLOCK_SIZE
+        self.write_bytes += rusage.ru_oublock * self.BLOCK_SIZE
+
+
+@dataclass(eq=False)
+class ActionUsage:
+    """Resource usage of one action of a build."""
+    
+    name: str
+    kind: str  # compile, link, pch
+    wall_time: float
+    usage: ResourceUsage
+
+
+class UsageReport:
+    """
+    Per-build summary of the resources actions used.
+    
+    Actions are added from worker threads as they finish; format() ranks
+    the top consumers of CPU time and memory.
+    """
+    
+    def __init__(self):
+        """Initialize an empty report."""
+        self.actions: List[ActionUsage] = []
+        self._lock = threading.Lock()
+    
+    def add(self, name: str, kind: str, wall_time: float, usage: ResourceUsage) -> None:
+        """
+        Add a finished action (ignored if it ran no local process).
+        
+        Args:
+            name: Action name shown in the report.
+            kind: Action kind.
+            wall_time: Seconds the action took.
+            usage: What its processes used.
+        """
+        if not usage.processes:
+            return
+        with self._lock:
+            self.actions.append(ActionUsage(name, kind, wall_time, usage))
+    
+    def format(self, top: int = 5) -> str:
+        """
+        Format the summary.
+        
+        Args:
+            top: Actions listed per ranking.
+        
+        Returns:
+            Report text (empty when no action ran a process).
+        """
+        if not self.actions:
+            return ""
+        usages = [action.usage for action in self.actions]
+        user = sum(u.user_time for u in usages)
+        system = sum(u.system_time for u in usages)
+        lines = [
+            f"Resource usage: {len(self.actions)} action(s), {user + system:.2f} s CPU "
+            f"({user:.2f} user + {system:.2f} sys), peak {format_size(max(u.peak_rss for u in usages))}, "
+            f"{format_size(sum(u.read_bytes for u in usages))} read, "
+            f"{format_size(sum(u.write_bytes for u in usages))} written",
+            f"  {'CPU s':>8} {'user':>7} {'sys':>7} {'wall':>7} {'peak RSS':>10} {'read':>10} {'written':>10}  action",
+        ]
+        
+        def row(action: ActionUsage) -> str:
+            u = action.usage
+            return (f"  {u.cpu_time:8.2f} {u.user_time:7.2f} {u.system_time:7.2f} {action.wall_time:7.2f} "
+                    f"{format_size(u.peak_rss):>10} {format_size(u.read_bytes):>10} "
+                    f"{format_size(u.write_bytes):>10}  {action.name}")
+        
+        by_cpu = sorted(self.actions, key=lambda a: a.usage.cpu_time, reverse=True)[:top]
+        lines.extend(row(action) for action in by_cpu)
+        # Memory hogs that are not CPU hogs are listed too
+        by_memory = [a for a in sorted(self.actions, key=lambda a: a.usage.peak_rss, reverse=True)[:top]
+                     if a not in by_cpu]
+        if by_memory:
+            lines.append("  largest memory:")
+            lines.extend(row(action) for action in by_memory)
+        if len(self.actions) > len(by_cpu) + len(by_memory):
+            lines.append(f"  ... {len(self.actions) - len(by_cpu) - len(by_memory)} more action(s)")
+        return "\n".join(lines)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def track_usage() -> Iterator[ResourceUsage]:
+    """
+    Collect the usage of every tool the current thread runs in the block.
+    
+    Yields:
+        ResourceUsage filled in as tools finish (see wait_process()).
+    """
+    usage = ResourceUsage()
+    previous = getattr(_local, "usage", None)
+    _local.usage = usage
+    try:
+        yield usage
+    finally:
+        _local.usage = previous
+
+
+def usage_measured() -> bool:
+    """Check whether wait_process() can measure the usage of tools here."""
+    return hasattr(os, "wait4")
+
+
+def wait_process(process) -> int:
+    """
+    Wait for a subprocess.Popen and account its usage.
+    
+    Uses os.wait4() where available, so the usage of the process (and of
+    the processes it waited for, such as cc1plus under g++) is added to
+    the calling thread's track_usage() block.
+    
+    Args:
+        process: Started subprocess.Popen.
+    
+    Returns:
+        Exit status (negative signal number if killed, as in Popen).
+    """
+    if not usage_measured():
+        return process.wait()
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # Already reaped elsewhere; no usage to account
+        return process.wait()
+    process.returncode = os.waitstatus_to_exitcode(status)
+    usage = getattr(_local, "usage", None)
+    if usage is not None:
+        usage.add_rusage(rusage)
+    return process.returncode
+
+
+def limited_job_count(cpus: int) -> int:
+    """
+    Apply cgroup limits to a CPU count.
+    
+    The CPU quota caps jobs at the CPUs' worth of time the cgroup may use
+    (rounded up), and a memory limit at one job per MEMORY_PER_JOB.
+    
+    Args:
+        cpus: CPUs this process may run on.
+    
+    Returns:
+        Job count (at least 1).
+    """
+    jobs = cpus
+    quota = cgroup_cpu_limit()
+    if quota is not None:
+        jobs = min(jobs, math.ceil(quota))
+    memory = cgroup_memory_limit()
+    if memory is not None:
+        jobs = min(jobs, memory // MEMORY_PER_JOB)
+    return max(1, jobs)
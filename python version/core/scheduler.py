@@ -0,0 +1,336 @@
+"""Parallel job scheduling for build actions."""
+
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, TypeVar
+import bisect
+import heapq
+import os
+import statistics
+import sys
+import time
+from .jobserver import Jobserver
+from .output import OutputCapture
+from .resources import limited_job_count
+
+T = TypeVar("T")
+
+
+def default_job_count() -> int:
+    """
+    Get the default number of parallel jobs.
+    
+    Inside a container the host's core count is misleading, so the count
+    is capped by the cgroup CPU quota and memory limit (see
+    limited_job_count()).
+    
+    Returns:
+        Number of CPUs usable by this process (at least 1).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # sched_getaffinity is not available on Windows/macOS
+        cpus = os.cpu_count() or 1
+    return limited_job_count(max(1, cpus))
+
+
+def estimate_costs(source_files: Sequence[Path], history: Dict[str, float]) -> Dict[str, float]:
+    """
+    Estimate the compile cost of each source file.
+    
+    Files with a recorded compile time use it. Others are estimated from
+    their size, scaled by the median seconds-per-byte of the files with
+    history (or just their size when there is no history at all).
+    
+    Args:
+        source_files: Source files to estimate.
+        history: Recorded compile seconds keyed by source path.
+    
+    Returns:
+        Estimated cost keyed by source path.
+    """
+    sizes = {}
+    for source_file in source_files:
+        try:
+            sizes[str(source_file)] = max(1, os.path.getsize(source_file))
+        except OSError:
+            sizes[str(source_file)] = 1
+    
+    ratios = [history[path] / size for path, size in sizes.items() if history.get(path)]
+    seconds_per_byte = statistics.median(ratios) if ratios else 1.0
+    return {path: history.get(path) or size * seconds_per_byte for path, size in sizes.items()}
+
+
+@dataclass
+class TaskTiming(Generic[T]):
+    """When a task ran, relative to the start of JobScheduler.run()."""
+    
+    task: T
+    start: float
+    end: float
+    success: bool
+    
+    @property
+    def duration(self) -> float:
+        """Seconds the task ran."""
+        return self.end - self.start
+
+
+class JobScheduler:
+    """
+    Runs build jobs on a bounded pool of worker threads.
+    
+    Each job runs in a worker thread (compilers are separate processes, so
+    threads are enough to keep every core busy). Whatever a job prints is
+    captured and written out as one block once the job finishes, so the
+    output of different translation units never interleaves. Compiler
+    diagnostics are the exception: toolchains stream them (see
+    ActionOutput) as they are produced, each line prefixed with its
+    translation unit while several jobs run. The rest of that job's output
+    is then streamed too, so its lines stay in order.
+    
+    After the first failure no further jobs are started; jobs already
+    running are allowed to finish and their output is still reported.
+    
+    Given a cost estimate, tasks start longest first: a long job started
+    last would otherwise run on alone after every other worker is done.
+    The start and end of every task are kept in `timings`, from which
+    critical_path() recovers the chain of jobs that bounded the run.
+    
+    With a jobserver, each job also holds a job slot from it while it runs,
+    so jobs never exceed the budget shared with make and other tools.
+    
+    Tasks may depend on other tasks (e.g. a link on its compiles). A task
+    starts as soon as everything it depends on has succeeded, so tasks of
+    different targets share the pool instead of running target by target.
+    Ready tasks start in order of their cost plus the most expensive chain
+    of tasks waiting on them.
+    
+    With a memory budget and a predicted peak memory per task, a task whose
+    prediction would push the running total over the budget is held back
+    (lighter ready tasks may start instead) until enough running tasks
+    finish. A task always starts when nothing else is running, so one task
+    larger than the budget still runs, alone.
+    """
+    
+    def __init__(self, jobs: int, jobserver: Optional[Jobserver] = None, memory_budget: Optional[int] = None):
+        """
+        Initialize scheduler.
+        
+        Args:
+            jobs: Maximum number of jobs to run at the same time.
+            jobserver: Optional jobserver to take a slot from per job.
+            memory_budget: Optional bytes the running tasks may use together.
+        """
+        self.jobs = max(1, jobs)
+        self.jobserver = jobserver
+        self.memory_budget = memory_budget
+        self.timings: List[TaskTiming] = []
+        # Tasks of the last run that had to wait for memory
+        self.held_back = 0
+    
+    def run(
+        self,
+        tasks: Iterable[T],
+        worker: Callable[[T], bool],
+        cost: Optional[Callable[[T], float]] = None,
+        depends_on: Optional[Callable[[T], Iterable[T]]] = None,
+        memory: Optional[Callable[[T], float]] = None,
+    ) -> bool:
+        """
+        Run worker(task) for every task.
+        
+        Args:
+            tasks: Tasks to run (hashable), started in iteration order.
+            worker: Callable returning True on success, False on failure.
+            cost: Optional predicted cost of a task; tasks then start in
+                order of decreasing cost (including what waits on them).
+            depends_on: Optional tasks a task must wait for. Dependencies
+                that are not among tasks count as done.
+            memory: Optional predicted peak memory of a task in bytes
+                (only used with a memory budget).
+        
+        Returns:
+            True if every task succeeded, False otherwise.
+        """
+        tasks = list(tasks)
+        order = {task: index for index, task in enumerate(tasks)}
+        waiting: Dict[T, int] = {}
+        dependents: Dict[T, List[T]] = {}
+        if depends_on is not None:
+            for task in tasks:
+                dependencies = {dep for dep in depends_on(task) if dep in order}
+                waiting[task] = len(dependencies)
+                for dep in dependencies:
+                    dependents.setdefault(dep, []).append(task)
+        priority = self._priorities(tasks, dependents, cost)
+        
+        ready: List[Tuple[float, int, T]] = []
+        for task in tasks:
+            if not waiting.get(task):
+                heapq.heappush(ready, (-priority[task], order[task], task))
+        running: Dict[Future, T] = {}
+        reserved: Dict[Future, float] = {}
+        held = set()
+        failed = False
+        finished = 0
+        origin = time.perf_counter()
+        self.timings = []
+        budget = self.memory_budget if memory is not None else None
+        
+        with OutputCapture(live=True, parallel=self.jobs > 1) as capture, ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            
+            def submit_ready() -> None:
+                skipped = []
+                while ready and len(running) < self.jobs:
+                    entry = heapq.heappop(ready)
+                    task = entry[2]
+                    need = memory(task) if budget is not None else 0.0
+                    if running and budget is not None and sum(reserved.values()) + need > budget:
+                        # Too heavy for now; a lighter task may still fit
+                        skipped.append(entry)
+                        held.add(order[task])
+                        continue
+                    future = executor.submit(self._run_task, capture, worker, task, origin)
+                    running[future] = task
+                    reserved[future] = need
+                for entry in skipped:
+                    heapq.heappush(ready, entry)
+            
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    reserved.pop(future, None)
+                    success, output, start, end = future.result()
+                    finished += 1
+                    self.timings.append(TaskTiming(task, start, end, success))
+                    if output:
+                        sys.stdout.write(output)
+                        sys.stdout.flush()
+                    if not success:
+                        failed = True
+                        continue
+                    for dependent in dependents.get(task, []):
+                        waiting[dependent] -= 1
+                        if not waiting[dependent]:
+                            heapq.heappush(ready, (-priority[dependent], order[dependent], dependent))
+                if not failed:
+                    submit_ready()
+        
+        self.held_back = len(held)
+        if not failed and finished < len(tasks):
+            print("Error: circular dependency between build tasks")
+            return False
+        return not failed
+    
+    @staticmethod
+    def _priorities(
+        tasks: List[T],
+        dependents: Dict[T, List[T]],
+        cost: Optional[Callable[[T], float]],
+    ) -> Dict[T, float]:
+        """
+        Get each task's cost plus the most expensive chain of its dependents.
+        
+        Args:
+            tasks: All tasks.
+            dependents: Tasks waiting on each task.
+            cost: Predicted cost of a task (all tasks cost 0 without it).
+        
+        Returns:
+            Priority keyed by task.
+        """
+        if cost is None:
+            return {task: 0.0 for task in tasks}
+        own = {task: cost(task) for task in tasks}
+        if not dependents:
+            return own
+        
+        priority: Dict[T, float] = {}
+        visited = set()
+        for root in tasks:
+            # Iterative post-order walk; tasks in a cycle are given their own cost
+            stack = [(root, False)]
+            while stack:
+                task, expanded = stack.pop()
+                if task in priority:
+                    continue
+                if expanded:
+                    later = [priority.get(dep, 0.0) for dep in dependents.get(task, [])]
+                    priority[task] = own[task] + max(later, default=0.0)
+                    continue
+                if task in visited:
+                    continue
+                visited.add(task)
+                stack.append((task, True))
+                stack.extend((dep, False) for dep in dependents.get(task, []) if dep not in priority)
+        return priority
+    
+    def critical_path(self, slack: float = 0.05) -> List[TaskTiming]:
+        """
+        Get the chain of tasks that bounded the last run's wall time.
+        
+        Starts from the task that finished last and walks back through the
+        task whose completion freed the slot it started in, until reaching
+        a task that started right away (or after a gap longer than slack).
+        
+        Args:
+            slack: Longest gap between one task ending and the next starting
+                that still counts as back-to-back.
+        
+        Returns:
+            Tasks on the critical path, in execution order.
+        """
+        if not self.timings:
+            return []
+        
+        by_end = sorted(self.timings, key=lambda t: t.end)
+        ends = [t.end for t in by_end]
+        path = [by_end[-1]]
+        while True:
+            current = path[-1]
+            # A task is only submitted after an earlier one finished, so the
+            # latest task that ended before it started freed its slot
+            index = bisect.bisect_right(ends, current.start) - 1
+            if index < 0 or ends[index] < current.start - slack:
+                break
+            path.append(by_end[index])
+        path.reverse()
+        return path
+    
+    def _run_task(
+        self,
+        capture: OutputCapture,
+        worker: Callable[[T], bool],
+        task: T,
+        origin: float,
+    ) -> Tuple[bool, str, float, float]:
+        """
+        Run a single task in a worker thread with its output captured.
+        
+        Returns:
+            Tuple of (success, captured output, start, end), with start and
+            end in seconds since origin. Time spent waiting for a jobserver
+            slot is not part of the task.
+        """
+        with capture.capture() as buffer:
+            try:
+                token = self.jobserver.acquire() if self.jobserver else None
+            except RuntimeError as e:
+                print(f"  Error: {e}")
+                now = time.perf_counter() - origin
+                return False, "".join(buffer), now, now
+            start = time.perf_counter() - origin
+            try:
+                success = bool(worker(task))
+            except Exception as e:
+                print(f"  Error: {e}")
+                success = False
+            finally:
+                if self.jobserver:
+                    self.jobserver.release(token)
+        return success, "".join(buffer), start, time.perf_counter() - origin
@@ -0,0 +1,251 @@
+"""Build-history statistics: trends, slowest compiles and regressions."""
+
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+import statistics
+import time
+from .builddb import ActionRecord, BuildDatabase, BuildRecord
+
+# A compile this much slower than its rolling median is a regression
+REGRESSION_THRESHOLD = 0.30
+# Earlier runs of a compile that form its rolling median
+REGRESSION_WINDOW = 10
+# Earlier runs needed before a compile can be called a regression
+REGRESSION_MIN_RUNS = 3
+# Slowdowns smaller than this (seconds) are noise, whatever the ratio
+REGRESSION_MIN_SECONDS = 0.05
+
+
+@dataclass
+class BuildSummary:
+    """What one build did."""
+    
+    id: int
+    started: str  # Local time, ISO 8601
+    wall_time: Optional[float]
+    exit_status: Optional[int]
+    compiles: int  # Compiles that ran the compiler (not up-to-date files or cache hits)
+    compile_time: float  # Seconds spent in those compiles
+    links: int
+    cpu_time: Optional[float]  # CPU seconds of the tools (None if not measured)
+    cache_hit_rate: Optional[float]  # 0..1, None when the object cache was off or unused
+
+
+@dataclass
+class CompileSummary:
+    """Recent timing of one object file."""
+    
+    output: str
+    last_time: float  # Seconds of the latest successful compile
+    median_time: float  # Rolling median of the runs before it (or the latest, if none)
+    runs: int  # Successful compiles in the history
+    peak_rss: Optional[int] = None
+    
+    @property
+    def change(self) -> float:
+        """Latest time relative to the rolling median (0.3 = 30% slower)."""
+        return self.last_time / self.median_time - 1.0 if self.median_time > 0 else 0.0
+
+
+@dataclass
+class BuildStats:
+    """
+    Statistics over the builds recorded in a build database.
+    
+    Attributes:
+        builds: Recent builds, oldest first.
+        slowest: Object files with the slowest latest compile, slowest first.
+        regressions: Object files whose latest compile is more than
+            threshold slower than their rolling median, worst first.
+        cache_hits: Object cache hits over the recent builds.
+        cache_misses: Object cache misses over the recent builds.
+        threshold: Regression threshold used (0.3 = 30%).
+    """
+    
+    builds: List[BuildSummary] = field(default_factory=list)
+    slowest: List[CompileSummary] = field(default_factory=list)
+    regressions: List[CompileSummary] = field(default_factory=list)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    threshold: float = REGRESSION_THRESHOLD
+    
+    @classmethod
+    def from_database(
+        cls,
+        db: BuildDatabase,
+        builds: int = 20,
+        top: int = 10,
+        threshold: float = REGRESSION_THRESHOLD,
+    ) -> "BuildStats":
+        """
+        Compute statistics from a build database.
+        
+        Trends and cache rates cover the last `builds` builds; slowest
+        compiles and regressions use each object's full recorded history.
+        
+        Args:
+            db: Build database.
+            builds: Recent builds to summarize.
+            top: Object files listed as slowest.
+            threshold: Slowdown over the rolling median that counts as a
+                regression (0.3 = 30%).
+        
+        Returns:
+            BuildStats.
+        """
+        stats = cls(threshold=threshold)
+        records = db.get_builds(builds)
+        history = db.get_all_history()
+        
+        # Cache hits and remote compiles run no local compiler, so their
+        # times say nothing about the TU; where tool usage is recorded
+        # (everywhere but Windows) they are left out
+        measured = any(action.user_time is not None for action in history)
+        history = [
+            action for action in history
+            if action.kind != "compile" or not measured or action.user_time is not None
+        ]
+        
+        by_build: Dict[int, List[ActionRecord]] = {}
+        compiles: Dict[str, List[ActionRecord]] = {}
+        for action in history:
+            by_build.setdefault(action.build_id, []).append(action)
+            if action.kind == "compile" and action.exit_status == 0:
+                compiles.setdefault(action.output, []).append(action)
+        
+        for record in records:
+            stats.builds.append(cls._summarize_build(record, by_build.get(record.id, [])))
+            if record.cache_hits is not None:
+                stats.cache_hits += record.cache_hits
+                stats.cache_misses += record.cache_misses or 0
+        
+        summaries = []
+        for output, runs in compiles.items():
+            earlier = [run.wall_time for run in runs[-REGRESSION_WINDOW - 1:-1]]
+            latest = runs[-1]
+            summary = CompileSummary(
+                output=output,
+                last_time=latest.wall_time,
+                median_time=statistics.median(earlier) if earlier else latest.wall_time,
+                runs=len(runs),
+                peak_rss=latest.peak_rss,
+            )
+            summaries.append(summary)
+            if (len(earlier) >= REGRESSION_MIN_RUNS
+                    and summary.change > threshold
+                    and summary.last_time - summary.median_time >= REGRESSION_MIN_SECONDS):
+                stats.regressions.append(summary)
+        
+        stats.slowest = sorted(summaries, key=lambda s: s.last_time, reverse=True)[:top]
+        stats.regressions.sort(key=lambda s: s.change, reverse=True)
+        return stats
+    
+    @staticmethod
+    def _summarize_build(record: BuildRecord, actions: List[ActionRecord]) -> BuildSummary:
+        """Summarize one build from its record and the actions it ran."""
+        compiles = [a for a in actions if a.kind == "compile"]
+        measured = [a for a in actions if a.user_time is not None]
+        lookups = (record.cache_hits or 0) + (record.cache_misses or 0)
+        return BuildSummary(
+            id=record.id,
+            started=time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.started)),
+            wall_time=record.wall_time,
+            exit_status=record.exit_status,
+            compiles=len(compiles),
+            compile_time=sum(a.wall_time for a in compiles),
+            links=sum(1 for a in actions if a.kind == "link"),
+            cpu_time=sum(a.user_time + (a.system_time or 0.0) for a in measured) if measured else None,
+            cache_hit_rate=record.cache_hits / lookups if lookups else None,
+        )
+    
+    @property
+    def cache_hit_rate(self) -> Optional[float]:
+        """Object cache hit rate over the recent builds (None if never used)."""
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+    
+    def compile_trend(self) -> Optional[float]:
+        """
+        Compare the mean compile time of the newer and older half of the builds.
+        
+        Per-compile means are compared, so builds that recompile more or
+        fewer files do not skew the trend.
+        
+        Returns:
+            Relative change (0.1 = compiles got 10% slower), or None with
+            too little history.
+        """
+        builds = [b for b in self.builds if b.compiles]
+        if len(builds) < 2:
+            return None
+        half = len(builds) // 2
+        older, newer = builds[:half], builds[half:]
+        before = sum(b.compile_time for b in older) / sum(b.compiles for b in older)
+        after = sum(b.compile_time for b in newer) / sum(b.compiles for b in newer)
+        return after / before - 1.0 if before > 0 else None
+    
+    def to_dict(self) -> Dict[str, object]:
+        """Get the statistics as JSON-serializable data."""
+        def compile_entry(summary: CompileSummary) -> Dict[str, object]:
+            entry = asdict(summary)
+            entry["change"] = round(summary.change, 4)
+            return entry
+        
+        return {
+            "builds": [asdict(build) for build in self.builds],
+            "compile_trend": self.compile_trend(),
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hit_rate,
+            },
+            "slowest": [compile_entry(summary) for summary in self.slowest],
+            "regressions": [compile_entry(summary) for summary in self.regressions],
+            "regression_threshold": self.threshold,
+        }
+    
+    def format(self) -> str:
+        """
+        Format the statistics as a text report.
+        
+        Returns:
+            Report text.
+        """
+        def rate(value: Optional[float]) -> str:
+            return f"{100.0 * value:.0f}%" if value is not None else "-"
+        
+        lines = [f"Builds (last {len(self.builds)}):"]
+        lines.append(f"  {'id':>5}  {'started':<19} {'status':>6} {'wall s':>8} {'compiles':>8} "
+                     f"{'compile s':>9} {'CPU s':>8} {'cache':>6}")
+        for build in self.builds:
+            status = "-" if build.exit_status is None else ("ok" if build.exit_status == 0 else "failed")
+            wall = f"{build.wall_time:.2f}" if build.wall_time is not None else "-"
+            cpu = f"{build.cpu_time:.2f}" if build.cpu_time is not None else "-"
+            lines.append(f"  {build.id:>5}  {build.started:<19} {status:>6} {wall:>8} {build.compiles:>8} "
+                         f"{build.compile_time:>9.2f} {cpu:>8} {rate(build.cache_hit_rate):>6}")
+        
+        trend = self.compile_trend()
+        if trend is not None:
+            direction = "slower" if trend > 0 else "faster"
+            lines.append(f"Compile time trend: {abs(trend) * 100:.0f}% {direction} per compile "
+                         f"(newer vs older half of these builds)")
+        if self.cache_hit_rate is not None:
+            lines.append(f"Object cache: {self.cache_hits}/{self.cache_hits + self.cache_misses} hits "
+                         f"({rate(self.cache_hit_rate)})")
+        
+        if self.slowest:
+            lines.append("")
+            lines.append("Slowest compiles (latest run):")
+            for summary in self.slowest:
+                lines.append(f"  {summary.last_time:8.2f} s  (median {summary.median_time:.2f} s, "
+                             f"{summary.runs} run(s))  {summary.output}")
+        
+        lines.append("")
+        if self.regressions:
+            lines.append(f"Regressions (more than {self.threshold * 100:.0f}% slower than their rolling median):")
+            for summary in self.regressions:
+                lines.append(f"  +{summary.change * 100:5.0f}%  {summary.median_time:.2f} s -> "
+                             f"{summary.last_time:.2f} s  {summary.output}")
+        else:
+            lines.append(f"No compile is more than {self.threshold * 100:.0f}% slower than its rolling median.")
+        return "\n".join(lines)
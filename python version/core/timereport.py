@@ -0,0 +1,153 @@
+"""Aggregation of Clang -ftime-trace files into a compile hotspot report."""
+
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+import json
+
+# Optimization and code generation events; their "detail" is a pass or a
+# function name depending on the event, so they are keyed by event name
+_BACKEND_EVENTS = {"RunPass", "OptFunction", "OptModule", "CodeGen Function", "RunLoopPass"}
+# Template instantiation events
+_TEMPLATE_EVENTS = {"InstantiateClass", "InstantiateFunction"}
+
+
+class TimeReport:
+    """
+    Merges per-translation-unit -ftime-trace files.
+    
+    Clang writes one Chrome trace per object (<object>.json). Times are
+    summed across all TUs, keyed by:
+    
+    - headers: "Source" events, i.e. time spent parsing a header including
+      everything it includes (inclusive, so nested headers count again)
+    - templates: "InstantiateClass"/"InstantiateFunction" events by name
+    - backend: optimization and code generation events by event name
+      (OptModule, OptFunction, RunPass, ...)
+    - units: total "ExecuteCompiler" time of each TU
+    
+    All times are in microseconds, as in the trace files.
+    """
+    
+    def __init__(self):
+        """Initialize an empty report."""
+        self.headers: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.templates: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.backend: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.units: Dict[str, float] = {}
+        self.files = 0
+    
+    def add_file(self, trace_file: Path, unit: str) -> bool:
+        """
+        Add one -ftime-trace file to the report.
+        
+        Args:
+            trace_file: Path to the JSON file clang wrote.
+            unit: Name of the translation unit it belongs to.
+        
+        Returns:
+            True if the file was read, False if it is missing or invalid.
+        """
+        try:
+            with open(trace_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        for event in data.get("traceEvents", []):
+            if event.get("ph") != "X":
+                continue
+            name = event.get("name", "")
+            duration = float(event.get("dur", 0))
+            detail = event.get("args", {}).get("detail", "")
+            
+            if name == "Source" and detail:
+                entry = self.headers[detail]
+            elif name in _TEMPLATE_EVENTS and detail:
+                entry = self.templates[detail]
+            elif name in _BACKEND_EVENTS:
+                entry = self.backend[name]
+            elif name.startswith("Total "):
+                self.totals[name[len("Total "):]] += duration
+                continue
+            elif name == "ExecuteCompiler":
+                self.units[unit] = self.units.get(unit, 0.0) + duration
+                continue
+            else:
+                continue
+            entry[0] += duration
+            entry[1] += 1
+        
+        self.files += 1
+        return True
+    
+    @staticmethod
+    def _top(table: Dict[str, List[float]], limit: int) -> List[Tuple[str, float, int]]:
+        """Get the most expensive entries of a table."""
+        ranked = sorted(table.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [(name, total, int(count)) for name, (total, count) in ranked]
+    
+    def to_dict(self, limit: int = 20) -> dict:
+        """
+        Get the report as JSON-serializable data.
+        
+        Args:
+            limit: Entries kept per section.
+        
+        Returns:
+            Report dictionary (times in milliseconds).
+        """
+        def rows(entries: Iterable[Tuple[str, float, int]]) -> List[dict]:
+            return [{"name": name, "total_ms": total / 1000.0, "count": count} for name, total, count in entries]
+        
+        units = sorted(self.units.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return {
+            "files": self.files,
+            "totals_ms": {name: total / 1000.0 for name, total in sorted(self.totals.items())},
+            "headers": rows(self._top(self.headers, limit)),
+            "templates": rows(self._top(self.templates, limit)),
+            "backend": rows(self._top(self.backend, limit)),
+            "units": [{"name": name, "total_ms": total / 1000.0} for name, total in units],
+        }
+    
+    def format(self, limit: int = 10) -> str:
+        """
+        Format the report for the console.
+        
+        Args:
+            limit: Entries shown per section.
+        
+        Returns:
+            Multi-line report text.
+        """
+        lines = [f"Compile time report ({self.files} translation unit(s))"]
+        
+        if self.totals:
+            lines.append("")
+            lines.append("Phases (all TUs):")
+            for name in ("Frontend", "Backend", "ExecuteCompiler"):
+                if name in self.totals:
+                    lines.append(f"  {self.totals[name] / 1000.0:10.1f} ms  {name}")
+        
+        sections = [
+            ("Most expensive headers (inclusive parse time):", self.headers),
+            ("Most expensive template instantiations:", self.templates),
+            ("Most expensive backend phases:", self.backend),
+        ]
+        for title, table in sections:
+            top = self._top(table, limit)
+            if not top:
+                continue
+            lines.append("")
+            lines.append(title)
+            for name, total, count in top:
+                lines.append(f"  {total / 1000.0:10.1f} ms  {count:5d}x  {name}")
+        
+        if self.units:
+            lines.append("")
+            lines.append("Slowest translation units:")
+            for name, total in sorted(self.units.items(), key=lambda item: item[1], reverse=True)[:limit]:
+                lines.append(f"  {total / 1000.0:10.1f} ms  {name}")
+        
+        return "\n".join(lines)
@@ -0,0 +1,127 @@
+"""Build timeline recording in Chrome trace-event format."""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    """
+    Records build phases as Chrome trace "complete" events.
+    
+    Every span becomes an "X" event on the lane of the thread that ran it:
+    lane 0 is the main thread and each worker thread gets its own lane, so
+    the saved file shows idle workers, stragglers and serial phases when
+    opened in Perfetto (ui.perfetto.dev) or chrome://tracing.
+    
+    A disabled tracer records nothing and its spans cost next to nothing,
+    so code can always be instrumented.
+    """
+    
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize tracer.
+        
+        Args:
+            enabled: Whether spans are recorded.
+        """
+        self.enabled = enabled
+        self._events: List[Dict[str, Any]] = []
+        self._lanes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+    
+    def _lane(self) -> int:
+        """Get the lane of the calling thread (0 for the main thread)."""
+        ident = threading.get_ident()
+        lane = self._lanes.get(ident)
+        if lane is None:
+            with self._lock:
+                lane = self._lanes.get(ident)
+                if lane is None:
+                    if threading.current_thread() is threading.main_thread():
+                        lane = 0
+                    else:
+                        lane = max(self._lanes.values(), default=0) + 1
+                    self._lanes[ident] = lane
+        return lane
+    
+    @contextmanager
+    def span(self, name: str, category: str = "build", **args: Any) -> Iterator[None]:
+        """
+        Record the time spent inside the block.
+        
+        Args:
+            name: Span name shown on the timeline.
+            category: Event category (e.g. "compile", "cache", "link").
+            **args: Extra values shown when the span is selected.
+        """
+        if not self.enabled:
+            yield
+            return
+        
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter_ns()
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (started - self._origin_ns) / 1000.0,
+                "dur": (ended - started) / 1000.0,
+                "pid": self._pid,
+                "tid": self._lane(),
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            with self._lock:
+                self._events.append(event)
+    
+    def clear(self) -> None:
+        """Drop recorded events (watch mode writes one trace per build)."""
+        with self._lock:
+            self._events.clear()
+            self._lanes.clear()
+            self._origin_ns = time.perf_counter_ns()
+    
+    def save(self, path: Path) -> None:
+        """
+        Write the recorded events as a Chrome trace-event JSON file.
+        
+        Args:
+            path: Output file path.
+        """
+        with self._lock:
+            events = sorted(self._events, key=lambda e: (e["tid"], e["ts"]))
+            lanes = sorted(set(self._lanes.values()) | {0})
+        
+        metadata: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0, "args": {"name": "sugar build"}},
+        ]
+        for lane in lanes:
+            metadata.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": lane,
+                "args": {"name": "main" if lane == 0 else f"worker {lane}"},
+            })
+            metadata.append({
+                "name": "thread_sort_index",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": lane,
+                "args": {"sort_index": lane},
+            })
+        
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
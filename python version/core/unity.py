@@ -0,0 +1,222 @@
+"""Unity (jumbo) build batching."""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import json
+import math
+import os
+
+
+def split_batches(source_files: Sequence[Path], costs: Dict[str, float], batch_size: int) -> List[List[Path]]:
+    """
+    Split source files into batches of roughly equal cost.
+    
+    Files keep their (sorted) order so batch membership only moves where
+    files are added or removed. A batch is closed once it holds batch_size
+    files or reaches the average batch cost.
+    
+    Args:
+        source_files: Files to batch.
+        costs: Estimated cost keyed by source path.
+        batch_size: Maximum files per batch.
+    
+    Returns:
+        List of batches.
+    """
+    files = sorted(source_files, key=str)
+    if not files:
+        return []
+    batch_count = math.ceil(len(files) / batch_size)
+    target = sum(costs.get(str(f), 1.0) for f in files) / batch_count
+    
+    batches: List[List[Path]] = [[]]
+    batch_cost = 0.0
+    for f in files:
+        if len(batches[-1]) >= batch_size or (batches[-1] and batch_cost >= target):
+            batches.append([])
+            batch_cost = 0.0
+        batches[-1].append(f)
+        batch_cost += costs.get(str(f), 1.0)
+    return batches
+
+
+class UnityBuild:
+    """
+    Generated unity sources that each #include several translation units.
+    
+    The batch plan is kept in <build_dir>/unity/plan.json together with the
+    (mtime, size) stamp of every member, so batches stay stable between
+    builds. A member whose stamp changed is moved out of its batch and
+    compiled on its own from then on: the first edit recompiles the
+    (now smaller) batch plus the file, later edits only the file. New files
+    start out isolated as well. Other batches are left alone, and a member
+    left on its own stays in the plan as a batch of one (compiled directly,
+    without a unity source). Once too many files have been isolated by edits
+    the plan is re-balanced from scratch.
+    
+    Batch files are named after a hash of their members, so a batch whose
+    members did not change keeps its name and its object file. The files of
+    batches dropped from the plan (source, object, depfile, log) are deleted.
+    """
+    
+    DIRNAME = "unity"
+    PLAN_FILE = "plan.json"
+    
+    def __init__(self, build_dir: Path, batch_size: int):
+        """
+        Initialize unity build.
+        
+        Args:
+            build_dir: Build directory (batches go to <build_dir>/unity).
+            batch_size: Maximum translation units per batch.
+        """
+        self.directory = Path(build_dir) / self.DIRNAME
+        self.batch_size = batch_size
+        self.batches: List[List[Path]] = []  # Batches compiled through a unity source
+        self.isolated: List[Path] = []  # Files compiled on their own
+        self._plan_batches: List[List[Path]] = []  # All batches of the plan, batches of one included
+        self._edited: List[Path] = []  # Files isolated because they changed or are new
+        self.removed: List[Path] = []  # Sources of batches dropped from the plan (files deleted)
+    
+    @property
+    def plan_path(self) -> Path:
+        """Path of the persisted batch plan."""
+        return self.directory / self.PLAN_FILE
+    
+    @staticmethod
+    def _stamp(path: Path) -> Optional[List[int]]:
+        """Get the [mtime_ns, size] stamp of a file."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+    
+    @classmethod
+    def planned_files(cls, build_dir: Path) -> List[str]:
+        """
+        Get the translation units covered by the persisted plan of a target.
+        
+        Args:
+            build_dir: Build directory of the target.
+        
+        Returns:
+            Batch members and isolated files (empty without a plan).
+        """
+        try:
+            with open(Path(build_dir) / cls.DIRNAME / cls.PLAN_FILE, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+        except (OSError, ValueError):
+            return []
+        files = [member for batch in plan.get("batches", []) for member in batch]
+        return files + plan.get("isolated", [])
+    
+    def _load_plan(self) -> Optional[dict]:
+        """Read the previous plan if it was made with the same batch size."""
+        try:
+            with open(self.plan_path, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if plan.get("batch_size") != self.batch_size:
+            return None
+        return plan
+    
+    def plan(self, source_files: Sequence[Path], costs: Dict[str, float]) -> List[Path]:
+        """
+        Update the batch plan for the current source files.
+        
+        Args:
+            source_files: Translation units that may be batched.
+            costs: Estimated compile cost keyed by source path.
+        
+        Returns:
+            Units to compile: batch sources followed by isolated files.
+        """
+        current = {str(f): f for f in source_files}
+        previous = self._load_plan()
+        
+        batches: List[List[Path]] = []
+        isolated: List[Path] = []
+        if previous is not None:
+            stamps = previous.get("stamps", {})
+            placed = set()
+            for members in previous.get("batches", []):
+                batch = []
+                for member in members:
+                    if member not in current:
+                        continue
+                    placed.add(member)
+                    if stamps.get(member) == self._stamp(current[member]):
+                        batch.append(current[member])
+                    else:
+                        isolated.append(current[member])
+                if batch:
+                    batches.append(batch)
+            for member in previous.get("isolated", []):
+                if member in current and member not in placed:
+                    placed.add(member)
+                    isolated.append(current[member])
+            isolated.extend(f for path, f in current.items() if path not in placed)
+        
+        # Re-balance from scratch when there is no plan or too many files were
+        # edited; members merely left alone in their batch do not count
+        if previous is None or len(isolated) > max(self.batch_size, len(current) // 4):
+            batches = split_batches(list(current.values()), costs, self.batch_size)
+            isolated = []
+        
+        # A batch of one is compiled as the file itself
+        self._plan_batches = batches
+        self._edited = sorted(isolated, key=str)
+        self.batches = [batch for batch in batches if len(batch) > 1]
+        self.isolated = sorted(isolated + [batch[0] for batch in batches if len(batch) == 1], key=str)
+        self._save_plan()
+        return self._write_batches() + self.isolated
+    
+    def _save_plan(self) -> None:
+        """Persist the plan with the current stamp of every batch member."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        plan = {
+            "batch_size": self.batch_size,
+            "batches": [[str(f) for f in batch] for batch in self._plan_batches],
+            "isolated": [str(f) for f in self._edited],
+            "stamps": {str(f): self._stamp(f) for batch in self._plan_batches for f in batch},
+        }
+        tmp_path = self.plan_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(plan, f)
+        os.replace(tmp_path, self.plan_path)
+    
+    def _write_batches(self) -> List[Path]:
+        """Write batch sources (only when changed) and delete the files of stale ones."""
+        paths = []
+        for batch in self.batches:
+            members = [str(f.resolve().as_posix()) for f in batch]
+            name = hashlib.blake2b("\0".join(members).encode("utf-8"), digest_size=6).hexdigest()
+            path = self.directory / f"unity_{name}.cpp"
+            lines = ["// Generated by SugarBuilder unity build; do not edit."]
+            lines.extend(f'#include "{member}"' for member in members)
+            content = "\n".join(lines) + "\n"
+            try:
+                unchanged = path.read_text(encoding="utf-8") == content
+            except OSError:
+                unchanged = False
+            if not unchanged:
+                path.write_text(content, encoding="utf-8")
+            paths.append(path)
+        
+        # Everything compiled from a batch shares its name: unity_<hash>.o, .d, .o.log
+        keep = {p.stem for p in paths}
+        stale = set()
+        for path in self.directory.glob("unity_*"):
+            batch = path.name.split(".", 1)[0]
+            if batch in keep:
+                continue
+            stale.add(batch)
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        self.removed = [self.directory / f"{batch}.cpp" for batch in sorted(stale)]
+        return paths
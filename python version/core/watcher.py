@@ -0,0 +1,296 @@
+"""File system watching for watch-mode builds."""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+
+class FileWatcher:
+    """
+    Base class for file watchers.
+    
+    Watches directories recursively plus individual files (via their
+    parent directory, so editors that save by renaming are handled).
+    """
+    
+    def __init__(self, directories: Iterable[Path], files: Iterable[Path] = (), ignore: Iterable[Path] = ()):
+        """
+        Initialize watcher.
+        
+        Args:
+            directories: Directories to watch recursively.
+            files: Individual files to watch.
+            ignore: Directories whose contents are never reported (e.g. build output).
+        """
+        self.directories = [Path(d) for d in directories if Path(d).is_dir()]
+        self.files = [Path(f) for f in files]
+        self._file_names = {os.path.normpath(str(f)) for f in self.files}
+        self._ignore = [os.path.normpath(str(p)) + os.sep for p in ignore]
+    
+    def _is_relevant(self, path: str, from_file_watch: bool) -> bool:
+        """Check whether an event for path should be reported."""
+        path = os.path.normpath(path)
+        if from_file_watch and path not in self._file_names:
+            return False
+        return not any((path + os.sep).startswith(prefix) for prefix in self._ignore)
+    
+    def poll(self, timeout: float) -> Set[Path]:
+        """
+        Wait up to timeout seconds for changes.
+        
+        Args:
+            timeout: Seconds to wait.
+        
+        Returns:
+            Set of changed paths (empty if nothing changed).
+        """
+        raise NotImplementedError("Subclasses must implement poll()")
+    
+    def wait_for_changes(self, debounce: float = 0.2) -> Set[Path]:
+        """
+        Block until something changes and the changes settle.
+        
+        After the first change, keeps collecting until no new change has
+        arrived for `debounce` seconds, so one save (or a branch switch)
+        triggers one rebuild.
+        
+        Args:
+            debounce: Quiet period in seconds.
+        
+        Returns:
+            Set of changed paths.
+        """
+        changed: Set[Path] = set()
+        while not changed:
+            changed = self.poll(1.0)
+        while True:
+            more = self.poll(debounce)
+            if not more:
+                return changed
+            changed |= more
+    
+    def close(self) -> None:
+        """Release watcher resources."""
+        pass
+
+
+class PollingWatcher(FileWatcher):
+    """Portable watcher that compares (mtime, size) snapshots."""
+    
+    def __init__(self, directories: Iterable[Path], files: Iterable[Path] = (), ignore: Iterable[Path] = (),
+                 interval: float = 0.5):
+        """
+        Initialize polling watcher.
+        
+        Args:
+            directories: Directories to watch recursively.
+            files: Individual files to watch.
+            ignore: Directories whose contents are never reported.
+            interval: Seconds between snapshots.
+        """
+        super().__init__(directories, files, ignore)
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+    
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """Stat every watched file."""
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        stack = [str(d) for d in self.directories]
+        while stack:
+            directory = stack.pop()
+            if not self._is_relevant(directory, False):
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        for f in self.files:
+            try:
+                st = os.stat(f)
+                snapshot[str(f)] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                pass
+        return snapshot
+    
+    def poll(self, timeout: float) -> Set[Path]:
+        """Take snapshots until something differs or timeout expires."""
+        deadline = time.monotonic() + timeout
+        while True:
+            time.sleep(min(self.interval, max(0.0, deadline - time.monotonic())))
+            snapshot = self._take_snapshot()
+            changed = {
+                Path(path)
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path) and self._is_relevant(path, False)
+            }
+            self._snapshot = snapshot
+            if changed or time.monotonic() >= deadline:
+                return changed
+
+
+class InotifyWatcher(FileWatcher):
+    """Linux watcher using inotify through ctypes (no third-party packages)."""
+    
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    
+    EVENT_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                  | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+    
+    _EVENT_HEADER = struct.Struct("iIII")
+    
+    def __init__(self, directories: Iterable[Path], files: Iterable[Path] = (), ignore: Iterable[Path] = ()):
+        """
+        Initialize inotify watcher.
+        
+        Raises:
+            OSError: If inotify is not available.
+        """
+        super().__init__(directories, files, ignore)
+        self._libc = self._load_libc()
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        
+        self._watches: Dict[int, Tuple[str, bool]] = {}
+        for directory in self.directories:
+            self._add_tree(str(directory))
+        for parent in {os.path.dirname(str(f)) or "." for f in self.files}:
+            self._add_watch(parent, from_file_watch=True)
+    
+    @staticmethod
+    def _load_libc():
+        """Load libc and check that it provides inotify."""
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("libc does not provide inotify")
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    
+    def _add_watch(self, path: str, from_file_watch: bool = False) -> None:
+        """Add an inotify watch on one directory."""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.EVENT_MASK)
+        if wd < 0:
+            return
+        existing = self._watches.get(wd)
+        if existing is not None:
+            # Same directory watched twice: a full directory watch wins
+            self._watches[wd] = (existing[0], existing[1] and from_file_watch)
+        else:
+            self._watches[wd] = (path, from_file_watch)
+    
+    def _add_tree(self, root: str) -> List[str]:
+        """
+        Add watches on a directory and all of its subdirectories.
+        
+        Args:
+            root: Directory to watch.
+        
+        Returns:
+            Files already in the tree. For a directory created or moved in
+            while watching, no event will ever report them.
+        """
+        if not self._is_relevant(root, False):
+            return []
+        self._add_watch(root)
+        files: List[str] = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if self._is_relevant(os.path.join(dirpath, d), False)]
+            for d in dirnames:
+                self._add_watch(os.path.join(dirpath, d))
+            files.extend(os.path.join(dirpath, f) for f in filenames)
+        return files
+    
+    def poll(self, timeout: float) -> Set[Path]:
+        """Wait for inotify events and return the changed paths."""
+        changed: Set[Path] = set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return changed
+        
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        
+        offset = 0
+        while offset + self._EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped; report every watched root as changed
+                changed.update(self.directories)
+                changed.update(self.files)
+                continue
+            
+            directory, from_file_watch = self._watches.get(wd, (None, False))
+            if directory is None:
+                continue
+            path = os.path.join(directory, name) if name else directory
+            
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO) and not from_file_watch:
+                # Report what the new tree already holds as created files
+                changed.update(Path(f) for f in self._add_tree(path) if self._is_relevant(f, False))
+                continue
+            if mask & self.IN_ISDIR:
+                continue
+            if self._is_relevant(path, from_file_watch):
+                changed.add(Path(path))
+        return changed
+    
+    def close(self) -> None:
+        """Close the inotify file descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(directories: Iterable[Path], files: Iterable[Path] = (), ignore: Iterable[Path] = ()) -> FileWatcher:
+    """
+    Create the best available file watcher.
+    
+    Uses inotify on Linux and falls back to polling elsewhere (or when
+    inotify cannot be initialized, e.g. watch limits are exhausted).
+    
+    Args:
+        directories: Directories to watch recursively.
+        files: Individual files to watch.
+        ignore: Directories whose contents are never reported.
+    
+    Returns:
+        FileWatcher instance.
+    """
+    directories = list(directories)
+    files = list(files)
+    ignore = list(ignore)
+    try:
+        return InotifyWatcher(directories, files, ignore)
+    except (OSError, AttributeError):
+        return PollingWatcher(directories, files, ignore)
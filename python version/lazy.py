@@ -0,0 +1,47 @@
+"""Lazy imports of a package's public names (PEP 562)."""
+
+from __future__ import annotations
+
+from importlib import import_module
+
+# Packages load this for `sugar --help` too, which must not import typing
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_module(
+    namespace: Dict[str, Any],
+    imports: Dict[str, str],
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Create the module __getattr__ and __dir__ of a package with lazy names.
+    
+    A name is imported from its module the first time it is used and then
+    stored in the package, so later lookups don't come back here. Packages
+    use this so that `sugar --help` and light commands don't load modules
+    (and their heavy imports) they never use.
+    
+    Args:
+        namespace: The package's globals().
+        imports: Module defining each lazy name, relative to the package
+            or absolute.
+    
+    Returns:
+        Tuple of (__getattr__, __dir__) to assign in the package.
+    """
+    package = namespace["__name__"]
+    
+    def __getattr__(name: str) -> Any:
+        """Import a public name from its module the first time it is used."""
+        module = imports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(module, package), name)
+        namespace[name] = value
+        return value
+    
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(namespace.get("__all__", ())))
+    
+    return __getattr__, __dir__
@@ -1,9 +1,14 @@
 """Toolchain module for SugarBuilder."""
 
-from .base import Toolchain
-from .msvc import MSVCToolchain
-from .gcc import GCCToolchain
-from .clang import ClangToolchain
+from ..lazy import lazy_module
+
+# Only the configured compiler's toolchain module gets imported
+_LAZY_IMPORTS = {
+    "Toolchain": ".base",
+    "MSVCToolchain": ".msvc",
+    "GCCToolchain": ".gcc",
+    "ClangToolchain": ".clang",
+}
 
 __all__ = [
     "Toolchain",
@@ -11,3 +16,6 @@ __all__ = [
     "GCCToolchain",
     "ClangToolchain",
 ]
+
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
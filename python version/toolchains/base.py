@@ -1,7 +1,9 @@
 """Base toolchain abstraction."""
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
+from src.core.output import DEFAULT_MAX_OUTPUT_BYTES, display_path
+from .probe import ToolchainProbe
 
 
 class Toolchain:
@@ -11,6 +13,12 @@ class Toolchain:
     Defines interface for compiling sources and linking object files.
     """
     
+    # Environment variables that change what the compiler does (part of the probe cache key)
+    PROBE_ENV_VARS: Tuple[str, ...] = ()
+    
+    # The module scanner prints its P1689 output instead of writing the file
+    MODULE_SCAN_TO_STDOUT = False
+    
     def __init__(self, name: str):
         """
         Initialize toolchain.
@@ -19,6 +27,11 @@ class Toolchain:
             name: Toolchain name (MSVC, GCC, Clang).
         """
         self.name = name
+        self._probe: Optional[ToolchainProbe] = None
+        # Output of one compile or link shown before the rest goes to a log
+        self.max_output_bytes = DEFAULT_MAX_OUTPUT_BYTES
+        # Where logs of linked outputs go (object logs sit beside the object)
+        self.log_dir: Optional[Path] = None
     
     def compile_object(
         self,
@@ -26,6 +39,7 @@ class Toolchain:
         output_file: Path,
         include_dirs: Optional[List[Path]] = None,
         flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
     ) -> bool:
         """
         Compile a source file to an object file.
@@ -35,12 +49,391 @@ class Toolchain:
             output_file: Path to output object file.
             include_dirs: Optional list of include directories.
             flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
             
         Returns:
             True if compilation succeeded, False otherwise.
         """
         raise NotImplementedError("Subclasses must implement compile_object()")
     
+    def get_compile_command(
+        self,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Get the exact command line compile_object() runs.
+        
+        Args:
+            source_file: Path to source file.
+            output_file: Path to output object file.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            Compiler command as a list of arguments.
+        """
+        raise NotImplementedError("Subclasses must implement get_compile_command()")
+    
+    def get_preprocess_command(
+        self,
+        source_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Get a command that writes the preprocessed source to stdout.
+        
+        Args:
+            source_file: Path to source file.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            
+        Returns:
+            Preprocessor command as a list of arguments.
+        """
+        raise NotImplementedError("Subclasses must implement get_preprocess_command()")
+    
+    def get_pch_extension(self) -> Optional[str]:
+        """
+        Get file extension of precompiled headers.
+        
+        Returns:
+            Extension appended to the header name (e.g., '.gch'), or None if
+            the toolchain does not support precompiled headers.
+        """
+        return None
+    
+    def get_pch_command(
+        self,
+        header_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Get the command that precompiles a header.
+        
+        Args:
+            header_file: Path to header to precompile.
+            output_file: Path to output precompiled header.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags (must match the TUs using it).
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            Compiler command as a list of arguments.
+        """
+        raise NotImplementedError(f"{self.name} does not support precompiled headers")
+    
+    def get_pch_flags(self, header_file: Path, pch_file: Path) -> List[str]:
+        """
+        Get the flags that make a compile use a precompiled header.
+        
+        Args:
+            header_file: Path to the precompiled header's source.
+            pch_file: Path to the precompiled header.
+            
+        Returns:
+            Compiler flags to add to every compile command.
+        """
+        raise NotImplementedError(f"{self.name} does not support precompiled headers")
+    
+    def compile_pch(
+        self,
+        header_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> bool:
+        """
+        Precompile a header.
+        
+        Args:
+            header_file: Path to header to precompile.
+            output_file: Path to output precompiled header.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            True if precompilation succeeded, False otherwise.
+        """
+        cmd = self.get_pch_command(header_file, output_file, include_dirs, flags, depfile)
+        
+        print(f"[{self.name}] Precompiling {header_file} -> {output_file}")
+        
+        try:
+            return self.run_tool(cmd, display_path(header_file), self.get_log_file(output_file)) == 0
+        except FileNotFoundError:
+            print(f"  Error: {cmd[0]} not found. Ensure {self.name} is installed and in PATH")
+            return False
+        except Exception as e:
+            print(f"  Error: {e}")
+            return False
+    
+    def run_tool(
+        self,
+        cmd: List[str],
+        label: str,
+        log_file: Optional[Path] = None,
+        stdout_file: Optional[Path] = None,
+    ) -> int:
+        """
+        Run a compiler or linker, streaming its output.
+        
+        stdout and stderr are merged and read line by line, so diagnostics
+        show up while the tool is still running (attributed to label when
+        jobs run in parallel). Output beyond max_output_bytes is written to
+        log_file instead of the console. The tool's resource usage is added
+        to the calling thread's track_usage() block.
+        
+        Args:
+            cmd: Command to run.
+            label: Name the output is attributed to, usually the source path
+                (see display_path()).
+            log_file: Where output beyond the limit is written.
+            stdout_file: Write stdout to this file instead (only stderr is
+                then shown), for tools whose result is their output.
+        
+        Returns:
+            Exit status of the tool.
+        
+        Raises:
+            FileNotFoundError: If the tool is not installed.
+        """
+        import subprocess
+        from src.core.output import ActionOutput
+        from src.core.resources import wait_process
+        
+        output = ActionOutput(label, log_file, self.max_output_bytes)
+        result = open(stdout_file, "w", encoding="utf-8") if stdout_file is not None else None
+        try:
+            with subprocess.Popen(
+                cmd,
+                stdout=result if result is not None else subprocess.PIPE,
+                stderr=subprocess.PIPE if result is not None else subprocess.STDOUT,
+                text=True,
+                errors="replace",
+            ) as process:
+                for line in process.stderr if result is not None else process.stdout:
+                    output.write(line)
+                return wait_process(process)
+        finally:
+            output.close()
+            if result is not None:
+                result.close()
+    
+    def get_log_file(self, output_file: Path) -> Path:
+        """
+        Get the log that receives the overflow of the action producing output_file.
+        
+        Objects and precompiled headers live in the build directory, whose
+        layout mirrors the sources, so their log sits beside them. Linked
+        outputs go to log_dir when set.
+        
+        Args:
+            output_file: File the action produces.
+        
+        Returns:
+            Log file path.
+        """
+        directory = output_file.parent
+        if self.log_dir is not None and output_file.suffix != self.get_object_extension():
+            directory = self.log_dir
+        return directory / f"{output_file.name}.log"
+    
+    def get_bmi_extension(self) -> Optional[str]:
+        """
+        Get file extension of built module interfaces (BMIs).
+        
+        Returns:
+            Extension of the file a C++20 module interface compiles to
+            besides its object (e.g., '.gcm'), or None if the toolchain
+            cannot build named modules.
+        """
+        return None
+    
+    def get_module_scan_command(
+        self,
+        source_file: Path,
+        scan_file: Path,
+        object_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Get the command that scans a source for the modules it provides and imports.
+        
+        Args:
+            source_file: Path to source file.
+            scan_file: Path of the P1689 dependency file to write.
+            object_file: Path of the object the source compiles to.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            Scanner command as a list of arguments.
+        """
+        raise NotImplementedError(f"{self.name} does not support C++20 modules")
+    
+    def scan_module_dependencies(
+        self,
+        source_file: Path,
+        scan_file: Path,
+        object_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> bool:
+        """
+        Scan a source for the modules it provides and imports.
+        
+        Args:
+            source_file: Path to source file.
+            scan_file: Path of the P1689 dependency file to write.
+            object_file: Path of the object the source compiles to.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            True if scanning succeeded, False otherwise.
+        """
+        cmd = self.get_module_scan_command(source_file, scan_file, object_file, include_dirs, flags, depfile)
+        
+        print(f"[{self.name}] Scanning {source_file}")
+        
+        try:
+            # Scan files sit beside their object, like its log
+            log_file = scan_file.with_name(f"{scan_file.name}.log")
+            stdout_file = scan_file if self.MODULE_SCAN_TO_STDOUT else None
+            return self.run_tool(cmd, display_path(source_file), log_file, stdout_file) == 0
+        except FileNotFoundError:
+            print(f"  Error: {cmd[0]} not found. Ensure {self.name} is installed and in PATH")
+            return False
+        except Exception as e:
+            print(f"  Error: {e}")
+            return False
+    
+    def get_module_flags(
+        self,
+        map_file: Path,
+        bmi_files: Dict[str, Path],
+        provides: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Get the flags that compile a translation unit of a modules build.
+        
+        Args:
+            map_file: Module map written by write_module_map() (for
+                compilers that look BMIs up through one).
+            bmi_files: BMI of the module the unit provides and of every
+                module it imports, directly or indirectly.
+            provides: Module the unit provides, if any.
+            
+        Returns:
+            Compiler flags for the unit.
+        """
+        raise NotImplementedError(f"{self.name} does not support C++20 modules")
+    
+    def write_module_map(self, map_file: Path, bmi_files: Dict[str, Path]) -> None:
+        """
+        Write the module map of a target, for compilers that read one.
+        
+        Args:
+            map_file: Path of the map.
+            bmi_files: BMI of every module the target's units may import.
+        """
+    
+    def get_time_trace_flags(self) -> Optional[List[str]]:
+        """
+        Get compiler flags that write a per-TU time trace.
+        
+        Returns:
+            Flags to add to compile commands, or None if the toolchain
+            cannot produce time traces.
+        """
+        return None
+    
+    def get_time_trace_file(self, object_file: Path) -> Path:
+        """
+        Get the time trace written for an object file.
+        
+        Args:
+            object_file: Path to object file.
+            
+        Returns:
+            Path of the trace file.
+        """
+        return object_file.with_suffix(".json")
+    
+    def get_probe(self) -> ToolchainProbe:
+        """
+        Get what is known about the installed compiler.
+        
+        Detection runs once per toolchain instance, and its result is kept
+        in the probe cache so later builds skip it entirely.
+        
+        Returns:
+            Probe of the compiler (path, version, target, include dirs).
+        """
+        if self._probe is None:
+            from .probe import default_probe_cache
+            
+            cache = default_probe_cache()
+            if cache is None:
+                self._probe = self._detect()
+            else:
+                self._probe = cache.get(self.name, self.PROBE_ENV_VARS, self._probe_stamp_files(), self._detect)
+        return self._probe
+    
+    def get_version(self) -> str:
+        """
+        Get the compiler version string.
+        
+        Returns:
+            Version banner reported by the compiler (empty if unavailable).
+        """
+        return self.get_probe().version
+    
+    def get_fingerprint(self) -> str:
+        """
+        Identify the compiler for signatures and cache keys.
+        
+        Returns:
+            Toolchain name, version banner and target combined.
+        """
+        return self.get_probe().fingerprint
+    
+    def _probe_stamp_files(self) -> List[str]:
+        """
+        Get the files whose change invalidates a cached probe.
+        
+        Must be cheap: it runs on every build, before the cache lookup.
+        
+        Returns:
+            File paths (usually the resolved compiler binary).
+        """
+        return []
+    
+    def _detect(self) -> ToolchainProbe:
+        """
+        Detect the installed compiler (uncached).
+        
+        Returns:
+            Probe result; an empty path means no compiler was found.
+        """
+        raise NotImplementedError("Subclasses must implement _detect()")
+    
     def link_executable(
         self,
         object_files: List[Path],
@@ -1,13 +1,22 @@
 """Clang/LLVM toolchain."""
 
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+import os
+from src.core.modules import MODULE_INTERFACE_EXTENSIONS
+from src.core.output import display_path
 from .base import Toolchain
+from .probe import ToolchainProbe, probe_gnu_driver
 
 
 class ClangToolchain(Toolchain):
     """Clang/LLVM toolchain (clang++, lld, llvm-ar)."""
     
+    # Variables the driver reads for include and library search
+    PROBE_ENV_VARS = ("CPATH", "CPLUS_INCLUDE_PATH", "C_INCLUDE_PATH", "LIBRARY_PATH", "COMPILER_PATH", "GCC_EXEC_PREFIX")
+    
+    MODULE_SCAN_TO_STDOUT = True
+    
     def __init__(self):
         """Initialize Clang toolchain."""
         super().__init__("Clang")
@@ -18,25 +27,61 @@ class ClangToolchain(Toolchain):
         output_file: Path,
         include_dirs: Optional[List[Path]] = None,
         flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
     ) -> bool:
         """
         Compile source with clang++.
         
-        Invokes: clang++ -c -o <output> [-I<include>] [flags] <source>
+        Invokes: clang++ -c -o <output> [-I<include>] [flags] [-MMD -MF <depfile>] <source>
         
         Args:
             source_file: Path to source file.
             output_file: Path to output object file.
             include_dirs: Optional list of include directories.
             flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
             
         Returns:
             True if compilation succeeded, False otherwise.
         """
-        import subprocess
+        cmd = self.get_compile_command(source_file, output_file, include_dirs, flags, depfile)
+        
+        print(f"[Clang] Compiling {source_file} -> {output_file}")
+        
+        try:
+            return self.run_tool(cmd, display_path(source_file), self.get_log_file(output_file)) == 0
+        except FileNotFoundError:
+            print(f"  Error: clang++ not found. Ensure Clang is installed and in PATH")
+            return False
+        except Exception as e:
+            print(f"  Error: {e}")
+            return False
+    
+    def get_compile_command(
+        self,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Build the clang++ compile command.
         
-        # Build clang++ command
+        Args:
+            source_file: Path to source file.
+            output_file: Path to output object file.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            clang++ command as a list of arguments.
+        """
+        # Build clang++ command (clang++ only knows .cppm as a module interface)
         cmd = ["clang++", "-c", "-o", str(output_file), str(source_file)]
+        if source_file.suffix in MODULE_INTERFACE_EXTENSIONS and source_file.suffix != ".cppm":
+            cmd[-1:-1] = ["-x", "c++-module"]
         
         # Add include directories
         if include_dirs:
@@ -47,20 +92,157 @@ class ClangToolchain(Toolchain):
         if flags:
             cmd.extend(flags)
         
-        print(f"[Clang] Compiling {source_file} -> {output_file}")
+        # Write header dependencies (user headers only) alongside the object
+        if depfile:
+            cmd.extend(["-MMD", "-MF", str(depfile)])
         
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                print(f"  Error: {result.stderr}")
-                return False
-            return True
-        except FileNotFoundError:
-            print(f"  Error: clang++ not found. Ensure Clang is installed and in PATH")
-            return False
-        except Exception as e:
-            print(f"  Error: {e}")
-            return False
+        return cmd
+    
+    def get_preprocess_command(
+        self,
+        source_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Build the clang++ preprocess-only command.
+        
+        Invokes: clang++ -E [-I<include>] [flags] <source>
+        
+        Args:
+            source_file: Path to source file.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            
+        Returns:
+            clang++ command as a list of arguments.
+        """
+        cmd = ["clang++", "-E", str(source_file)]
+        
+        if include_dirs:
+            for inc_dir in include_dirs:
+                cmd.append(f"-I{inc_dir}")
+        
+        if flags:
+            cmd.extend(flags)
+        
+        return cmd
+    
+    def get_pch_extension(self) -> Optional[str]:
+        """Get clang++ precompiled header extension."""
+        return ".pch"
+    
+    def get_pch_command(
+        self,
+        header_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Build the clang++ command that precompiles a header.
+        
+        Invokes: clang++ -x c++-header -o <output> [-I<include>] [flags] [-MMD -MF <depfile>] <header>
+        
+        Args:
+            header_file: Path to header to precompile.
+            output_file: Path to output precompiled header.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            clang++ command as a list of arguments.
+        """
+        cmd = ["clang++", "-x", "c++-header", "-o", str(output_file), str(header_file)]
+        
+        if include_dirs:
+            for inc_dir in include_dirs:
+                cmd.append(f"-I{inc_dir}")
+        
+        if flags:
+            cmd.extend(flags)
+        
+        if depfile:
+            cmd.extend(["-MMD", "-MF", str(depfile)])
+        
+        return cmd
+    
+    def get_pch_flags(self, header_file: Path, pch_file: Path) -> List[str]:
+        """
+        Get the flags that make clang++ use a precompiled header.
+        
+        Clang loads the PCH directly with -include-pch; it must have been
+        built with the same flags as the translation unit.
+        """
+        return ["-include-pch", str(pch_file)]
+    
+    def get_time_trace_flags(self) -> Optional[List[str]]:
+        """
+        Get clang++ time trace flags.
+        
+        -ftime-trace writes a Chrome trace of the frontend and backend next
+        to each object file (<object>.json).
+        """
+        return ["-ftime-trace"]
+    
+    def get_bmi_extension(self) -> Optional[str]:
+        """Get clang++ precompiled module interface extension."""
+        return ".pcm"
+    
+    def get_module_scan_command(
+        self,
+        source_file: Path,
+        scan_file: Path,
+        object_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Build the clang-scan-deps command that prints a source's P1689 module dependencies.
+        
+        Invokes: clang-scan-deps -format=p1689 -- <clang++ compile command>
+        
+        The P1689 data goes to stdout (see MODULE_SCAN_TO_STDOUT).
+        """
+        compile_flags = ["-std=c++20"] + (flags or [])
+        return ["clang-scan-deps", "-format=p1689", "--"] + self.get_compile_command(
+            source_file, object_file, include_dirs, compile_flags, depfile
+        )
+    
+    def get_module_flags(
+        self,
+        map_file: Path,
+        bmi_files: Dict[str, Path],
+        provides: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Get the clang++ module flags of a translation unit.
+        
+        An interface unit writes its BMI along with its object through
+        -fmodule-output (Clang 16 or later); every imported module's BMI is
+        passed with -fmodule-file=<name>=<path>, so nothing is searched for.
+        """
+        flags = ["-std=c++20"]
+        for name, bmi_file in bmi_files.items():
+            if name == provides:
+                flags.append(f"-fmodule-output={bmi_file}")
+            else:
+                flags.append(f"-fmodule-file={name}={bmi_file}")
+        return flags
+    
+    def _probe_stamp_files(self) -> List[str]:
+        """Get the resolved clang++ binary (its mtime and size key the probe cache)."""
+        from shutil import which
+        
+        path = which("clang++")
+        return [os.path.realpath(path)] if path else []
+    
+    def _detect(self) -> ToolchainProbe:
+        """Probe clang++ for its version, target and default include dirs."""
+        return probe_gnu_driver("Clang", "clang++")
     
     def link_executable(
         self,
@@ -85,8 +267,6 @@ class ClangToolchain(Toolchain):
         Returns:
             True if linking succeeded, False otherwise.
         """
-        import subprocess
-        
         # Build clang++ link command
         cmd = ["clang++", "-o", str(output_file)] + [str(obj) for obj in object_files]
         
@@ -107,11 +287,7 @@ class ClangToolchain(Toolchain):
         print(f"[Clang] Linking executable: {output_file}")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                print(f"  Error: {result.stderr}")
-                return False
-            return True
+            return self.run_tool(cmd, output_file.name, self.get_log_file(output_file)) == 0
         except FileNotFoundError:
             print(f"  Error: clang++ not found. Ensure Clang is installed and in PATH")
             return False
@@ -138,8 +314,6 @@ class ClangToolchain(Toolchain):
         Returns:
             True if linking succeeded, False otherwise.
         """
-        import subprocess
-        
         # Build llvm-ar command
         cmd = ["llvm-ar", "rcs", str(output_file)] + [str(obj) for obj in object_files]
         
@@ -150,11 +324,7 @@ class ClangToolchain(Toolchain):
         print(f"[Clang] Creating static library: {output_file}")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                print(f"  Error: {result.stderr}")
-                return False
-            return True
+            return self.run_tool(cmd, output_file.name, self.get_log_file(output_file)) == 0
         except FileNotFoundError:
             print(f"  Error: llvm-ar not found. Ensure LLVM/Clang is installed and in PATH")
             return False
@@ -185,8 +355,6 @@ class ClangToolchain(Toolchain):
         Returns:
             True if linking succeeded, False otherwise.
         """
-        import subprocess
-        
         # Build clang++ link command for shared library
         cmd = ["clang++", "-shared", "-o", str(output_file)] + [str(obj) for obj in object_files]
         
@@ -207,11 +375,7 @@ class ClangToolchain(Toolchain):
         print(f"[Clang] Linking shared library: {output_file}")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                print(f"  Error: {result.stderr}")
-                return False
-            return True
+            return self.run_tool(cmd, output_file.name, self.get_log_file(output_file)) == 0
         except FileNotFoundError:
             print(f"  Error: clang++ not found. Ensure Clang is installed and in PATH")
             return False
@@ -1,13 +1,20 @@
 """GNU C++ toolchain."""
 
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+import os
+from src.core.modules import MODULE_INTERFACE_EXTENSIONS
+from src.core.output import display_path
 from .base import Toolchain
+from .probe import ToolchainProbe, probe_gnu_driver
 
 
 class GCCToolchain(Toolchain):
     """GNU C++ toolchain (g++, ld, ar)."""
     
+    # Variables the driver reads for include and library search
+    PROBE_ENV_VARS = ("CPATH", "CPLUS_INCLUDE_PATH", "C_INCLUDE_PATH", "LIBRARY_PATH", "COMPILER_PATH", "GCC_EXEC_PREFIX")
+    
     def __init__(self):
         """Initialize GCC toolchain."""
         super().__init__("GCC")
@@ -18,25 +25,61 @@ class GCCToolchain(Toolchain):
         output_file: Path,
         include_dirs: Optional[List[Path]] = None,
         flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
     ) -> bool:
         """
         Compile source with g++.
         
-        Invokes: g++ -c -o <output> [-I<include>] [flags] <source>
+        Invokes: g++ -c -o <output> [-I<include>] [flags] [-MMD -MF <depfile>] <source>
         
         Args:
             source_file: Path to source file.
             output_file: Path to output object file.
             include_dirs: Optional list of include directories.
             flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
             
         Returns:
             True if compilation succeeded, False otherwise.
         """
-        import subprocess
+        cmd = self.get_compile_command(source_file, output_file, include_dirs, flags, depfile)
+        
+        print(f"[GCC] Compiling {source_file} -> {output_file}")
+        
+        try:
+            return self.run_tool(cmd, display_path(source_file), self.get_log_file(output_file)) == 0
+        except FileNotFoundError:
+            print(f"  Error: g++ not found. Ensure GCC is installed and in PATH")
+            return False
+        except Exception as e:
+            print(f"  Error: {e}")
+            return False
+    
+    def get_compile_command(
+        self,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Build the g++ compile command.
         
-        # Build g++ command
+        Args:
+            source_file: Path to source file.
+            output_file: Path to output object file.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            g++ command as a list of arguments.
+        """
+        # Build g++ command (module interface extensions are unknown to g++)
         cmd = ["g++", "-c", "-o", str(output_file), str(source_file)]
+        if source_file.suffix in MODULE_INTERFACE_EXTENSIONS:
+            cmd[-1:-1] = ["-x", "c++"]
         
         # Add include directories
         if include_dirs:
@@ -47,20 +90,171 @@ class GCCToolchain(Toolchain):
         if flags:
             cmd.extend(flags)
         
-        print(f"[GCC] Compiling {source_file} -> {output_file}")
+        # Write header dependencies (user headers only) alongside the object
+        if depfile:
+            cmd.extend(["-MMD", "-MF", str(depfile)])
+        
+        return cmd
+    
+    def get_preprocess_command(
+        self,
+        source_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Build the g++ preprocess-only command.
+        
+        Invokes: g++ -E [-I<include>] [flags] <source>
+        
+        Args:
+            source_file: Path to source file.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            
+        Returns:
+            g++ command as a list of arguments.
+        """
+        cmd = ["g++", "-E", str(source_file)]
+        
+        if include_dirs:
+            for inc_dir in include_dirs:
+                cmd.append(f"-I{inc_dir}")
+        
+        if flags:
+            cmd.extend(flags)
         
+        return cmd
+    
+    def get_pch_extension(self) -> Optional[str]:
+        """Get g++ precompiled header extension."""
+        return ".gch"
+    
+    def get_pch_command(
+        self,
+        header_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Build the g++ command that precompiles a header.
+        
+        Invokes: g++ -x c++-header -o <output> [-I<include>] [flags] [-MMD -MF <depfile>] <header>
+        
+        Args:
+            header_file: Path to header to precompile.
+            output_file: Path to output precompiled header.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            g++ command as a list of arguments.
+        """
+        cmd = ["g++", "-x", "c++-header", "-o", str(output_file), str(header_file)]
+        
+        if include_dirs:
+            for inc_dir in include_dirs:
+                cmd.append(f"-I{inc_dir}")
+        
+        if flags:
+            cmd.extend(flags)
+        
+        if depfile:
+            cmd.extend(["-MMD", "-MF", str(depfile)])
+        
+        return cmd
+    
+    def get_pch_flags(self, header_file: Path, pch_file: Path) -> List[str]:
+        """
+        Get the flags that make g++ use a precompiled header.
+        
+        g++ picks up <header>.gch automatically when the header is included
+        with -include (and falls back to the plain header if the PCH does not
+        match the compile flags).
+        """
+        return ["-include", str(header_file), "-Winvalid-pch"]
+    
+    def get_bmi_extension(self) -> Optional[str]:
+        """Get g++ compiled module interface extension."""
+        return ".gcm"
+    
+    def get_module_scan_command(
+        self,
+        source_file: Path,
+        scan_file: Path,
+        object_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Build the g++ command that writes a source's P1689 module dependencies.
+        
+        Invokes: g++ -E -std=c++20 -fmodules-ts -x c++ <source> [-I<include>] [flags]
+                 -fdeps-format=p1689r5 -fdeps-file=<scan> -fdeps-target=<object> [-MMD -MF <depfile>]
+        
+        Needs GCC 14 or later (-fdeps-*).
+        """
+        cmd = ["g++", "-E", "-std=c++20", "-fmodules-ts", "-x", "c++", str(source_file), "-o", os.devnull]
+        
+        if include_dirs:
+            for inc_dir in include_dirs:
+                cmd.append(f"-I{inc_dir}")
+        
+        if flags:
+            cmd.extend(flags)
+        
+        cmd.extend(["-fdeps-format=p1689r5", f"-fdeps-file={scan_file}", f"-fdeps-target={object_file}"])
+        
+        if depfile:
+            cmd.extend(["-MMD", "-MF", str(depfile)])
+        
+        return cmd
+    
+    def get_module_flags(
+        self,
+        map_file: Path,
+        bmi_files: Dict[str, Path],
+        provides: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Get the g++ module flags of a translation unit.
+        
+        g++ finds the BMI of every module (and where to write the one it
+        provides) in the module map, so all units get the same flags.
+        """
+        return ["-std=c++20", "-fmodules-ts", f"-fmodule-mapper={map_file}"]
+    
+    def write_module_map(self, map_file: Path, bmi_files: Dict[str, Path]) -> None:
+        """
+        Write a g++ module mapper file ("<module> <BMI path>" per line).
+        
+        The file is only rewritten when its contents change.
+        """
+        text = "".join(f"{name} {bmi_files[name]}\n" for name in sorted(bmi_files))
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                print(f"  Error: {result.stderr}")
-                return False
-            return True
-        except FileNotFoundError:
-            print(f"  Error: g++ not found. Ensure GCC is installed and in PATH")
-            return False
-        except Exception as e:
-            print(f"  Error: {e}")
-            return False
+            with open(map_file, "r", encoding="utf-8") as f:
+                if f.read() == text:
+                    return
+        except OSError:
+            pass
+        map_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(map_file, "w", encoding="utf-8") as f:
+            f.write(text)
+    
+    def _probe_stamp_files(self) -> List[str]:
+        """Get the resolved g++ binary (its mtime and size key the probe cache)."""
+        from shutil import which
+        
+        path = which("g++")
+        return [os.path.realpath(path)] if path else []
+    
+    def _detect(self) -> ToolchainProbe:
+        """Probe g++ for its version, target and default include dirs."""
+        return probe_gnu_driver("GCC", "g++")
     
     def link_executable(
         self,
@@ -85,8 +279,6 @@ class GCCToolchain(Toolchain):
         Returns:
             True if linking succeeded, False otherwise.
         """
-        import subprocess
-        
         # Build g++ link command
         cmd = ["g++", "-o", str(output_file)] + [str(obj) for obj in object_files]
         
@@ -107,11 +299,7 @@ class GCCToolchain(Toolchain):
         print(f"[GCC] Linking executable: {output_file}")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                print(f"  Error: {result.stderr}")
-                return False
-            return True
+            return self.run_tool(cmd, output_file.name, self.get_log_file(output_file)) == 0
         except FileNotFoundError:
             print(f"  Error: g++ not found. Ensure GCC is installed and in PATH")
             return False
@@ -138,8 +326,6 @@ class GCCToolchain(Toolchain):
         Returns:
             True if linking succeeded, False otherwise.
         """
-        import subprocess
-        
         # Build ar command
         cmd = ["ar", "rcs", str(output_file)] + [str(obj) for obj in object_files]
         
@@ -150,11 +336,7 @@ class GCCToolchain(Toolchain):
         print(f"[GCC] Creating static library: {output_file}")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                print(f"  Error: {result.stderr}")
-                return False
-            return True
+            return self.run_tool(cmd, output_file.name, self.get_log_file(output_file)) == 0
         except FileNotFoundError:
             print(f"  Error: ar not found. Ensure GCC toolchain is installed and in PATH")
             return False
@@ -185,8 +367,6 @@ class GCCToolchain(Toolchain):
         Returns:
             True if linking succeeded, False otherwise.
         """
-        import subprocess
-        
         # Build g++ link command for shared library
         cmd = ["g++", "-shared", "-o", str(output_file)] + [str(obj) for obj in object_files]
         
@@ -207,11 +387,7 @@ class GCCToolchain(Toolchain):
         print(f"[GCC] Linking shared library: {output_file}")
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-            if result.returncode != 0:
-                print(f"  Error: {result.stderr}")
-                return False
-            return True
+            return self.run_tool(cmd, output_file.name, self.get_log_file(output_file)) == 0
         except FileNotFoundError:
             print(f"  Error: g++ not found. Ensure GCC is installed and in PATH")
             return False
@@ -1,37 +1,92 @@
 """Microsoft Visual C++ toolchain."""
 
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import subprocess
 import os
 from .base import Toolchain
+from .probe import ToolchainProbe
+from src.core.depfile import write_depfile
 
 
 class MSVCToolchain(Toolchain):
     """Microsoft Visual C++ toolchain (cl.exe, link.exe, lib.exe)."""
     
+    # Prefix of the lines /showIncludes writes (English cl.exe output)
+    SHOW_INCLUDES_PREFIX = "Note: including file:"
+    
+    # Variables VsDevCmd.bat sets; a developer prompt with different ones needs a new probe
+    PROBE_ENV_VARS = ("INCLUDE", "LIB", "LIBPATH", "VSINSTALLDIR", "VCToolsInstallDir", "WindowsSdkDir")
+    
+    VSDEVCMD_PATHS = [
+        Path("C:/Program Files/Microsoft Visual Studio/2022/Community/Common7/Tools/VsDevCmd.bat"),
+        Path("C:/Program Files/Microsoft Visual Studio/2022/BuildTools/Common7/Tools/VsDevCmd.bat"),
+        Path("C:/Program Files (x86)/Microsoft Visual Studio/2019/Community/Common7/Tools/VsDevCmd.bat"),
+        Path("C:/Program Files (x86)/Microsoft Visual Studio/2019/BuildTools/Common7/Tools/VsDevCmd.bat"),
+    ]
+    
     def __init__(self):
-        """Initialize MSVC toolchain."""
+        """
+        Initialize MSVC toolchain.
+        
+        The VsDevCmd.bat environment and tool paths come from the probe
+        cache, so VsDevCmd.bat only runs when the installation changed.
+        """
         super().__init__("MSVC")
+        probe = self.get_probe()
+        os.environ.update(probe.environment)
+        self._cl_exe = probe.path or "cl.exe"
+        self._link_exe = probe.tools.get("link", "link.exe")
+        self._lib_exe = probe.tools.get("lib", "lib.exe")
+        self._include_dirs = [Path(d) for d in probe.include_dirs]
+    
+    def _probe_stamp_files(self) -> List[str]:
+        """Get VsDevCmd.bat and any cl.exe already on PATH."""
+        from shutil import which
+        
+        files = [str(path) for path in self.VSDEVCMD_PATHS if path.exists()][:1]
+        cl_exe = which("cl.exe")
+        if cl_exe:
+            files.append(cl_exe)
+        return files
+    
+    def _detect(self) -> ToolchainProbe:
+        """Run VsDevCmd.bat and locate cl.exe, link.exe, lib.exe and the system headers."""
+        before = dict(os.environ)
         self._setup_msvc_environment()
-        self._cl_exe = self._find_cl_exe()
-        self._link_exe = self._find_link_exe()
-        self._lib_exe = self._find_lib_exe()
-        self._include_dirs = self._find_include_dirs()
+        environment = {key: value for key, value in os.environ.items() if before.get(key) != value}
+        
+        cl_exe = self._find_cl_exe()
+        probe = ToolchainProbe(
+            "MSVC",
+            path=cl_exe if Path(cl_exe).is_file() or self._on_path(cl_exe) else "",
+            target=os.environ.get("VSCMD_ARG_TGT_ARCH", "x64"),
+            include_dirs=[str(d) for d in self._find_include_dirs()],
+            environment=environment,
+            tools={"link": self._find_link_exe(), "lib": self._find_lib_exe()},
+        )
+        
+        # Read the version banner cl.exe prints when run without arguments
+        try:
+            result = subprocess.run([cl_exe], capture_output=True, text=True, check=False)
+            probe.version = result.stderr.splitlines()[0] if result.stderr else ""
+        except OSError:
+            pass
+        return probe
     
     @staticmethod
-    def _setup_msvc_environment() -> None:
+    def _on_path(executable: str) -> bool:
+        """Check whether an executable can be found on PATH."""
+        from shutil import which
+        
+        return which(executable) is not None
+    
+    @classmethod
+    def _setup_msvc_environment(cls) -> None:
         """Set up MSVC environment variables by calling VsDevCmd.bat."""
         # Find VsDevCmd.bat
-        vsdevcmd_paths = [
-            Path("C:/Program Files/Microsoft Visual Studio/2022/Community/Common7/Tools/VsDevCmd.bat"),
-            Path("C:/Program Files/Microsoft Visual Studio/2022/BuildTools/Common7/Tools/VsDevCmd.bat"),
-            Path("C:/Program Files (x86)/Microsoft Visual Studio/2019/Community/Common7/Tools/VsDevCmd.bat"),
-            Path("C:/Program Files (x86)/Microsoft Visual Studio/2019/BuildTools/Common7/Tools/VsDevCmd.bat"),
-        ]
-        
         vsdevcmd = None
-        for path in vsdevcmd_paths:
+        for path in cls.VSDEVCMD_PATHS:
             if path.exists():
                 vsdevcmd = path
                 break
@@ -198,21 +253,107 @@ class MSVCToolchain(Toolchain):
         output_file: Path,
         include_dirs: Optional[List[Path]] = None,
         flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
     ) -> bool:
         """
         Compile source with cl.exe.
         
-        Invokes: cl.exe /c /Fo<output> [/I<include>] [flags] <source>
+        Invokes: cl.exe /c /Fo<output> [/I<include>] [flags] [/showIncludes] <source>
         
         Args:
             source_file: Path to source file.
             output_file: Path to output object file.
             include_dirs: Optional list of include directories.
             flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
             
         Returns:
             True if compilation succeeded, False otherwise.
         """
+        cmd = self.get_compile_command(source_file, output_file, include_dirs, flags, depfile)
+        
+        print(f"[MSVC] Compiling {source_file} -> {output_file}")
+        
+        try:
+            # cl.exe reports diagnostics on stdout; capture and re-print them so
+            # output from parallel compiles stays grouped per translation unit
+            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+            stdout = result.stdout
+            if depfile:
+                stdout, includes = self._extract_includes(stdout)
+                if result.returncode == 0:
+                    write_depfile(depfile, output_file, includes)
+            if stdout:
+                print(stdout, end="")
+            if result.stderr:
+                print(result.stderr, end="")
+            
+            if result.returncode != 0:
+                return False
+            return True
+        except FileNotFoundError:
+            print(f"  Error: cl.exe not found at {self._cl_exe}")
+            print(f"  Ensure MSVC is installed and accessible")
+            return False
+        except Exception as e:
+            print(f"  Error: {e}")
+            return False
+    
+    def _extract_includes(self, output: str) -> Tuple[str, List[str]]:
+        """
+        Split /showIncludes notes out of cl.exe output.
+        
+        Headers from the MSVC and Windows SDK include directories are
+        dropped, matching GCC's -MMD which only lists user headers.
+        
+        Args:
+            output: Captured cl.exe stdout.
+            
+        Returns:
+            Tuple of (remaining output, included header paths).
+        """
+        system_dirs = [os.path.normcase(str(d)) for d in self._include_dirs]
+        system_dirs.extend(
+            os.path.normcase(d) for d in os.environ.get("INCLUDE", "").split(";") if d
+        )
+        
+        lines = []
+        includes = []
+        seen = set()
+        for line in output.splitlines(keepends=True):
+            if not line.startswith(self.SHOW_INCLUDES_PREFIX):
+                lines.append(line)
+                continue
+            header = line[len(self.SHOW_INCLUDES_PREFIX):].strip()
+            normalized = os.path.normcase(header)
+            if any(normalized.startswith(d) for d in system_dirs) or normalized in seen:
+                continue
+            seen.add(normalized)
+            includes.append(header)
+        
+        return "".join(lines), includes
+    
+    def get_compile_command(
+        self,
+        source_file: Path,
+        output_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+        depfile: Optional[Path] = None,
+    ) -> List[str]:
+        """
+        Build the cl.exe compile command.
+        
+        Args:
+            source_file: Path to source file.
+            output_file: Path to output object file.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
+            depfile: Optional path of a Makefile-style dependency file to write.
+            
+        Returns:
+            cl.exe command as a list of arguments.
+        """
         # Build cl.exe command
         cmd = [self._cl_exe, "/c", f"/Fo{output_file}", str(source_file)]
         
@@ -232,25 +373,42 @@ class MSVCToolchain(Toolchain):
         if flags:
             cmd.extend(flags)
         
-        print(f"[MSVC] Compiling {source_file} -> {output_file}")
+        # Report included headers on stdout; compile_object turns them into a depfile
+        if depfile:
+            cmd.append("/showIncludes")
         
-        # Debug: show the command
-        # print(f"  Command: {' '.join(cmd)}")
+        return cmd
+    
+    def get_preprocess_command(
+        self,
+        source_file: Path,
+        include_dirs: Optional[List[Path]] = None,
+        flags: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Build the cl.exe preprocess-only command.
         
-        try:
-            # Run cl.exe without capturing output - let it print directly
-            result = subprocess.run(cmd, check=False)
+        Invokes: cl.exe /E /nologo [/I<include>] [flags] <source>
+        
+        Args:
+            source_file: Path to source file.
+            include_dirs: Optional list of include directories.
+            flags: Optional list of compiler flags.
             
-            if result.returncode != 0:
-                return False
-            return True
-        except FileNotFoundError:
-            print(f"  Error: cl.exe not found at {self._cl_exe}")
-            print(f"  Ensure MSVC is installed and accessible")
-            return False
-        except Exception as e:
-            print(f"  Error: {e}")
-            return False
+        Returns:
+            cl.exe command as a list of arguments.
+        """
+        cmd = [self._cl_exe, "/E", "/nologo", str(source_file)]
+        cmd.extend(["/std:c++17", "/EHsc", "/D_CRT_SECURE_NO_WARNINGS"])
+        
+        if include_dirs:
+            for inc_dir in include_dirs:
+                cmd.append(f"/I{inc_dir}")
+        
+        if flags:
+            cmd.extend(flags)
+        
+        return cmd
     
     def link_executable(
         self,
@@ -0,0 +1,208 @@
+"""Toolchain detection with a persistent on-disk cache."""
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+import hashlib
+import json
+import os
+import re
+import subprocess
+import uuid
+
+# Bumped whenever ToolchainProbe gains fields or detection changes
+PROBE_VERSION = 1
+
+# Environment variables that change what every compiler driver does
+COMMON_ENV_VARS = ("PATH",)
+
+
+@dataclass
+class ToolchainProbe:
+    """
+    What a toolchain detected about the installed compiler.
+    
+    Attributes:
+        compiler: Toolchain name (GCC, Clang, MSVC).
+        path: Resolved compiler executable ("" if not found).
+        version: Version banner ("" if the compiler cannot be run).
+        target: Target triple (or architecture for MSVC).
+        include_dirs: Built-in system include directories.
+        environment: Environment variables the toolchain needs set.
+        tools: Other tools found alongside the compiler (linker, archiver).
+    """
+    
+    compiler: str
+    path: str = ""
+    version: str = ""
+    target: str = ""
+    include_dirs: List[str] = field(default_factory=list)
+    environment: Dict[str, str] = field(default_factory=dict)
+    tools: Dict[str, str] = field(default_factory=dict)
+    
+    @property
+    def fingerprint(self) -> str:
+        """Identity of the compiler for cache keys and signatures."""
+        return f"{self.compiler}|{self.version}|{self.target}"
+
+
+def probe_gnu_driver(compiler: str, executable: str) -> ToolchainProbe:
+    """
+    Probe a GCC-compatible driver (g++, clang++).
+    
+    Runs `<driver> --version` for the version banner and
+    `<driver> -x c++ -E -v -` for the target and default include search
+    path.
+    
+    Args:
+        compiler: Toolchain name.
+        executable: Driver to run.
+    
+    Returns:
+        Probe result (empty fields when the driver cannot be run).
+    """
+    from shutil import which
+    
+    probe = ToolchainProbe(compiler, path=which(executable) or "")
+    if not probe.path:
+        return probe
+    
+    try:
+        result = subprocess.run([executable, "--version"], capture_output=True, text=True, check=False)
+        probe.version = result.stdout.splitlines()[0] if result.stdout else ""
+        result = subprocess.run(
+            [executable, "-x", "c++", "-E", "-v", "-"],
+            input="", capture_output=True, text=True, check=False,
+        )
+    except OSError:
+        return probe
+    
+    in_search_list = False
+    for line in result.stderr.splitlines():
+        if line.startswith("Target:"):
+            probe.target = line.split(":", 1)[1].strip()
+        elif line.startswith("#include <...> search starts here:"):
+            in_search_list = True
+        elif line.startswith("End of search list."):
+            in_search_list = False
+        elif in_search_list and line.startswith(" "):
+            # macOS adds " (framework directory)" to framework paths
+            probe.include_dirs.append(re.sub(r" \(framework directory\)$", "", line.strip()))
+    return probe
+
+
+class ProbeCache:
+    """
+    On-disk cache of toolchain probes.
+    
+    Detection can take seconds (MSVC runs VsDevCmd.bat), so results are
+    stored as JSON under the user cache directory. The key covers the
+    toolchain name, the environment variables the toolchain depends on
+    (PATH always) and the size and mtime of the files it is detected from
+    (the compiler binary), so installing, upgrading or switching a
+    compiler is picked up on the next build.
+    """
+    
+    def __init__(self, cache_dir: Path):
+        """
+        Initialize probe cache.
+        
+        Args:
+            cache_dir: Directory holding one JSON file per probe.
+        """
+        self.cache_dir = Path(cache_dir)
+    
+    @staticmethod
+    def key(compiler: str, env_vars: Iterable[str], stamp_files: Iterable[str]) -> str:
+        """
+        Compute the cache key of a probe.
+        
+        Args:
+            compiler: Toolchain name.
+            env_vars: Names of the environment variables detection reads.
+            stamp_files: Files whose change invalidates the probe.
+        
+        Returns:
+            Hex digest.
+        """
+        parts = [f"v{PROBE_VERSION}", compiler]
+        for name in sorted(set(COMMON_ENV_VARS) | set(env_vars)):
+            parts.append(f"{name}={os.environ.get(name, '')}")
+        for path in stamp_files:
+            try:
+                st = os.stat(path)
+                parts.append(f"{path}:{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                parts.append(f"{path}:missing")
+        return hashlib.sha256("\0".join(parts).encode("utf-8", "surrogateescape")).hexdigest()[:32]
+    
+    def load(self, key: str) -> Optional[ToolchainProbe]:
+        """Get a cached probe (None if missing or unreadable)."""
+        try:
+            with open(self.cache_dir / f"{key}.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return ToolchainProbe(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+    
+    def store(self, key: str, probe: ToolchainProbe) -> None:
+        """Write a probe to the cache (errors are ignored; the cache is optional)."""
+        path = self.cache_dir / f"{key}.json"
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(asdict(probe), f, indent=2)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+    
+    def get(
+        self,
+        compiler: str,
+        env_vars: Iterable[str],
+        stamp_files: Iterable[str],
+        detect: Callable[[], ToolchainProbe],
+    ) -> ToolchainProbe:
+        """
+        Get a probe from the cache, detecting and storing it on a miss.
+        
+        Probes that found no compiler are not stored, so installing one
+        takes effect without clearing the cache.
+        
+        Args:
+            compiler: Toolchain name.
+            env_vars: Environment variables detection reads.
+            stamp_files: Files whose change invalidates the probe.
+            detect: Runs the actual detection.
+        
+        Returns:
+            Probe result.
+        """
+        key = self.key(compiler, env_vars, list(stamp_files))
+        probe = self.load(key)
+        if probe is None:
+            probe = detect()
+            if probe.path:
+                self.store(key, probe)
+        return probe
+
+
+def default_probe_cache() -> Optional[ProbeCache]:
+    """
+    Get the probe cache in the user cache directory.
+    
+    SUGAR_PROBE_CACHE overrides the location ("" or "0" disables caching).
+    
+    Returns:
+        Probe cache, or None if caching is disabled.
+    """
+    from src.core.objcache import default_cache_dir
+    
+    override = os.environ.get("SUGAR_PROBE_CACHE")
+    if override is not None:
+        return ProbeCache(Path(override)) if override not in ("", "0") else None
+    return ProbeCache(default_cache_dir() / "probes")
@@ -0,0 +1,32 @@
+"""Test setup: make this directory importable as the `src` package."""
+
+from pathlib import Path
+import os
+import sys
+import tempfile
+
+import pytest
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "python version"
+
+
+def _import_root() -> Path:
+    """
+    Get a directory from which `import src` loads this package.
+    
+    The package imports itself as `src`, but its directory has another
+    name, so a `src` symlink to it is made in a temporary directory.
+    """
+    root = Path(tempfile.mkdtemp(prefix="sugar-tests-"))
+    os.symlink(PACKAGE_DIR, root / "src", target_is_directory=True)
+    return root
+
+
+IMPORT_ROOT = _import_root()
+sys.path.insert(0, str(IMPORT_ROOT))
+
+
+@pytest.fixture
+def import_root() -> Path:
+    """Directory to put on PYTHONPATH so subprocesses can run `python -m src`."""
+    return IMPORT_ROOT
@@ -0,0 +1,100 @@
+"""Tests for the make jobserver client."""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.core import jobserver as jobserver_module
+from src.core.jobserver import Jobserver
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="the jobserver is POSIX only")
+
+# Run by make for each target: several threads take and return the tokens
+# make did not hand out, racing the other target's process for them
+CHILD_SCRIPT = """
+import os
+import sys
+import threading
+
+from src.core.jobserver import Jobserver
+
+jobserver = Jobserver.from_environment()
+assert jobserver is not None and jobserver.fifo_path is None, os.environ.get("MAKEFLAGS")
+assert not os.get_blocking(jobserver.read_fd)
+assert jobserver.acquire() is None
+
+def work():
+    for _ in range(50):
+        token = jobserver.acquire()
+        assert token is not None
+        jobserver.release(token)
+
+threads = [threading.Thread(target=work) for _ in range(4)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+jobserver.close()
+print(f"done {sys.argv[1]}")
+"""
+
+MAKEFILE = """all: a b
+
+a b:
+\t+@"$(PYTHON)" child.py $@
+"""
+
+
+@pytest.mark.skipif(shutil.which("make") is None, reason="needs make")
+def test_pipe_jobserver_clients_share_tokens_under_make(tmp_path, import_root):
+    (tmp_path / "child.py").write_text(CHILD_SCRIPT, encoding="utf-8")
+    (tmp_path / "Makefile").write_text(MAKEFILE, encoding="utf-8")
+    env = dict(os.environ, PYTHONPATH=str(import_root))
+    env.pop("MAKEFLAGS", None)
+    env.pop("MFLAGS", None)
+    
+    # make before 4.4 only has pipe jobservers; newer ones are asked for one
+    style = subprocess.run(["make", "--jobserver-style=pipe", "--version"], capture_output=True, env=env)
+    # Two of the three tokens of -j4 are left for the recipes to share
+    command = ["make", "-j4", f"PYTHON={sys.executable}"]
+    if style.returncode == 0:
+        command.insert(1, "--jobserver-style=pipe")
+    result = subprocess.run(command, cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert sorted(result.stdout.split()) == ["a", "b", "done", "done"]
+
+
+def test_pipe_client_goes_back_to_select_after_losing_a_token(monkeypatch):
+    read_fd, write_fd = os.pipe()
+    try:
+        jobserver = Jobserver.from_environment(f"-j2 --jobserver-auth={read_fd},{write_fd}")
+        assert jobserver is not None
+        assert jobserver.acquire() is None
+        
+        # select reports a token that another client then reads first
+        monkeypatch.setattr(jobserver_module.select, "select", lambda r, w, x, timeout: (r, [], []))
+        errors = []
+        
+        def wait():
+            try:
+                jobserver.acquire()
+            except RuntimeError as e:
+                errors.append(e)
+        
+        waiter = threading.Thread(target=wait, daemon=True)
+        waiter.start()
+        time.sleep(0.2)
+        jobserver.close()
+        waiter.join(5)
+        assert not waiter.is_alive(), "acquire() blocked in read"
+        assert errors
+    finally:
+        # Wakes a reader stuck in a blocking read before the pipe is closed
+        os.write(write_fd, b"+")
+        os.close(read_fd)
+        os.close(write_fd)
@@ -0,0 +1,118 @@
+"""Tests for the toolchain probe cache."""
+
+from pathlib import Path
+from typing import List
+import os
+
+import pytest
+
+from src.toolchains import GCCToolchain, MSVCToolchain
+
+# The fake compilers are shell scripts
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="needs a POSIX shell")
+
+GCC_SCRIPT = """#!/bin/sh
+echo "$0 $*" >> "{calls}"
+if [ "$1" = "--version" ]; then
+    echo "g++ (Fake) {version}"
+else
+    echo "Target: x86_64-fake-linux-gnu" >&2
+    echo "#include <...> search starts here:" >&2
+    echo " /fake/include" >&2
+    echo "End of search list." >&2
+fi
+"""
+
+CL_SCRIPT = """#!/bin/sh
+echo "$0 $*" >> "{calls}"
+echo "Microsoft (R) C/C++ Optimizing Compiler Version {version} for x64" >&2
+"""
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    """Directory put first on PATH, with the probe cache redirected under tmp_path."""
+    directory = tmp_path / "bin"
+    directory.mkdir()
+    monkeypatch.setenv("PATH", f"{directory}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("SUGAR_PROBE_CACHE", str(tmp_path / "probes"))
+    return directory
+
+
+def _write_script(path: Path, template: str, version: str) -> None:
+    path.write_text(template.format(calls=path.with_name("calls.txt"), version=version), encoding="utf-8")
+    path.chmod(0o755)
+
+
+def _calls(fake_bin: Path) -> List[str]:
+    try:
+        return (fake_bin / "calls.txt").read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def test_gcc_probe_is_cached(fake_bin):
+    _write_script(fake_bin / "g++", GCC_SCRIPT, "12.0.0")
+    
+    probe = GCCToolchain().get_probe()
+    assert probe.version == "g++ (Fake) 12.0.0"
+    assert probe.target == "x86_64-fake-linux-gnu"
+    assert probe.include_dirs == ["/fake/include"]
+    assert len(_calls(fake_bin)) == 2
+    
+    # A new toolchain instance (a later build) reads the cache instead of running g++
+    assert GCCToolchain().get_probe() == probe
+    assert len(_calls(fake_bin)) == 2
+
+
+def test_gcc_probe_is_invalidated_by_the_compiler_binary(fake_bin):
+    script = fake_bin / "g++"
+    _write_script(script, GCC_SCRIPT, "12.0.0")
+    GCCToolchain().get_probe()
+    
+    # Upgrading the compiler changes its size and mtime
+    _write_script(script, GCC_SCRIPT, "13.10.0")
+    assert GCCToolchain().get_probe().version == "g++ (Fake) 13.10.0"
+    assert len(_calls(fake_bin)) == 4
+    
+    # A changed mtime alone is enough
+    stat = script.stat()
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    GCCToolchain().get_probe()
+    assert len(_calls(fake_bin)) == 6
+
+
+def test_gcc_probe_is_invalidated_by_its_environment(fake_bin, monkeypatch):
+    _write_script(fake_bin / "g++", GCC_SCRIPT, "12.0.0")
+    GCCToolchain().get_probe()
+    
+    monkeypatch.setenv("CPATH", "/opt/include")
+    GCCToolchain().get_probe()
+    assert len(_calls(fake_bin)) == 4
+    
+    # Variables the toolchain does not read keep the cached probe
+    monkeypatch.setenv("SUGAR_UNRELATED", "1")
+    GCCToolchain().get_probe()
+    assert len(_calls(fake_bin)) == 4
+
+
+def test_msvc_probe_is_cached_and_invalidated(fake_bin, monkeypatch):
+    script = fake_bin / "cl.exe"
+    _write_script(script, CL_SCRIPT, "19.38.33130")
+    monkeypatch.delenv("INCLUDE", raising=False)
+    
+    probe = MSVCToolchain().get_probe()
+    assert probe.version == "Microsoft (R) C/C++ Optimizing Compiler Version 19.38.33130 for x64"
+    assert len(_calls(fake_bin)) == 1
+    
+    assert MSVCToolchain().get_probe() == probe
+    assert len(_calls(fake_bin)) == 1
+    
+    # A developer prompt for another SDK sets different variables
+    monkeypatch.setenv("INCLUDE", "C:/Other/Include")
+    MSVCToolchain().get_probe()
+    assert len(_calls(fake_bin)) == 2
+    
+    _write_script(script, CL_SCRIPT, "19.40.33807")
+    assert MSVCToolchain().get_probe().version.endswith("19.40.33807 for x64")
+    assert len(_calls(fake_bin)) == 3
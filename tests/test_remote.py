@@ -0,0 +1,125 @@
+"""Tests for distributed compilation over localhost workers."""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from src.core.remote import MAX_HEADER_SIZE, RemoteCompiler, WorkerServer
+from src.toolchains import Toolchain
+
+pytestmark = pytest.mark.skipif(shutil.which("g++") is None, reason="needs g++")
+
+
+@contextmanager
+def _workers(count: int = 2) -> Iterator[List[WorkerServer]]:
+    """
+    Run single-slot workers on 127.0.0.1, each serving from its own thread.
+    
+    Workers capture what compiles print by replacing sys.stdout, which
+    pytest swaps between fixture setup and the test, so tests start them
+    themselves.
+    """
+    servers = [WorkerServer("127.0.0.1:0", 1) for _ in range(count)]
+    threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in servers]
+    for thread in threads:
+        thread.start()
+    try:
+        yield servers
+    finally:
+        for server, thread in zip(servers, threads):
+            if thread.is_alive():
+                server.shutdown()
+                thread.join()
+                server.close()
+
+
+def _kill(server: WorkerServer) -> None:
+    """Stop a worker and close its socket, as if its machine went away."""
+    server.shutdown()
+    server.close()
+
+
+def _connect(servers: List[WorkerServer]) -> RemoteCompiler:
+    remote = RemoteCompiler.connect(Toolchain.create("GCC"), [server.bound_address for server in servers])
+    assert remote is not None
+    return remote
+
+
+def _write_sources(tmp_path: Path) -> None:
+    (tmp_path / "one.cpp").write_text("int one() { return 1; }\n")
+    (tmp_path / "two.cpp").write_text("int two() { return 2; }\n")
+
+
+def _link_and_run(tmp_path: Path) -> int:
+    main = tmp_path / "main.cpp"
+    main.write_text("int one(); int two(); int main() { return one() + two(); }\n")
+    program = tmp_path / "program"
+    objects = [str(tmp_path / "one.o"), str(tmp_path / "two.o")]
+    subprocess.run(["g++", "-o", str(program), str(main), *objects], check=True)
+    return subprocess.run([str(program)]).returncode
+
+
+def test_compiles_are_dispatched_to_every_worker(tmp_path):
+    _write_sources(tmp_path)
+    with _workers(2) as workers:
+        remote = _connect(workers)
+        assert len(remote.workers) == 2
+        assert remote.capacity == 2
+        
+        assert remote.compile_object(tmp_path / "one.cpp", tmp_path / "one.o", depfile=tmp_path / "one.d")
+        # While the first worker's slot is taken, the second one gets the compile
+        remote.workers[0].in_flight += 1
+        try:
+            assert remote.compile_object(tmp_path / "two.cpp", tmp_path / "two.o")
+        finally:
+            remote.workers[0].in_flight -= 1
+        assert [server.completed for server in workers] == [1, 1]
+    
+    assert remote.remote_compiles == 2 and remote.local_compiles == 0
+    assert str(tmp_path / "one.cpp") in (tmp_path / "one.d").read_text()
+    assert _link_and_run(tmp_path) == 3
+
+
+def test_falls_back_to_local_compile_when_a_worker_dies(tmp_path):
+    _write_sources(tmp_path)
+    with _workers(2) as workers:
+        remote = _connect(workers)
+        _kill(workers[1])
+        
+        remote.workers[0].in_flight += 1
+        try:
+            assert remote.compile_object(tmp_path / "one.cpp", tmp_path / "one.o")
+        finally:
+            remote.workers[0].in_flight -= 1
+        assert not remote.workers[1].alive
+        assert remote.fallbacks == 1 and remote.local_compiles == 1
+        
+        # The dead worker is no longer picked; the live one still is
+        assert remote.compile_object(tmp_path / "two.cpp", tmp_path / "two.o")
+        assert remote.remote_compiles == 1 and workers[0].completed == 1
+        assert remote.capacity == 1
+    
+    assert _link_and_run(tmp_path) == 3
+
+
+def test_large_diagnostics_do_not_break_the_protocol(tmp_path, capsys):
+    # Diagnostics echo the source lines; JSON escapes each "é" to six bytes
+    text = "é" * 200
+    lines = [f'int f{i}() {{ return undeclared_name_{i} + sizeof("{text}"); }}' for i in range(3000)]
+    (tmp_path / "bad.cpp").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    
+    with _workers(1) as workers:
+        remote = _connect(workers)
+        assert not remote.compile_object(tmp_path / "bad.cpp", tmp_path / "bad.o")
+        assert remote.workers[0].alive
+        assert remote.fallbacks == 0 and remote.local_compiles == 0
+    
+    assert "undeclared_name_0" in capsys.readouterr().out
+    # The console shows the start; the log keeps more than a header could carry
+    log = (tmp_path / "bad.o.log").read_text(encoding="utf-8")
+    assert len(log.encode("utf-8")) > MAX_HEADER_SIZE // 4
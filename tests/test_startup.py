@@ -0,0 +1,40 @@
+"""Import-time regression tests for the CLI entry point."""
+
+import pytest
+
+from src.benchmarks.startup import BUDGETS_MS, FORBIDDEN_MODULES, measure
+
+# Modules that only building needs; any of them makes every command slow to start
+HEAVY_MODULES = ["sqlite3", "src.toolchains", "src.toolchains.gcc", "src.commands.build", "concurrent.futures"]
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Minimal project for commands that read sugar.toml."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "sugar.toml").write_text(
+        'project_name = "startup"\n'
+        'project_type = "exe"\n'
+        'compiler = "GCC"\n'
+        'platform = "Linux"\n'
+        'source_paths = ["src"]\n'
+        'build_path = "build"\n'
+        'output_path = "bin"\n',
+        encoding="utf-8",
+    )
+    return tmp_path
+
+
+def test_help_imports_nothing_heavy(project):
+    # Runs `python -X importtime -m src --help` (best of several runs)
+    elapsed, modules = measure(["--help"], project, repeat=5)
+    for name in HEAVY_MODULES + FORBIDDEN_MODULES["--help"]:
+        assert name not in modules, f"sugar --help imports {name}"
+    assert elapsed <= BUDGETS_MS["--help"], f"sugar --help spends {elapsed:.1f} ms in imports"
+
+
+def test_configure_does_not_import_build_machinery(project):
+    elapsed, modules = measure(["configure"], project, repeat=5)
+    for name in HEAVY_MODULES + FORBIDDEN_MODULES["configure"]:
+        assert name not in modules, f"sugar configure imports {name}"
+    assert elapsed <= BUDGETS_MS["configure"], f"sugar configure spends {elapsed:.1f} ms in imports"
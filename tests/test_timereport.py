@@ -0,0 +1,66 @@
+"""Tests for the -ftime-trace hotspot report."""
+
+import json
+
+from src.core.timereport import TimeReport
+
+
+def _event(name, dur, detail=None):
+    event = {"ph": "X", "name": name, "dur": dur}
+    if detail is not None:
+        event["args"] = {"detail": detail}
+    return event
+
+
+def _write_trace(path, events):
+    path.write_text(json.dumps({"traceEvents": events}), encoding="utf-8")
+
+
+def test_backend_events_are_keyed_by_event_name(tmp_path):
+    _write_trace(tmp_path / "a.json", [
+        _event("OptModule", 900, "a.cpp"),
+        _event("OptFunction", 300, "_Z3foov"),
+        _event("OptFunction", 200, "_Z3barv"),
+        _event("RunPass", 150, "InstCombinePass"),
+        _event("RunPass", 50, "SROAPass"),
+        _event("CodeGen Function", 100, "_Z3foov"),
+    ])
+    _write_trace(tmp_path / "b.json", [
+        _event("OptFunction", 500, "_Z3bazv"),
+        _event("RunPass", 100, "InstCombinePass"),
+    ])
+    
+    report = TimeReport()
+    assert report.add_file(tmp_path / "a.json", "a.cpp")
+    assert report.add_file(tmp_path / "b.json", "b.cpp")
+    
+    # Function and pass names never show up next to each other
+    assert dict(report.backend) == {
+        "OptModule": [900.0, 1],
+        "OptFunction": [1000.0, 3],
+        "RunPass": [300.0, 3],
+        "CodeGen Function": [100.0, 1],
+    }
+    assert [row["name"] for row in report.to_dict()["backend"]] == [
+        "OptFunction", "OptModule", "RunPass", "CodeGen Function",
+    ]
+
+
+def test_frontend_sections_and_units(tmp_path):
+    _write_trace(tmp_path / "a.json", [
+        _event("Source", 400, "vector"),
+        _event("InstantiateClass", 250, "std::vector<int>"),
+        _event("ExecuteCompiler", 2000),
+        _event("Total Frontend", 1200),
+        {"ph": "i", "name": "Source", "args": {"detail": "ignored"}},
+    ])
+    
+    report = TimeReport()
+    assert report.add_file(tmp_path / "a.json", "a.cpp")
+    assert not report.add_file(tmp_path / "missing.json", "b.cpp")
+    
+    assert dict(report.headers) == {"vector": [400.0, 1]}
+    assert dict(report.templates) == {"std::vector<int>": [250.0, 1]}
+    assert report.units == {"a.cpp": 2000.0}
+    assert report.totals == {"Frontend": 1200.0}
+    assert report.files == 1
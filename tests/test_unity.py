@@ -0,0 +1,58 @@
+"""Tests for unity batch planning."""
+
+from src.core.unity import UnityBuild
+
+
+def _sources(tmp_path, count):
+    directory = tmp_path / "src"
+    directory.mkdir()
+    files = []
+    for i in range(count):
+        path = directory / f"f{i}.cpp"
+        path.write_text(f"int f{i}() {{ return {i}; }}\n")
+        files.append(path)
+    return files
+
+
+def _build_outputs(batch_source):
+    """Pretend a batch was compiled: object, depfile and log beside its source."""
+    outputs = [batch_source.with_suffix(".o"), batch_source.with_suffix(".d"),
+               batch_source.with_name(batch_source.stem + ".o.log")]
+    for path in outputs:
+        path.write_text("")
+    return outputs
+
+
+def test_replanning_deletes_files_of_dropped_batches(tmp_path):
+    files = _sources(tmp_path, 6)
+    build_dir = tmp_path / "build"
+    costs = {str(f): 1.0 for f in files}
+    
+    first = UnityBuild(build_dir, 2)
+    old_batches = first.plan(files, costs)
+    assert len(old_batches) == 3 and first.removed == []
+    old_outputs = [path for batch in old_batches for path in _build_outputs(batch)]
+    
+    # A new batch size re-balances every batch
+    second = UnityBuild(build_dir, 3)
+    new_batches = second.plan(files, costs)
+    assert len(new_batches) == 2
+    assert sorted(second.removed) == sorted(old_batches)
+    for path in old_batches + old_outputs:
+        assert not path.exists(), path
+    assert all(path.exists() for path in new_batches)
+    assert (build_dir / UnityBuild.DIRNAME / UnityBuild.PLAN_FILE).exists()
+
+
+def test_unchanged_batches_keep_their_objects(tmp_path):
+    files = _sources(tmp_path, 4)
+    build_dir = tmp_path / "build"
+    costs = {str(f): 1.0 for f in files}
+    
+    batches = UnityBuild(build_dir, 2).plan(files, costs)
+    outputs = [path for batch in batches for path in _build_outputs(batch)]
+    
+    again = UnityBuild(build_dir, 2)
+    assert again.plan(files, costs) == batches
+    assert again.removed == []
+    assert all(path.exists() for path in outputs)
@@ -0,0 +1,71 @@
+"""Tests for the watch-mode file watchers."""
+
+from pathlib import Path
+import os
+import sys
+
+import pytest
+
+from src.core.watcher import InotifyWatcher, PollingWatcher
+
+
+def _poll_until(watcher, wanted: Path, timeout: float = 5.0) -> set:
+    """Collect changes until wanted is among them or timeout expires."""
+    changed = set()
+    for _ in range(int(timeout / 0.5)):
+        changed |= watcher.poll(0.5)
+        if wanted in changed:
+            break
+    return changed
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_reports_files_of_directory_moved_in(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    outside = tmp_path / "outside" / "extra"
+    (outside / "nested").mkdir(parents=True)
+    (outside / "extra.cpp").write_text("int extra() { return 1; }\n")
+    (outside / "nested" / "more.cpp").write_text("int more() { return 2; }\n")
+    
+    watcher = InotifyWatcher([src])
+    try:
+        os.rename(outside, src / "extra")
+        changed = _poll_until(watcher, src / "extra" / "nested" / "more.cpp")
+        assert src / "extra" / "extra.cpp" in changed
+        assert src / "extra" / "nested" / "more.cpp" in changed
+        
+        # The moved-in tree is watched from now on
+        (src / "extra" / "nested" / "late.cpp").write_text("int late() { return 3; }\n")
+        assert src / "extra" / "nested" / "late.cpp" in _poll_until(watcher, src / "extra" / "nested" / "late.cpp")
+    finally:
+        watcher.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_ignores_files_moved_into_ignored_directory(tmp_path):
+    src = tmp_path / "src"
+    build = src / "build"
+    build.mkdir(parents=True)
+    outside = tmp_path / "objs"
+    outside.mkdir()
+    (outside / "main.o").write_text("")
+    
+    watcher = InotifyWatcher([src], ignore=[build])
+    try:
+        os.rename(outside, build / "objs")
+        assert watcher.poll(0.5) == set()
+    finally:
+        watcher.close()
+
+
+def test_polling_reports_files_of_directory_moved_in(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    outside = tmp_path / "extra"
+    outside.mkdir()
+    (outside / "extra.cpp").write_text("int extra() { return 1; }\n")
+    
+    watcher = PollingWatcher([src], interval=0.05)
+    os.rename(outside, src / "extra")
+    assert src / "extra" / "extra.cpp" in _poll_until(watcher, src / "extra" / "extra.cpp")